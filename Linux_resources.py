@@ -11,8 +11,9 @@
 
 <Purpose>
   Measure system resources on a Linux system, makes
-  extensive use of /proc files and df command for
-  disk info.
+  extensive use of /proc and /sys files, and of system
+  calls (statvfs, getrlimit) for disk info and limits.
+  No commands are run.
 
 <Return value notes>
   The dictionary returned by measure_resources() is used by
@@ -35,6 +36,26 @@
   
   see benchmark_resources for more information.  
   
+<Notes about containers>
+  When the installer runs in a container, the host's processors and memory
+  are not all there for the node to use. get_cpu() and get_memory() also
+  look for the limits of the cgroups of the process (version 1 or 2: the
+  CPU quota, the cpuset and the memory limit) and return the smaller of
+  the host's and the cgroup's values. Both are kept in the Measurement, and
+  benchmark_resources logs them.
+
+  The CPU quota and the cpuset count logical processors, while get_cpu()
+  counts physical cores. The cgroup's limit is converted to cores before
+  the two are compared, by the ratio of cores to logical processors: a
+  cpuset of 6 of the 8 logical processors of a 4 core host allows 3 cores.
+  The number of logical processors is kept in the Measurement as well.
+
+<Notes about NUMA>
+  On hosts with several NUMA nodes, get_cpu() and get_memory() still count
+  all of them together. get_numa_nodes() reports the processors and memory
+  of each node, so that the donation can keep every vessel on a single node
+  (see numa_placement).
+
 <Notes about cpu measurement>
   Two different ways to measure the number of processors is offered.
   
@@ -96,167 +117,612 @@
   OVERALL RESULTS: Judging from examples 1-3, if the number of physical id's
   is multiplied by the number of cores we arrive at the correct number
   of processors on the computer.     
+
+  Where the kernel provides it, both counts come from the topology in
+  /sys/devices/system/cpu instead, which gives the package and core of
+  every online processor directly and needs no such reasoning. Either way
+  /proc/cpuinfo is read at most once by get_cpu_topology(), and get_cpu()
+  reads the topology once, passing it on to get_cgroup_cpu_limit().
 """
 
-import commands
-import measure_random
-import measuredisk
+import os
+import resource
+import benchmark_measurement
+import probe_registry
+
+
+# Where the kernel describes the processors, see get_cpu_topology.
+SYSFS_CPU_DIR = "/sys/devices/system/cpu"
+CPUINFO_PATH = "/proc/cpuinfo"
+
+# Where the kernel describes the NUMA nodes, see get_numa_nodes.
+SYSFS_NODE_DIR = "/sys/devices/system/node"
+
+# Where the cgroups of this process and their hierarchies are listed, see
+# get_cgroup_dirs.
+PROC_CGROUP_PATH = "/proc/self/cgroup"
+MOUNTINFO_PATH = "/proc/self/mountinfo"
 
-def count_processor(procfiledata):
+# Memory limits of a version 1 cgroup at or above this mean no limit.
+CGROUP_UNLIMITED_MEMORY = 2 ** 62
+
+
+def parse_cpu_list(cpulist):
   """
   <Purpose>
-    count_processor will return the number of physical and virtual 
-    processors that are recorded in the /proc/cpuinfo file.
-    
-    Each processor (both physical and virtual) will have its statistics
-    recorded in the /proc/cpuinfo file.
-    Example
- 
+    Parse a list of processors in the kernel's format, as found in
+    /sys/devices/system/cpu/online.
+
+  <Arguments>
+    cpulist:
+           A string like "0-3,8,10-11".
+
+  <Exceptions>
+    ValueError if the string is not a list of processors.
+
+  <Returns>
+    A sorted list of the processor numbers, [0, 1, 2, 3, 8, 10, 11] for the
+    example.
+  """
+  cpus = []
+  for cpurange in cpulist.strip().split(","):
+    if not cpurange:
+      continue
+    if "-" in cpurange:
+      first, last = cpurange.split("-")
+      cpus.extend(range(int(first), int(last) + 1))
+    else:
+      cpus.append(int(cpurange))
+  return sorted(cpus)
+
+
+def _read_sysfs_value(path):
+  """
+  <Purpose>
+    Read a file of a single value from sysfs.
+  
+  <Exceptions>
+    IOError if the file cannot be read.
+
+  <Returns>
+    The contents of the file, without the surrounding white space.
+  """
+  openfile = open(path, 'r')
+  try:
+    return openfile.read().strip()
+  finally:
+    openfile.close()
+
+
+def get_sysfs_topology():
+  """
+  <Purpose>
+    Read the processor topology from /sys/devices/system/cpu. Every online
+    processor has the id of its package (socket) and of its core in its
+    topology directory.
+    HELPER FUNCTION FOR get_cpu_topology()
+
+  <Exceptions>
+    IOError, OSError or ValueError if the topology is not available.
+
+  <Returns>
+    The topology, see get_cpu_topology.
+  """
+  online = parse_cpu_list(_read_sysfs_value(SYSFS_CPU_DIR + "/online"))
+  if not online:
+    raise ValueError("no online processors in " + SYSFS_CPU_DIR)
+
+  packages = set()
+  cores = set()
+  for cpu in online:
+    topologydir = SYSFS_CPU_DIR + "/cpu" + str(cpu) + "/topology/"
+    package = int(_read_sysfs_value(topologydir + "physical_package_id"))
+    core = int(_read_sysfs_value(topologydir + "core_id"))
+    packages.add(package)
+    # Core ids are only unique within a package.
+    cores.add((package, core))
+
+  return {"sockets": len(packages), "cores": len(cores),
+          "threads": len(online), "online": online, "source": "sysfs"}
+
+
+def get_cpuinfo_topology():
+  """
+  <Purpose>
+    Work out the processor topology from /proc/cpuinfo, in a single pass.
+    Every processor (both physical and virtual) has its own block in the
+    file, which only lists the online processors:
+
     processor  : 0
     vendor_id  : GenuineIntel
     ...
+    physical id  : 0
+    ...
+    cpu cores  : 2
+    ...
 
     processor  : 1
     ...
-    The count of processors is done by counting the number of lines
-    that contain the word processor.
 
-  <Arguments>
-    procfiledata:
-           A list with each line from the /proc/cpuinfo as an element.
-           
+    The number of cores is the number of unique physical ids multiplied by
+    the cores of a physical processor, see the module's notes about cpu
+    measurement. Nonstandard /proc/cpuinfo layouts as found on
+    RaspberryPis (#1308) and OpenWrt routers have neither, in which case
+    a single processor with a single core is assumed.
+    HELPER FUNCTION FOR get_cpu_topology()
+
   <Exceptions>
-    Exception raised if no lines in /proc/cpuinfo contain the
-    string processor.
-    
+    Exception raised if /proc/cpuinfo cannot be opened, no processors are
+    listed in it or a value is invalid.
+
   <Returns>
-    The total number of virtual and physical processors.
-  """
-  count = 0
-  # Read each line of the file and look for lines containing "processor"
-  for line in procfiledata:
-    if (line.find("processor") != -1):
-      count += 1
-  if(count > 0):
-    return count
-  else:
+    The topology, see get_cpu_topology.
+  """
+  online = []
+  physicalids = set()
+  cpucores = None
+
+  try:
+    openfile = open(CPUINFO_PATH, 'r')
+  except IOError:
+    raise Exception("unable to read cpu data from " + CPUINFO_PATH)
+
+  try:
+    for line in openfile:
+      # example value for a line from /proc/cpuinfo
+      # 'physical id\t: 3\n'
+      splitline = line.split(":", 1)
+      if len(splitline) != 2:
+        continue
+      name = splitline[0].strip()
+      value = splitline[1].strip()
+
+      if name == "processor":
+        # Some ARM kernels also list the model as 'Processor'.
+        try:
+          online.append(int(value))
+        except ValueError:
+          raise Exception("bad value for processor: " + str(value))
+
+      elif name == "physical id":
+        try:
+          physicalids.add(int(value))
+        except ValueError:
+          raise Exception("bad value for physical id: " + str(value))
+
+      elif name == "cpu cores" and cpucores is None:
+        try:
+          cpucores = int(value)
+        except ValueError:
+          raise Exception("bad value for number of cpu cores: " + str(value))
+  finally:
+    openfile.close()
+
+  if not online:
     raise Exception("processor data not found")
 
+  sockets = len(physicalids) or 1
+  return {"sockets": sockets, "cores": (cpucores or 1) * sockets,
+          "threads": len(online), "online": sorted(online),
+          "source": "cpuinfo"}
+
 
-def count_cores(procfiledata):
+def get_cpu_topology():
   """
   <Purpose>
-    count_cores will return the number of cpu cores that are 
-    recorded by the processor in the /proc/cpuinfo file.
-    HELPER FUNCTION FOR get_cpu()
-    
-  <Arguments>
-    procfiledata:
-           A list with each line from the /proc/cpuinfo as an element.
-           
+    Read the processor topology of this system, from
+    /sys/devices/system/cpu where the kernel provides it and from
+    /proc/cpuinfo otherwise.
+
   <Exceptions>
-    Exception raised if no lines in /proc/cpuinfo contain the
-    string 'cpu cores' or number of cores is invalid.
-    
+    Exception is raised if neither can be read or their contents are
+    insufficient for determining the topology.
+
   <Returns>
-    The total number of cores for a single physical processor, 
-    or 1 if no core data is found.
+    A dictionary with:
+      sockets: the number of physical processors (packages)
+      cores: the total number of physical cores
+      threads: the total number of online processors, physical and virtual
+      online: a sorted list of the numbers of the online processors
+      source: "sysfs" or "cpuinfo", where the topology was read from
   """
-  # Search each line for the desired string
-  for line in procfiledata:
-    if (line.find("cpu cores") != -1):
-      splitline = line.split()
-      # example value for desired line from /proc/cpuinfo
-      # ['cpu', 'cores',':', '2'] 
-      cpucores = splitline[-1]      
+  try:
+    return get_sysfs_topology()
+  except (IOError, OSError, ValueError):
+    return get_cpuinfo_topology()
+
+
+def get_numa_nodes():
+  """
+  <Purpose>
+    Measure the processors and memory of every NUMA node, from the cpulist
+    and meminfo of each node in /sys/devices/system/node. Processors are
+    counted like get_cpu_topology() counts them: only the online ones,
+    and cores are told apart by their package and core ids. Like get_cpu(),
+    only the processors in the cpuset of this process's cgroup are
+    counted (see get_cgroup_cpuset), the others cannot be used.
+
+  <Exceptions>
+    Exception is raised if a node's cpulist or meminfo cannot be read or
+    is invalid.
+
+  <Returns>
+    A list with a dictionary for every node, in the order of the node
+    numbers:
+      node: the node number
+      cpus: a sorted list of the numbers of its online processors in the
+        cpuset
+      cores: the number of physical cores among them
+      memory: the size of its RAM in bytes (converted from kB like
+        get_host_memory(), counting 1000 bytes to the kB)
+    The list is empty if the kernel does not describe any NUMA nodes.
+  """
+  try:
+    nodenames = os.listdir(SYSFS_NODE_DIR)
+  except OSError:
+    return []
+
+  nodenumbers = []
+  for nodename in nodenames:
+    if nodename.startswith("node") and nodename[4:].isdigit():
+      nodenumbers.append(int(nodename[4:]))
+  nodenumbers.sort()
+
+  try:
+    online = set(get_cpu_topology()["online"])
+  except Exception:
+    online = None
+
+  cpuset = get_cgroup_cpuset()
+  if cpuset is not None:
+    cpuset = set(cpuset)
+
+  nodes = []
+  for nodenumber in nodenumbers:
+    nodedir = SYSFS_NODE_DIR + "/node" + str(nodenumber) + "/"
+    try:
+      cpus = parse_cpu_list(_read_sysfs_value(nodedir + "cpulist"))
+    except (IOError, ValueError):
+      raise Exception("unable to read the processors of NUMA node " + \
+                      str(nodenumber))
+    if online is not None:
+      cpus = [cpu for cpu in cpus if cpu in online]
+    if cpuset is not None:
+      cpus = [cpu for cpu in cpus if cpu in cpuset]
+
+    cores = set()
+    for cpu in cpus:
+      topologydir = SYSFS_CPU_DIR + "/cpu" + str(cpu) + "/topology/"
       try:
-        return int(cpucores)
-      except ValueError:
-        raise Exception("bad value for number of cpu cores: " + str(cpucores))
+        cores.add((_read_sysfs_value(topologydir + "physical_package_id"),
+                   _read_sysfs_value(topologydir + "core_id")))
+      except IOError:
+        # Without a topology every processor is taken to be a core.
+        cores.add((None, cpu))
+
+    memory = None
+    try:
+      openfile = open(nodedir + "meminfo", 'r')
+    except IOError:
+      raise Exception("unable to read the memory of NUMA node " + \
+                      str(nodenumber))
+    for line in openfile:
+      splitline = line.split()
+      #example value for desired splitline
+      #['Node', '0', 'MemTotal:', '5996280', 'kB']
+      if len(splitline) >= 4 and splitline[2] == "MemTotal:":
+        try:
+          memory = long(splitline[3]) * 1000
+        except ValueError:
+          openfile.close()
+          raise Exception("bad value for memory of NUMA node " + \
+                          str(nodenumber) + ": " + str(splitline[3]))
+        break
+    openfile.close()
+    if memory is None:
+      raise Exception("memory data not found for NUMA node " + \
+                      str(nodenumber))
+
+    nodes.append({"node": nodenumber, "cpus": cpus, "cores": len(cores),
+                  "memory": memory})
+
+  return nodes
+
+
+def _read_cgroup_mounts():
+  """
+  <Purpose>
+    Find the mounted cgroup hierarchies in /proc/self/mountinfo.
+    HELPER FUNCTION FOR get_cgroup_dirs()
+
+  <Exceptions>
+    IOError if /proc/self/mountinfo cannot be read.
+
+  <Returns>
+    A list of (version, controllers, root, mount point) tuples, where
+    version is 1 or 2 and controllers is a list of the controllers of a
+    version 1 hierarchy.
+  """
+  mounts = []
+  openfile = open(MOUNTINFO_PATH, 'r')
+  try:
+    for line in openfile:
+      # example value for a cgroup line from /proc/self/mountinfo
+      # ['33', '32', '0:29', '/', '/sys/fs/cgroup/cpu,cpuacct', 'rw',
+      #  'shared:9', '-', 'cgroup', 'cgroup', 'rw,cpu,cpuacct']
+      fields = line.split()
+      if "-" not in fields:
+        continue
+      separator = fields.index("-")
+      if len(fields) < separator + 4:
+        continue
+      fstype = fields[separator + 1]
+      if fstype == "cgroup2":
+        mounts.append((2, [], fields[3], fields[4]))
+      elif fstype == "cgroup":
+        mounts.append((1, fields[separator + 3].split(","), fields[3],
+                       fields[4]))
+  finally:
+    openfile.close()
+  return mounts
+
+
+def _read_process_cgroups():
+  """
+  <Purpose>
+    Find the cgroups of this process in /proc/self/cgroup.
+    HELPER FUNCTION FOR get_cgroup_dirs()
+
+  <Exceptions>
+    IOError if /proc/self/cgroup cannot be read.
+
+  <Returns>
+    A dictionary mapping each version 1 controller to the path of the
+    process's cgroup in its hierarchy, and "" to the path in the version 2
+    hierarchy.
+  """
+  cgroups = {}
+  openfile = open(PROC_CGROUP_PATH, 'r')
+  try:
+    for line in openfile:
+      # example values for lines from /proc/self/cgroup
+      # '4:cpu,cpuacct:/docker/3f2a\n' or '0::/user.slice\n'
+      splitline = line.strip().split(":", 2)
+      if len(splitline) != 3:
+        continue
+      if splitline[1] == "":
+        cgroups[""] = splitline[2]
+      for controller in splitline[1].split(","):
+        cgroups[controller] = splitline[2]
+  finally:
+    openfile.close()
+  return cgroups
+
+
+def get_cgroup_dirs(controller):
+  """
+  <Purpose>
+    Find the directories of the cgroup of this process for a controller,
+    in its version 1 hierarchy if it has one and in the version 2 hierarchy
+    otherwise. The limits of every ancestor of a cgroup apply to it too, so
+    they are included.
+
+  <Arguments>
+    controller:
+           The name of the controller, like "cpu" or "memory".
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A list of the directories, from the process's cgroup up to the root of
+    the mounted hierarchy. The list is empty if this process is not in a
+    cgroup for the controller.
+  """
+  try:
+    mounts = _read_cgroup_mounts()
+    cgroups = _read_process_cgroups()
+  except IOError:
+    return []
+
+  found = None
+  for version, controllers, root, mountpoint in mounts:
+    if version == 1 and controller in controllers and controller in cgroups:
+      found = (cgroups[controller], root, mountpoint)
+      break
   else:
-    # No CPU cores data found, use a default of 1.
-    # This is required for nonstandard /proc/cpuinfo layouts as 
-    # found on RaspberryPis (#1308) and OpenWrt routers.
-    return 1
+    for version, controllers, root, mountpoint in mounts:
+      if version == 2 and "" in cgroups:
+        found = (cgroups[""], root, mountpoint)
+        break
+  if found is None:
+    return []
+
+  # Inside a container the hierarchy may be mounted from the container's
+  # cgroup rather than the real root.
+  path, root, mountpoint = found
+  if root != "/" and (path == root or path.startswith(root + "/")):
+    path = path[len(root):]
+
+  dirs = []
+  path = path.strip("/")
+  while path:
+    dirs.append(os.path.join(mountpoint, path))
+    path = os.path.dirname(path)
+  dirs.append(mountpoint)
+  return dirs
+
 
-def count_processor_physical_id(procfiledata):
+def get_cgroup_cpu_limit(topology=None):
   """
   <Purpose>
-    count_processor_physical_id will search each line of a the
-    /proc/cpuinfo file and record each unique physical id and
-    return the total number of unique id's.
-    HELPER FUNCTION FOR get_cpu()
-    
+    Find how many logical processors the cgroups of this process let it
+    use: the CPU quota (cpu.max, or cpu.cfs_quota_us and cpu.cfs_period_us
+    in version 1) divided by its period, and the number of processors in
+    its cpuset, whichever is smaller. Both count logical processors (every
+    hyperthread), not cores, see the module's notes about containers.
+
   <Arguments>
-    procfiledata:
-           A list with each line from the /proc/cpuinfo as an element.
-           
+    topology:
+      The processor topology, as returned by get_cpu_topology(), or None
+      to read it.
+
   <Exceptions>
-    Exception raised if no lines in /proc/cpuinfo contain the
-    contained information on the 'physical id' or the physical
-    id is not an integer.
-    
+    None
+
   <Returns>
-    The total number of unique identifiers, or 1 if none were found.
+    The number of logical processors, a float if the quota is a fraction
+    of them, or None if no limit was found.
   """
-  id_list = []
-  for line in procfiledata:
-    if (line.find("physical id") != -1):
-      splitline = line.split()
-      # example value for desired line from /proc/cpuinfo
-      # ['physical', 'id',':', '3'] 
-      phys_id = splitline[-1]      
+  limit = None
+
+  for cgroupdir in get_cgroup_dirs("cpu"):
+    try:
+      if os.path.exists(os.path.join(cgroupdir, "cpu.max")):
+        # example value for cpu.max: 'max 100000' or '150000 100000'
+        quota, period = _read_sysfs_value(os.path.join(cgroupdir,
+                                                       "cpu.max")).split()
+        if quota == "max":
+          continue
+      else:
+        quota = _read_sysfs_value(os.path.join(cgroupdir,
+                                               "cpu.cfs_quota_us"))
+        period = _read_sysfs_value(os.path.join(cgroupdir,
+                                                "cpu.cfs_period_us"))
+      quota = int(quota)
+      period = int(period)
+    except (IOError, ValueError):
+      continue
+    # A quota of -1 means none in version 1.
+    if quota > 0 and period > 0:
+      cpus = float(quota) / period
+      if limit is None or cpus < limit:
+        limit = cpus
+
+  # A cpuset of every online processor (like that of the root cgroup) is
+  # no limit. Both are numbers of logical processors.
+  try:
+    if topology is None:
+      topology = get_cpu_topology()
+    onlinecpus = len(topology["online"])
+  except Exception:
+    onlinecpus = None
+
+  cpuset = get_cgroup_cpuset()
+  if cpuset is not None:
+    cpus = len(cpuset)
+    if (onlinecpus is None or cpus < onlinecpus) and \
+        (limit is None or cpus < limit):
+      limit = cpus
+
+  return limit
+
+
+def get_cgroup_cpuset():
+  """
+  <Purpose>
+    Find the processors the cpuset of this process's cgroup lets it run
+    on.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A sorted list of the processor numbers, or None if there is no cpuset
+    (or it cannot be read, or is empty).
+  """
+  # The effective cpuset already takes the ancestors into account.
+  for cgroupdir in get_cgroup_dirs("cpuset")[:1]:
+    for filename in ["cpuset.cpus.effective", "cpuset.effective_cpus",
+                     "cpuset.cpus"]:
+      try:
+        cpus = parse_cpu_list(_read_sysfs_value(
+            os.path.join(cgroupdir, filename)))
+      except (IOError, ValueError):
+        continue
+      if cpus:
+        return cpus
+      break
+
+  return None
+
+
+def get_cgroup_memory_limit():
+  """
+  <Purpose>
+    Find how much memory the cgroups of this process let it use (memory.max,
+    or memory.limit_in_bytes in version 1).
+
+  <Exceptions>
+    None
+
+  <Returns>
+    The limit in bytes, or None if no limit was found.
+  """
+  limit = None
+
+  for cgroupdir in get_cgroup_dirs("memory"):
+    for filename in ["memory.max", "memory.limit_in_bytes"]:
+      try:
+        value = _read_sysfs_value(os.path.join(cgroupdir, filename))
+      except IOError:
+        continue
+      # Version 1 shows no limit as a huge number instead of "max".
       try:
-        phys_id = int(phys_id)
+        value = long(value)
       except ValueError:
-        raise Exception("bad value for physical id: " + str(phys_id))
-      if(phys_id not in id_list):
-        id_list.append(phys_id)
+        break
+      if value < CGROUP_UNLIMITED_MEMORY and (limit is None or value < limit):
+        limit = value
+      break
+
+  return limit
+
 
-  # Return the number of physical IDs found, or 1 if none were found. 
-  # The latter is required for nonstandard /proc/cpuinfo layouts as 
-  # found on RaspberryPis (#1308) and OpenWrt routers.
-  return len(id_list) or 1
+def _limit_by_cgroup(hostvalue, cgroupvalue):
+  """
+  <Purpose>
+    Take the smaller of a resource's value on the host and its cgroup
+    limit, keeping both in the Measurement so they are logged.
+
+  <Returns>
+    A benchmark_measurement.Measurement.
+  """
+  value = hostvalue
+  if cgroupvalue is not None and cgroupvalue < hostvalue:
+    value = cgroupvalue
+  return benchmark_measurement.Measurement(value,
+      sources={"host": hostvalue, "cgroup": cgroupvalue})
 
  
 def get_cpu():
   """
   <Purpose>
-    Measure the number of PHYSICAL cores and processors.
+    Measure the number of PHYSICAL cores and processors, or the number of
+    cores the cgroups of this process let it use if that is smaller (see
+    get_cgroup_cpu_limit and the module's notes about containers).
 
   <Exceptions>
-    Exception is raised if /proc/cpuinfo cannot be opened or it's
-    contents are are insufficient for determining the the number
-    of physical processors/cores.
+    Exception is raised if the processor topology cannot be read, see
+    get_cpu_topology.
   
   <Returns>
-    The number of physical processors/cores.
+    A benchmark_measurement.Measurement of the number of physical
+    processors/cores, with both the host's and the cgroup's numbers of
+    cores as its sources, and the cgroup's number of logical processors
+    as its "cgroup_processors".
   """
-  cpu_cores = 0 # Stores integer value for number of cores
-  cpu_physicalid = 0 # Stores the unique id's for the processors
-  
-  cpuinfo_copy = []
- 
-  try:
-    openfile = open("/proc/cpuinfo", 'r') 
-  except IOError:     
-    raise Exception("unable to read cpu data from /proc/cpuinfo")
+  topology = get_cpu_topology()
+  cgroupprocessors = get_cgroup_cpu_limit(topology)
 
-  # Read each line of the file and store it in a list, this is done 
-  # because the contents of /proc/cpuinfo will be traversed up to 
-  # two seperate times.
-  for line in openfile:
-    cpuinfo_copy.append(line)
-  openfile.close()
-      
-  # get the number of cpu cores
-  cpu_cores = count_cores(cpuinfo_copy)
-  
-  # get the number of physical id's 
-  cpu_physicalid = count_processor_physical_id(cpuinfo_copy)
-  
-  # Refer to detailed explanation from program's opening comment.  
-  return cpu_cores * cpu_physicalid
+  cgroupcores = None
+  if cgroupprocessors is not None:
+    cgroupcores = cgroupprocessors * topology["cores"] / \
+        float(topology["threads"])
+
+  measurement = _limit_by_cgroup(topology["cores"], cgroupcores)
+  measurement.sources["cgroup_processors"] = cgroupprocessors
+  return measurement
   
   
 def get_cpu_virtual():
@@ -266,31 +732,19 @@ def get_cpu_virtual():
     physical and virtual processors.
 
   <Exceptions>
-    Exception is raised if /proc/cpuinfo cannot be opened or it's
-    contents are are insufficient for determining the the number
-    of processors.
+    Exception is raised if the processor topology cannot be read, see
+    get_cpu_topology.
   
   <Returns>
     The number of processors.
   """
-  cpu_processors = None # Stores the number of processors
- 
-  try:
-    openfile = open("/proc/cpuinfo", 'r') 
-  except IOError:
-    raise Exception("unable to read cpu data from /proc/cpuinfo")
+  return get_cpu_topology()["threads"]
 
-  # get the number of processors
-  cpu_processors = count_processor(openfile)
-  
-  openfile.close()
-  return cpu_processors
 
-
-def get_memory():
+def get_host_memory():
   """
   <Purpose>
-    get_memory will search the /proc/meminfo file on a linux
+    get_host_memory will search the /proc/meminfo file on a linux
     system to find the size of RAM. Does not measure swap size
     because that has a seperate field in meminfo. 
 
@@ -333,12 +787,33 @@ def get_memory():
   raise Exception("memory data not found")
 
 
+def get_memory():
+  """
+  <Purpose>
+    Measure the size of RAM, or the memory limit of the cgroups of this
+    process if that is smaller (see get_cgroup_memory_limit).
+
+  <Exceptions>
+    Exception is raised if the size of RAM cannot be read, see
+    get_host_memory.
+
+  <Returns>
+    A benchmark_measurement.Measurement of the memory in bytes, with both
+    the host's and the cgroup's as its sources.
+  """
+  return _limit_by_cgroup(get_host_memory(), get_cgroup_memory_limit())
+
+
 def get_diskused():
   """
   <Purpose>
     Returns the total size in Bytes that are available on the 
     partition that the working directory is on.
 
+    This is what "df -P ." reports as Available, the blocks that are
+    available to an unprivileged user, but read with os.statvfs() instead
+    of running df.
+
   <Exceptions>
     Exception is raised if unable to retrieve partition data.
 
@@ -346,46 +821,56 @@ def get_diskused():
     The total number of Bytes available to the user on the current
     partition.
   """
- 
-  #blocks are typically 1024bytes
-  blocksize = 1024
-  freeblocks = 0
-
-  #Unix command df
-  #-P, --portability     use the POSIX output format
-  #Possible result from "df -P ."
-  # Filesystem  1024-blocks  Used  Available Capacity Mounted on
-  # /dev/sda1   15007228   5645076  8757148      40%    /
-  statresult = commands.getstatusoutput('df -P .')
-   
-  # Test because if first element of tuple is other than 0
-  # then the exit status of the linux command is an error.
-  if (statresult[0] != 0):
-    raise Exception("unable to read disk partition size")
-  
-  # Second element of tuple returned by commands.getstatusoutput
-  # is the stdout from the command.  
-  statresult = (statresult[1]).split()
+  try:
+    statresult = os.statvfs(".")
+  except OSError, e:
+    raise Exception("unable to read disk partition size: " + str(e))
+
+  # f_bavail is counted in fragments of f_frsize bytes, which some old
+  # file systems leave at 0.
+  blocksize = statresult.f_frsize or statresult.f_bsize
+  return long(statresult.f_bavail) * blocksize
 
+
+def _get_soft_limit(limit, description):
+  """
+  <Purpose>
+    Get the soft limit of a resource of this process, what the ulimit
+    command shows for it.
+    HELPER FUNCTION FOR get_events() AND get_filesopened()
+
+  <Arguments>
+    limit:
+           The resource module's constant for the limit, like
+           resource.RLIMIT_NOFILE.
+
+    description:
+           What the limit is, for the exceptions.
+
+  <Exceptions>
+    Exception is raised if the limit cannot be read or there is none.
+
+  <Returns>
+    The soft limit.
+  """
   try:
-    freeblocks = long(statresult[10])
-  except ValueError:
-    raise Exception("bad value for disk partition size: " + str(statresult[10]))
+    softlimit = resource.getrlimit(limit)[0]
+  except (ValueError, resource.error), e:
+    raise Exception("unable to read " + description + ": " + str(e))
 
-  disksize = blocksize * freeblocks 
-  return disksize 
+  if softlimit == resource.RLIM_INFINITY:
+    raise Exception("bad value for " + description + ": unlimited")
+  return int(softlimit)
 
 
 def get_events():
   """
   <Purpose>
     Measure the maximum number threads the operating system will allow.
-    This uses the ulimit command with option -a. While it would be ideal
-    to use the -u option, on ubuntu the -u option raised the
-    error 'ulimit: 1: Illegal option -u' when it was executed by
-    commands.getstatusoutput (it did not have this error when 
-    run normally from the shell). I was unable to discover
-    why this error occurred or why it was specific to only option -u.
+    This is the soft RLIMIT_NPROC limit of the user, what ulimit -u shows.
+    It is read directly rather than by running ulimit in a shell, which
+    on ubuntu raised the error 'ulimit: 1: Illegal option -u' when it was
+    executed by commands.getstatusoutput.
 
     The original method that found the maximum allowed by the kernel
     has been left it the comment, but not provided as a fallback because
@@ -416,36 +901,16 @@ def get_events():
       openfile.close()
       return maxevents
   """
-  max_processes = 0
-
-  # Sample result of successful getstatusoutput is 
-  # (0, '16310')
-  status_result = commands.getstatusoutput('ulimit -u')
-   
-  # Test because if first element of tuple is other than 0
-  # then the exit status of the linux command is an error.
-  if (status_result[0] != 0):
-    raise Exception("unable to read maximum number of threads")
-  
-  # Second element of tuple returned by commands.getstatusoutput
-  # is the stdout from the command, should be just a single integer.  
-  status_result = status_result[1]
-
-  try:
-    max_processes = int(status_result)
-  except ValueError:
-    raise Exception("bad value for maximum number of threads: " + \
-                        str(status_result))
-
-  return max_processes
+  return _get_soft_limit(resource.RLIMIT_NPROC,
+                         "maximum number of threads")
 
 
   
 def get_filesopened():
   """
   <Purpose>
-    Reads the result of ulimit -n to get the number
-    of files that a individual user has access to.
+    Reads the soft RLIMIT_NOFILE limit (what ulimit -n shows) to get the
+    number of files that a individual user has access to.
 
   <Original Method>
     Reads the value stored in /proc/sys/fs/file-max
@@ -468,91 +933,71 @@ def get_filesopened():
       openfile.close()
       return maxfile
   """
-  maxfile = 0
+  return _get_soft_limit(resource.RLIMIT_NOFILE,
+                         "maximum number of open files")
 
-  # Sample result of successful getstatusoutput is (0, '1024')
-  status_result = commands.getstatusoutput('ulimit -n')
-   
-  # Test because if first element of tuple is other than 0
-  # then the exit status of the linux command is an error.
-  if (status_result[0] != 0):
-    raise Exception("unable to read maximum number of open files")
-  
-  # Second element of tuple returned by commands.getstatusoutput
-  # is the stdout from the command.  
-  status_result = status_result[1]
 
-  try:
-    maxfile = int(status_result)
-  except ValueError:
-    raise Exception("bad value for maximum number of open files: " + \
-                        str(status_result))
 
-  return maxfile
+def get_filesopened_share():
+  """
+  <Purpose>
+    filesopened, insockets, and outsockets are restricted by linux and all
+    come from the same total, so each of them is given a third of the
+    number of files a user may have open.
+
+  <Exceptions>
+    Exception is raised if get_filesopened fails.
+
+  <Returns>
+    A third of the value returned by get_filesopened().
+  """
+  return get_filesopened() / 3
+
+
 
+def measure_resources(cached_resource_dict=None, cost_dict=None):
+  """
+  <Purpose>
+    Measure every resource on this Linux system. Individual resources can
+    be measured with probe_registry.measure().
 
+  <Arguments>
+    cached_resource_dict:
+      Optional dictionary of previously measured values (see
+      benchmark_cache). A probe whose resources are all present in it is
+      not run, and the cached values are returned instead.
 
-def measure_resources():
+    cost_dict:
+      Optional dictionary that is filled in with what the probe of every
+      resource that was measured cost (see probe_accounting).
 
-  resource_dict = {}
+  <Exceptions>
+    None, see the module's return value notes.
 
+  <Returns>
+    A dictionary with a value for every resource, see the module's return
+    value notes.
+  """
   # SP: If any test fails then a string describing the failure should be
   # returned, so catch the exception and return it as a string.
   # None is reserved for tests that aren't implemented so that failed tests and
   # unimplemented tests can be differentiated.
+  # The probes for this module are declared in probe_registry, which runs
+  # them concurrently and follows the same convention.
+  measurement_dict = probe_registry.measure("Linux",
+      cached_resource_dict=cached_resource_dict)
+  resource_dict = benchmark_measurement.get_values(measurement_dict)
 
-  try:
-    resource_dict["cpu"] = get_cpu()
-  except Exception, e:
-    resource_dict["cpu"] = str(e)
-  
-  try:
-    resource_dict["memory"] = get_memory()
-  except Exception, e:
-    resource_dict["memory"] = str(e)
+  if cost_dict is not None:
+    for resource in measurement_dict:
+      if measurement_dict[resource].cost is not None:
+        cost_dict[resource] = measurement_dict[resource].cost
 
-  try:
-    resource_dict["diskused"] = get_diskused()
-  except Exception, e:
-    resource_dict["diskused"] = str(e)
-  
   # For the time being we will be using the default number
   # of events.
   #resource_dict["events"] = get_events()
   resource_dict["events"] = None
   
-  # filesopened, insockets, and outsockets are restricted by linux and all 
-  # come from the same total, I do a quick check to avoid an exception being 
-  # raised, it unlikely that the test would fail, but after seeing the 
-  # strange behavior of ulimit for events it seems best error on the side 
-  # of safety.
-  try:
-    maxfiles = get_filesopened() / 3
-  except Exception, e:
-    maxfiles = str(e)
-
-  resource_dict["filesopened"] = maxfiles
-  resource_dict["insockets"] = maxfiles
-  resource_dict["outsockets"] = maxfiles
-
-  # SP: this test should work on all systems now, but catch the exception just
-  # in case.
-  try:
-    random_max = measure_random.measure_random()
-  except measure_random.InvalidTimeMeasurementError, e:
-    random_max = str(e)
-      
-  resource_dict["random"] = random_max
-
-  # Measure the disk read write rate
-  try:
-    filewrite, fileread = measuredisk.main()
-  except Exception, e:
-    filewrite, fileread = str(e), str(e)
-
-  resource_dict["filewrite"] = filewrite
-  resource_dict["fileread"] = fileread
-  
   # These resources are not measure in this script so a None
   # value is used to indicate it was not measured. 
   resource_dict["netrecv"] = None
@@ -565,7 +1010,8 @@ def measure_resources():
 
 if __name__ == "__main__":
 
-  dict = measure_resources()
+  costs = {}
+  dict = measure_resources(cost_dict=costs)
 
   print "resource cpu ", dict['cpu']
   print "resource memory ", dict['memory'], '\t', dict['memory'] / 1073741824.0, "GB"
@@ -582,3 +1028,6 @@ if __name__ == "__main__":
   print "resource lograte ", dict["lograte"]
   print "resource loopsend ", dict["loopsend"]
   print "resource looprevc ", dict["looprecv"]
+
+  for resource in sorted(costs):
+    print "cost", resource, costs[resource]
@@ -47,7 +47,17 @@ def getShellPipe(cmd):
 
 
 
-def measure_resources():
+def measure_system_resources():
+  """
+  <Purpose>
+    Measure every resource that is read from the system (as opposed to
+    timed), that is everything except random, filewrite and fileread.
+    This is registered as a single probe in probe_registry.
+
+  <Returns>
+    A dictionary with the cpu, memory, diskused, events, filesopened,
+    insockets and outsockets resources, see the module's return value notes.
+  """
   # First, get number of CPUs
   # SP: None is now reserved for unimplemented tests, and to differentiate
   # failed tests we return a string describing the error. At least in theory
@@ -133,6 +143,25 @@ def measure_resources():
     outsocket = maxsockets
 
 
+  resource_dict = {}
+
+  resource_dict["cpu"] = num_cpu
+  resource_dict["memory"] = phys_mem
+  resource_dict["diskused"] = disk_space
+  # benchmark_resources set a hard value of 500 for ever OS
+  resource_dict["events"] = None # events
+  resource_dict["filesopened"] = files_open
+  resource_dict["insockets"] = insocket
+  resource_dict["outsockets"] = outsocket
+
+  return resource_dict
+
+
+
+def measure_resources():
+
+  resource_dict = measure_system_resources()
+
   # SP: Measure random number generation rate, should work on all systems now
   try:
     random_max = measure_random.measure_random()
@@ -147,16 +176,6 @@ def measure_resources():
   except Exception, e:
     filewrite, fileread = str(e), str(e)
 
-  resource_dict = {}
-
-  resource_dict["cpu"] = num_cpu
-  resource_dict["memory"] = phys_mem
-  resource_dict["diskused"] = disk_space
-  # benchmark_resources set a hard value of 500 for ever OS
-  resource_dict["events"] = None # events
-  resource_dict["filesopened"] = files_open
-  resource_dict["insockets"] = insocket
-  resource_dict["outsockets"] = outsocket
   resource_dict["random"] = random_max
   resource_dict["filewrite"] = filewrite
   resource_dict["fileread"] = fileread
@@ -75,7 +75,17 @@ import ctypes # Used to query for max file handles
 import measure_random
 import measuredisk
 
-def measure_resources():
+def measure_system_resources():
+  """
+  <Purpose>
+    Measure every resource that is read from the system (as opposed to
+    timed), that is everything except random, filewrite and fileread.
+    This is registered as a single probe in probe_registry.
+
+  <Returns>
+    A dictionary with the cpu, memory, diskused, events, filesopened,
+    insockets and outsockets resources, see the module's return value notes.
+  """
 
   # Get disk info, using current directory
   diskInfo = windows_api.disk_util(None)
@@ -129,6 +139,27 @@ def measure_resources():
   # benchmark_resources.py .
   socketMax = None
 
+  resource_dict = {}
+
+  resource_dict["cpu"] = numCPU
+  resource_dict["memory"] = totalMem
+  resource_dict["diskused"] = freeDisk
+
+# The following are more per-process things
+  resource_dict["events"] = threadMax
+  resource_dict["filesopened"] = handleMax
+  # The socketMax is split between in and out already.
+  resource_dict["insockets"] = socketMax
+  resource_dict["outsockets"] = socketMax
+
+  return resource_dict
+
+
+
+def measure_resources():
+
+  resource_dict = measure_system_resources()
+
   # Measure random
   # SP: This test should now work on all systems. For failed tests, a string
   # describing the failure will be returned.
@@ -144,20 +175,6 @@ def measure_resources():
   except Exception, e:
     filewrite, fileread = str(e), str(e)
 
-
-
-  resource_dict = {}
-
-  resource_dict["cpu"] = numCPU
-  resource_dict["memory"] = totalMem
-  resource_dict["diskused"] = freeDisk
-
-# The following are more per-process things
-  resource_dict["events"] = threadMax
-  resource_dict["filesopened"] = handleMax
-  # The socketMax is split between in and out already.
-  resource_dict["insockets"] = socketMax
-  resource_dict["outsockets"] = socketMax
   resource_dict["random"] = randomMax
   resource_dict["filewrite"] = filewrite
   resource_dict["fileread"] = fileread
@@ -0,0 +1,448 @@
+"""
+<Program Name>
+  benchmark_cache.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Persistent cache of benchmark results, keyed by a fingerprint of the
+  host's hardware, so that reinstalling on a machine (or on a fleet of
+  identical machines) does not have to repeat the expensive measuredisk and
+  measure_random runs.
+
+  The fingerprint is built from the contents of /proc/cpuinfo (ignoring the
+  fields that change from second to second, like the current clock speed),
+  MemTotal, the block device that holds the install directory, the
+  kernel version and the CPU and memory limits of the installer's cgroups,
+  if any. Parts that cannot be read on a given OS are skipped.
+
+  Every cached value carries the time it was measured. Values older than
+  the cache's time to live are ignored, individual resources can be
+  invalidated, and run_benchmark can be asked to ignore the cache entirely.
+
+  Only values that were actually measured are cached, failures and
+  defaults never are, so a failed probe is always retried next time. The
+  free disk space changes as the machine is used rather than with the
+  hardware, and the files, sockets and events follow the resource limits
+  of the installer's process, so they are never cached either.
+
+  The cache file is stored in the install directory unless the environment
+  variable named by CACHE_PATH_ENV_VAR says otherwise, which allows a single
+  cache to be shared by a fleet of machines.
+"""
+
+import os
+import platform
+import time
+
+try:
+  import hashlib
+  _sha1 = hashlib.sha1
+except ImportError:
+  # Python 2.4 on some older embedded devices.
+  import sha
+  _sha1 = sha.new
+
+import persist
+
+
+# The name of the cache file in the install directory.
+CACHE_FILENAME = "benchmark_cache"
+
+# If set, the path of the cache file to use instead of the default.
+CACHE_PATH_ENV_VAR = "SEATTLE_BENCHMARK_CACHE"
+
+# How long (in seconds) a cached measurement is trusted, 30 days.
+DEFAULT_TTL = 30 * 24 * 60 * 60
+
+# Resources that describe the state of the machine rather than its hardware
+# and must always be measured. The files, sockets and events are worked out
+# from the resource limits of the installer's process (see
+# Linux_resources), which another install may not share.
+UNCACHED_RESOURCES = ["diskused", "events", "filesopened", "insockets",
+                      "outsockets"]
+
+# Lines of /proc/cpuinfo that change while the machine is running and must
+# not be part of the fingerprint.
+VOLATILE_CPUINFO_KEYS = ["cpu MHz", "bogomips", "BogoMIPS"]
+
+# Where the identity of the machine is found, see get_host_identity.
+MACHINE_ID_PATHS = ["/etc/machine-id", "/var/lib/dbus/machine-id"]
+
+
+
+def _get_cpuinfo_identity():
+  """
+  <Purpose>
+    Get the stable part of /proc/cpuinfo, or the processor name reported by
+    the platform module if /proc/cpuinfo does not exist.
+
+  <Returns>
+    A string describing the processors.
+  """
+  try:
+    openfile = open("/proc/cpuinfo", 'r')
+  except IOError:
+    return platform.processor()
+
+  stablelines = []
+  for line in openfile:
+    key = line.split(":")[0].strip()
+    if key not in VOLATILE_CPUINFO_KEYS:
+      stablelines.append(line.strip())
+  openfile.close()
+
+  return "\n".join(stablelines)
+
+
+
+def _get_memtotal():
+  """
+  <Purpose>
+    Get the MemTotal line of /proc/meminfo.
+
+  <Returns>
+    The MemTotal line, or an empty string if it could not be read.
+  """
+  try:
+    openfile = open("/proc/meminfo", 'r')
+  except IOError:
+    return ""
+
+  for line in openfile:
+    if line.startswith("MemTotal:"):
+      openfile.close()
+      return line.strip()
+
+  openfile.close()
+  return ""
+
+
+
+def _get_cgroup_limits():
+  """
+  <Purpose>
+    Describe the CPU and memory limits of the cgroups of this process (see
+    Linux_resources), which change the measured cpu and memory without a
+    change of hardware.
+
+  <Returns>
+    A string describing the limits, or None if there are none.
+  """
+  if platform.system() != "Linux":
+    return None
+
+  # Only needed on Linux, where it can be imported.
+  import Linux_resources
+  cpulimit = Linux_resources.get_cgroup_cpu_limit()
+  memorylimit = Linux_resources.get_cgroup_memory_limit()
+  if cpulimit is None and memorylimit is None:
+    return None
+  return "cgroup cpu " + str(cpulimit) + " memory " + str(memorylimit)
+
+
+
+def _get_block_device(installdir):
+  """
+  <Purpose>
+    Describe the block device that holds installdir. The name (sda1,
+    mmcblk0p2, ...) and model are read from /sys where possible, otherwise
+    the device's major and minor numbers are used.
+
+  <Arguments>
+    installdir:
+      The directory seattle is being installed in.
+
+  <Returns>
+    A string describing the block device.
+  """
+  try:
+    devicenumber = os.stat(installdir).st_dev
+  except OSError:
+    return ""
+
+  devicestring = str(os.major(devicenumber)) + ":" + \
+      str(os.minor(devicenumber))
+
+  sysdevicepath = "/sys/dev/block/" + devicestring
+  if not os.path.exists(sysdevicepath):
+    return devicestring
+
+  devicestring = os.path.basename(os.path.realpath(sysdevicepath))
+
+  # The model is on the whole disk, which is the parent of a partition.
+  for modelpath in [sysdevicepath + "/device/model",
+                    sysdevicepath + "/../device/model"]:
+    try:
+      modelfile = open(modelpath, 'r')
+    except IOError:
+      continue
+    devicestring += " " + modelfile.read().strip()
+    modelfile.close()
+    break
+
+  return devicestring
+
+
+
+def _get_machine_id():
+  """
+  <Purpose>
+    Get the machine id of this host, or its host name if it has none.
+
+  <Returns>
+    A string identifying the host.
+  """
+  for machineidpath in MACHINE_ID_PATHS:
+    try:
+      machineidfile = open(machineidpath, 'r')
+    except IOError:
+      continue
+    machineid = machineidfile.read().strip()
+    machineidfile.close()
+    if machineid:
+      return machineid
+
+  return platform.node()
+
+
+
+def get_host_identity():
+  """
+  <Purpose>
+    Compute an identity of this host that, unlike the hardware fingerprint,
+    leaves out the quantities the benchmark measures (the memory and the
+    cgroup limits), so that it stays the same when they change. It is the
+    key of the benchmark history (see benchmark_history), which is what
+    lets a host whose memory shrank be compared with its past.
+
+  <Arguments>
+    None
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    None
+
+  <Returns>
+    A hex string made from the machine id (or host name) and the stable
+    part of /proc/cpuinfo.
+  """
+  return _sha1(_get_machine_id() + "\n" + \
+               _get_cpuinfo_identity()).hexdigest()
+
+
+
+def get_hardware_fingerprint(installdir):
+  """
+  <Purpose>
+    Compute the hardware fingerprint of this host, used as the key of the
+    benchmark cache.
+
+  <Arguments>
+    installdir:
+      The directory seattle is being installed in.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    None
+
+  <Returns>
+    A hex string that is the same for hosts with the same processors,
+    memory, install device, kernel and cgroup limits.
+  """
+  fingerprintparts = [_get_cpuinfo_identity(),
+                      _get_memtotal(),
+                      _get_block_device(installdir),
+                      platform.system(),
+                      platform.release(),
+                      platform.machine()]
+
+  # Hosts outside of a limited cgroup keep the fingerprint they had before
+  # the limits were taken into account.
+  cgrouplimits = _get_cgroup_limits()
+  if cgrouplimits is not None:
+    fingerprintparts.append(cgrouplimits)
+
+  return _sha1("\n".join(fingerprintparts)).hexdigest()
+
+
+
+def get_cache_path(installdir):
+  """
+  <Purpose>
+    Get the path of the cache file to use.
+
+  <Arguments>
+    installdir:
+      The directory seattle is being installed in.
+
+  <Returns>
+    The value of the CACHE_PATH_ENV_VAR environment variable if it is set,
+    otherwise CACHE_FILENAME in installdir.
+  """
+  return os.environ.get(CACHE_PATH_ENV_VAR,
+                        os.path.join(installdir, CACHE_FILENAME))
+
+
+
+class BenchmarkCache(object):
+  """
+  <Purpose>
+    Gives access to the cached measurements stored in a cache file.
+
+    The cache file contains a dictionary mapping each fingerprint to a
+    dictionary of {resource: [value, time measured]}.
+
+  <Arguments>
+    cachepath:
+      The path of the cache file. It does not need to exist yet.
+
+    ttl:
+      The number of seconds a measurement stays valid.
+  """
+
+  def __init__(self, cachepath, ttl=DEFAULT_TTL):
+    self.cachepath = cachepath
+    self.ttl = ttl
+    self.entries = {}
+
+    if os.path.exists(cachepath):
+      try:
+        self.entries = persist.restore_object(cachepath)
+      except Exception:
+        # A corrupted cache is no worse than an empty one.
+        self.entries = {}
+
+
+  def lookup(self, fingerprint, now=None):
+    """
+    <Purpose>
+      Get the cached measurements for fingerprint that have not expired.
+
+    <Arguments>
+      fingerprint:
+        The hardware fingerprint of the host.
+
+      now:
+        The current time, defaults to time.time().
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A dictionary mapping each resource with a fresh cached measurement to
+      its value. It may be empty, or cover only some of the resources.
+      Anything in UNCACHED_RESOURCES that an older cache file holds is left
+      out.
+    """
+    if now is None:
+      now = time.time()
+
+    freshresources = {}
+    for resource, (value, measuredtime) in \
+        self.entries.get(fingerprint, {}).items():
+      if resource in UNCACHED_RESOURCES:
+        continue
+      if now - measuredtime <= self.ttl:
+        freshresources[resource] = value
+
+    return freshresources
+
+
+  def store(self, fingerprint, resource_dict, now=None):
+    """
+    <Purpose>
+      Add measurements to the cache and write the cache file. Anything that
+      is not a positive number (failures and unmeasured resources) is not
+      stored, and neither is anything in UNCACHED_RESOURCES.
+
+    <Arguments>
+      fingerprint:
+        The hardware fingerprint of the host.
+
+      resource_dict:
+        A dictionary of measured resources, in the format returned by the
+        OS specific measure_resources() functions.
+
+      now:
+        The time of the measurement, defaults to time.time().
+
+    <Exceptions>
+      Exceptions raised by persist.commit_object if the cache file cannot
+      be written.
+
+    <Side Effects>
+      Writes the cache file.
+
+    <Returns>
+      None
+    """
+    if now is None:
+      now = time.time()
+
+    fingerprintentries = self.entries.setdefault(fingerprint, {})
+    for resource, value in resource_dict.items():
+      if resource in UNCACHED_RESOURCES:
+        continue
+      if isinstance(value, (int, long, float)) and value > 0:
+        fingerprintentries[resource] = [value, now]
+
+    persist.commit_object(self.entries, self.cachepath)
+
+
+  def invalidate(self, fingerprint, resources=None):
+    """
+    <Purpose>
+      Remove cached measurements so they are measured again next time.
+
+    <Arguments>
+      fingerprint:
+        The hardware fingerprint of the host.
+
+      resources:
+        A list of the resources to invalidate, or None to invalidate
+        everything cached for fingerprint.
+
+    <Exceptions>
+      Exceptions raised by persist.commit_object if the cache file cannot
+      be written.
+
+    <Side Effects>
+      Writes the cache file.
+
+    <Returns>
+      None
+    """
+    if fingerprint not in self.entries:
+      return
+
+    if resources is None:
+      del self.entries[fingerprint]
+    else:
+      for resource in resources:
+        self.entries[fingerprint].pop(resource, None)
+
+    persist.commit_object(self.entries, self.cachepath)
+
+
+
+if __name__ == "__main__":
+  # Usage: benchmark_cache.py [invalidate [resource ...]]
+  # Prints the fingerprint of this host and the cached values, or
+  # invalidates the given resources (all of them if none are given).
+  import sys
+
+  installdir = os.getcwd()
+  fingerprint = get_hardware_fingerprint(installdir)
+  cache = BenchmarkCache(get_cache_path(installdir))
+
+  if len(sys.argv) > 1 and sys.argv[1] == "invalidate":
+    cache.invalidate(fingerprint, sys.argv[2:] or None)
+
+  print "fingerprint", fingerprint
+  print "cached", cache.lookup(fingerprint)
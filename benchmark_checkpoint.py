@@ -0,0 +1,164 @@
+"""
+<Program Name>
+  benchmark_checkpoint.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Checkpoints the results of the benchmark probes as they finish, so that
+  an installation that is interrupted in the middle of run_benchmark (a
+  flaky device that reboots, a battery that runs out) does not have to run
+  every probe again when it is restarted.
+
+  The benchmark cache (see benchmark_cache) is only written once all the
+  probes have finished, and it deliberately leaves out some results (the
+  free disk space). The checkpoint file instead records every probe result
+  that can be used as soon as the probe finishes. When run_benchmark starts,
+  the results in the checkpoint are used and only the probes that are
+  missing (or whose results are older than CHECKPOINT_TTL) are run. Once
+  the benchmark has finished, its results are in the cache and the
+  checkpoint is removed.
+
+  The checkpoint is tied to the hardware fingerprint of the host, a
+  checkpoint written on other hardware (an install directory copied from
+  another machine) is ignored.
+"""
+
+import os
+import time
+
+import persist
+
+
+# The name of the checkpoint file in the install directory.
+CHECKPOINT_FILENAME = "benchmark_checkpoint"
+
+# How long (in seconds) a checkpointed result is used, one day. An
+# interrupted install is normally restarted long before then, and the free
+# disk space may have changed by then.
+CHECKPOINT_TTL = 24 * 60 * 60
+
+
+
+class BenchmarkCheckpoint(object):
+  """
+  <Purpose>
+    Gives access to the checkpoint file of an install.
+
+    The checkpoint file contains a dictionary with the fingerprint of the
+    host it was written on and a dictionary of
+    {resource: [value, time measured]}.
+
+  <Arguments>
+    checkpointpath:
+      The path of the checkpoint file. It does not need to exist yet.
+
+    fingerprint:
+      The hardware fingerprint of the host (see benchmark_cache).
+  """
+
+  def __init__(self, checkpointpath, fingerprint):
+    self.checkpointpath = checkpointpath
+    self.fingerprint = fingerprint
+    self.results = {}
+
+    if os.path.exists(checkpointpath):
+      try:
+        checkpoint = persist.restore_object(checkpointpath)
+      except Exception:
+        # A checkpoint torn by the interruption is no worse than none.
+        checkpoint = {}
+      if checkpoint.get("fingerprint") == fingerprint:
+        self.results = checkpoint.get("results", {})
+
+
+  def lookup(self, now=None):
+    """
+    <Purpose>
+      Get the checkpointed results that have not expired.
+
+    <Arguments>
+      now:
+        The current time, defaults to time.time().
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A dictionary mapping each resource with a fresh checkpointed result to
+      its value.
+    """
+    if now is None:
+      now = time.time()
+
+    freshresources = {}
+    for resource, (value, measuredtime) in self.results.items():
+      if now - measuredtime <= CHECKPOINT_TTL:
+        freshresources[resource] = value
+
+    return freshresources
+
+
+  def record(self, measurement_dict, now=None):
+    """
+    <Purpose>
+      Add the results of a probe to the checkpoint and write the checkpoint
+      file. Failures, degraded estimates and values that came from the
+      cache are not recorded.
+
+    <Arguments>
+      measurement_dict:
+        A dictionary mapping resources to benchmark_measurement.Measurement
+        objects, as returned for a single probe.
+
+      now:
+        The time of the measurement, defaults to time.time().
+
+    <Exceptions>
+      Exceptions raised by persist.commit_object if the checkpoint file
+      cannot be written.
+
+    <Side Effects>
+      Writes the checkpoint file.
+
+    <Returns>
+      None
+    """
+    if now is None:
+      now = time.time()
+
+    changed = False
+    for resource, measurement in measurement_dict.items():
+      if measurement.degraded or measurement.cached:
+        continue
+      if isinstance(measurement.value, (int, long, float)) and \
+          measurement.value > 0:
+        self.results[resource] = [measurement.value, now]
+        changed = True
+
+    if changed:
+      persist.commit_object({"fingerprint": self.fingerprint,
+                             "results": self.results}, self.checkpointpath)
+
+
+  def clear(self):
+    """
+    <Purpose>
+      Remove the checkpoint once the benchmark has finished.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      OSError if the checkpoint file cannot be removed.
+
+    <Side Effects>
+      Removes the checkpoint file.
+
+    <Returns>
+      None
+    """
+    self.results = {}
+    if os.path.exists(self.checkpointpath):
+      os.remove(self.checkpointpath)
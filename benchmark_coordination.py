@@ -0,0 +1,294 @@
+"""
+<Program Name>
+  benchmark_coordination.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Coordinates installers that run on the same machine at the same time
+  (several users installing at once, or provisioning scripts), whose timing
+  probes would otherwise compete with each other and all record depressed
+  numbers.
+
+  Only one installer of a user benchmarks at a time: run_benchmark holds a
+  lock (HostLock) while its probes run, and the others wait for it. The
+  results are put in a shared result store, a benchmark cache (see
+  benchmark_cache) whose results are only trusted for SHARED_RESULT_TTL
+  seconds. An installer that had to wait finds the fresh results there and
+  only runs the probes that are still missing, so the installs effectively
+  queue up behind the first benchmark.
+
+  The lock and the store live in the system's temporary directory, unless
+  the environment variable named by COORDINATION_DIR_ENV_VAR gives another
+  directory. Setting it to an empty string turns coordination off.
+
+  Anyone on the host can write to the temporary directory, so every user
+  has a lock and a store of their own, which only they can read and write.
+  A store file that belongs to someone else is ignored, as its results
+  could have been made up to get a node to donate more than it has, and a
+  lock file that belongs to someone else (or is a link to somewhere else)
+  is not used, so that nobody can hold up another user's installs or have
+  a file of theirs opened. The installers of different users therefore do
+  not wait for each other.
+"""
+
+import os
+import stat
+import tempfile
+import time
+
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
+
+try:
+  import msvcrt
+except ImportError:
+  msvcrt = None
+
+import benchmark_cache
+
+
+# If set, the directory of the lock and the shared result store, or an
+# empty string to turn coordination off.
+COORDINATION_DIR_ENV_VAR = "SEATTLE_BENCHMARK_COORDINATION_DIR"
+
+# The names of the lock file and the shared result store, to which the
+# user id is added where there is one.
+LOCK_FILENAME = "seattle_benchmark.lock"
+SHARED_STORE_FILENAME = "seattle_benchmark_results"
+
+# How long (in seconds) results in the shared store are reused, 15 minutes.
+SHARED_RESULT_TTL = 15 * 60
+
+# How long (in seconds) an installer waits for the lock before it benchmarks
+# anyway. This is longer than a benchmark takes even when some of its
+# probes have to be killed (see probe_executor).
+LOCK_TIMEOUT = 10 * 60
+
+# How often (in seconds) a waiting installer tries to take the lock.
+LOCK_POLL_INTERVAL = 0.5
+
+
+
+class HostLock(object):
+  """
+  <Purpose>
+    A lock shared by all the processes of a user, held on a lock file. The
+    operating system releases it if the process holding it dies, so a
+    killed installer never leaves the others waiting.
+
+    Where neither fcntl nor msvcrt locking is available, acquire() always
+    succeeds immediately.
+
+  <Arguments>
+    lockpath:
+      The path of the lock file, which is created if it does not exist,
+      see get_lock_path.
+  """
+
+  def __init__(self, lockpath):
+    self.lockpath = lockpath
+    self.lockfd = None
+
+
+  def _try_lock(self):
+    """
+    <Purpose>
+      Try to take the lock without waiting.
+
+    <Returns>
+      True if the lock was taken.
+    """
+    try:
+      if fcntl is not None:
+        fcntl.flock(self.lockfd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+      else:
+        msvcrt.locking(self.lockfd, msvcrt.LK_NBLCK, 1)
+    except (IOError, OSError):
+      return False
+    return True
+
+
+  def acquire(self, timeout=LOCK_TIMEOUT):
+    """
+    <Purpose>
+      Take the lock, waiting for another process to release it if needed.
+
+    <Arguments>
+      timeout:
+        The number of seconds to wait at most.
+
+    <Exceptions>
+      OSError if the lock file cannot be opened, is a symbolic link, is not
+      a regular file or belongs to someone else.
+
+    <Side Effects>
+      Creates the lock file, readable and writable by this user only.
+
+    <Returns>
+      True if the lock was taken (or there is no locking on this system),
+      False if the time ran out.
+    """
+    if fcntl is None and msvcrt is None:
+      return True
+
+    # Never follow a link someone else put in place of the lock file.
+    self.lockfd = os.open(self.lockpath, os.O_RDWR | os.O_CREAT | \
+                          getattr(os, "O_NOFOLLOW", 0), 0600)
+    try:
+      lockstat = os.fstat(self.lockfd)
+      if not stat.S_ISREG(lockstat.st_mode):
+        raise OSError("the lock file " + self.lockpath + " is not a " + \
+                      "regular file")
+      if hasattr(os, "getuid") and lockstat.st_uid != os.getuid():
+        raise OSError("the lock file " + self.lockpath + " belongs to " + \
+                      "someone else")
+    except OSError:
+      os.close(self.lockfd)
+      self.lockfd = None
+      raise
+
+    deadline = time.time() + timeout
+    while not self._try_lock():
+      if time.time() > deadline:
+        os.close(self.lockfd)
+        self.lockfd = None
+        return False
+      time.sleep(LOCK_POLL_INTERVAL)
+
+    return True
+
+
+  def release(self):
+    """
+    <Purpose>
+      Release the lock, if it is held.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      None
+    """
+    if self.lockfd is None:
+      return
+
+    try:
+      if fcntl is not None:
+        fcntl.flock(self.lockfd, fcntl.LOCK_UN)
+      else:
+        os.lseek(self.lockfd, 0, 0)
+        msvcrt.locking(self.lockfd, msvcrt.LK_UNLCK, 1)
+    except (IOError, OSError):
+      pass
+    os.close(self.lockfd)
+    self.lockfd = None
+
+
+
+def get_coordination_dir():
+  """
+  <Purpose>
+    Get the directory of the host-wide lock and shared result store.
+
+  <Arguments>
+    None
+
+  <Exceptions>
+    None
+
+  <Returns>
+    The directory, or None if coordination is turned off.
+  """
+  coordinationdir = os.environ.get(COORDINATION_DIR_ENV_VAR,
+                                   tempfile.gettempdir())
+  return coordinationdir or None
+
+
+
+def _add_user_id(filename):
+  """
+  <Purpose>
+    Add the id of this user to a file name, where users have ids.
+
+  <Arguments>
+    filename:
+      The file name.
+
+  <Returns>
+    The file name for this user.
+  """
+  if hasattr(os, "getuid"):
+    return filename + "." + str(os.getuid())
+  return filename
+
+
+
+def get_lock_path(coordinationdir):
+  """
+  <Purpose>
+    Get the path of this user's lock file.
+
+  <Arguments>
+    coordinationdir:
+      The directory returned by get_coordination_dir.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    The path of the lock file.
+  """
+  return os.path.join(coordinationdir, _add_user_id(LOCK_FILENAME))
+
+
+
+def get_shared_store_path(coordinationdir):
+  """
+  <Purpose>
+    Get the path of this user's shared result store.
+
+  <Arguments>
+    coordinationdir:
+      The directory returned by get_coordination_dir.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    The path of the store.
+  """
+  return os.path.join(coordinationdir, _add_user_id(SHARED_STORE_FILENAME))
+
+
+
+def open_shared_store(coordinationdir):
+  """
+  <Purpose>
+    Open this user's shared result store.
+
+  <Arguments>
+    coordinationdir:
+      The directory returned by get_coordination_dir.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A benchmark_cache.BenchmarkCache for the store, or None if the store
+    belongs to someone else (see the module's purpose).
+  """
+  storepath = get_shared_store_path(coordinationdir)
+
+  # Do not even parse a file someone else could have put there.
+  if hasattr(os, "getuid") and os.path.exists(storepath):
+    try:
+      if os.stat(storepath).st_uid != os.getuid():
+        return None
+    except OSError:
+      return None
+
+  return benchmark_cache.BenchmarkCache(storepath, SHARED_RESULT_TTL)
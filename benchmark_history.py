@@ -0,0 +1,248 @@
+"""
+<Program Name>
+  benchmark_history.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Keeps the history of the benchmark results of every host, keyed by its
+  identity (see benchmark_cache.get_host_identity), so that a host that is
+  benchmarked again can be compared with its own past: a disk whose write
+  rate suddenly dropped (a failing drive) or memory that shrank shows up as
+  a regression. The hardware fingerprint that keys the benchmark cache is
+  no use here, as it changes with the memory and the cgroup limits.
+
+  A new value is a significant regression when it is well below the median
+  of the host's earlier values:
+    - it is more than MIN_REGRESSION_DROP below the median, so ordinary
+      jitter never counts, and
+    - it is more than MAX_DEVIATIONS robust standard deviations (from the
+      median absolute deviation) below the median, when there are at least
+      MIN_HISTORY_RUNS earlier values to estimate them from. With fewer
+      runs only drops larger than LARGE_REGRESSION_DROP count, and
+    - if the measurement has an interval (see benchmark_measurement), the
+      median lies above the whole interval.
+
+  Only values that were actually measured are recorded. Defaults, failures
+  and cached values are not, the latter so that reusing a measurement does
+  not make it count twice.
+
+  The history is stored in HISTORY_FILENAME in the install directory, unless
+  the environment variable named by HISTORY_PATH_ENV_VAR gives another path
+  (for instance one shared by a fleet of machines). Setting it to an empty
+  string turns the history off.
+"""
+
+import os
+import time
+
+import persist
+
+
+# The name of the history file in the install directory.
+HISTORY_FILENAME = "benchmark_history"
+
+# If set, the path of the history file, or an empty string for none.
+HISTORY_PATH_ENV_VAR = "SEATTLE_BENCHMARK_HISTORY"
+
+# The number of runs kept for each resource of a host.
+MAX_HISTORY_RUNS = 50
+
+# The number of earlier runs needed to estimate how much a resource varies.
+MIN_HISTORY_RUNS = 3
+
+# Smaller drops (as a fraction of the median) are never regressions.
+MIN_REGRESSION_DROP = 0.2
+
+# Drops larger than this are regressions even without enough history to
+# know how much the resource varies.
+LARGE_REGRESSION_DROP = 0.5
+
+# How many robust standard deviations below the median a regression is.
+MAX_DEVIATIONS = 3
+
+# Scales the median absolute deviation to a standard deviation for normally
+# distributed values.
+MAD_TO_DEVIATION = 1.4826
+
+
+
+def get_median(values):
+  """
+  <Purpose>
+    Get the median of a non-empty list of numbers.
+
+  <Returns>
+    The median.
+  """
+  sortedvalues = sorted(values)
+  middle = len(sortedvalues) / 2
+  if len(sortedvalues) % 2:
+    return sortedvalues[middle]
+  return (sortedvalues[middle - 1] + sortedvalues[middle]) / 2.0
+
+
+
+def find_regression(history, value, interval=None):
+  """
+  <Purpose>
+    Decide whether a value is a significant regression from its history, see
+    the module's purpose.
+
+  <Arguments>
+    history:
+      A list of the earlier values of the resource.
+
+    value:
+      The new value.
+
+    interval:
+      Optional (low, high) interval of the new value.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    None if the value is not a regression, otherwise a dictionary with the
+    "median" of the history, the relative "drop" from it, the number of
+    "deviations" it is below it (None if there is too little history to
+    tell) and the number of "runs" in the history.
+  """
+  if not history:
+    return None
+
+  median = get_median(history)
+  if median <= 0 or value >= median:
+    return None
+
+  drop = (median - value) / float(median)
+  if drop <= MIN_REGRESSION_DROP:
+    return None
+
+  if interval is not None and interval[1] >= median:
+    return None
+
+  deviations = None
+  if len(history) >= MIN_HISTORY_RUNS:
+    deviation = MAD_TO_DEVIATION * \
+        get_median([abs(oldvalue - median) for oldvalue in history])
+    if deviation > 0:
+      deviations = (median - value) / deviation
+      if deviations <= MAX_DEVIATIONS:
+        return None
+  elif drop <= LARGE_REGRESSION_DROP:
+    return None
+
+  return {"median": median, "drop": drop, "deviations": deviations,
+          "runs": len(history)}
+
+
+
+class BenchmarkHistory(object):
+  """
+  <Purpose>
+    Gives access to the history stored in a history file.
+
+    The history file contains a dictionary mapping each host identity to a
+    dictionary of {resource: [[value, time measured], ...]}, oldest first.
+
+  <Arguments>
+    historypath:
+      The path of the history file. It does not need to exist yet.
+  """
+
+  def __init__(self, historypath):
+    self.historypath = historypath
+    self.entries = {}
+
+    if os.path.exists(historypath):
+      try:
+        self.entries = persist.restore_object(historypath)
+      except Exception:
+        # A corrupted history is no worse than an empty one.
+        self.entries = {}
+
+
+  def get_history(self, hostidentity, resource):
+    """
+    <Purpose>
+      Get the earlier values of a resource on a host.
+
+    <Arguments>
+      hostidentity:
+        The identity of the host, see benchmark_cache.get_host_identity.
+
+      resource:
+        The name of the resource.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A list of the values, oldest first. It may be empty.
+    """
+    return [value for value, measuredtime in \
+              self.entries.get(hostidentity, {}).get(resource, [])]
+
+
+  def record(self, hostidentity, resource_dict, now=None):
+    """
+    <Purpose>
+      Add a run's measured values to the history and write the history
+      file. Anything that is not a positive number is not recorded.
+
+    <Arguments>
+      hostidentity:
+        The identity of the host, see benchmark_cache.get_host_identity.
+
+      resource_dict:
+        A dictionary of the measured resources.
+
+      now:
+        The time of the measurement, defaults to time.time().
+
+    <Exceptions>
+      Exceptions raised by persist.commit_object if the history file cannot
+      be written.
+
+    <Side Effects>
+      Writes the history file.
+
+    <Returns>
+      None
+    """
+    if now is None:
+      now = time.time()
+
+    hostentries = self.entries.setdefault(hostidentity, {})
+    for resource, value in resource_dict.items():
+      if isinstance(value, (int, long, float)) and value > 0:
+        runs = hostentries.setdefault(resource, [])
+        runs.append([value, now])
+        del runs[:-MAX_HISTORY_RUNS]
+
+    persist.commit_object(self.entries, self.historypath)
+
+
+
+def open_history(installdir):
+  """
+  <Purpose>
+    Open the history of the install.
+
+  <Arguments>
+    installdir:
+      The directory seattle is being installed in.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A BenchmarkHistory, or None if the history is turned off.
+  """
+  historypath = os.environ.get(HISTORY_PATH_ENV_VAR,
+                               os.path.join(installdir, HISTORY_FILENAME))
+  if not historypath:
+    return None
+  return BenchmarkHistory(historypath)
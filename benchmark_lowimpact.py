@@ -0,0 +1,289 @@
+"""
+<Program Name>
+  benchmark_lowimpact.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Low-impact benchmarking, for hosts that already run real workloads. In
+  low-impact mode (see benchmark_resources.run_benchmark) the benchmark
+  keeps out of the way of the services on the host:
+
+    - The probes' worker processes run at the lowest CPU priority (nice 19,
+      or the idle priority class on Windows) and the idle I/O priority, so
+      the host's services always get the processor and the disk first
+      (see lower_priority).
+    - The address space of the worker processes is capped at
+      PROBE_MEMORY_HEADROOM bytes more than they start with, so a probe
+      cannot push the services into swap (see limit_memory).
+    - The timing probes (measure_random, measuredisk) take a Throttle, which
+      pauses them regularly so they are busy at most DUTY_CYCLE of the
+      time. Only one of them runs at a time (see probe_executor).
+
+  The pauses are left out of the timings, but the low priority does slow
+  the probes down when the services are busy. The Throttle compares the
+  processor time a probe got with the time it was busy, and its correction
+  scales the probe's result back up to what the probe would have measured
+  at its normal priority. The correction is capped at MAX_CORRECTION, so
+  a host that is completely busy is not taken to be several times faster
+  than it was measured.
+"""
+
+import os
+import platform
+import sys
+import time
+
+try:
+  import ctypes
+  import ctypes.util
+except ImportError:
+  ctypes = None
+
+try:
+  import resource
+except ImportError:
+  # Not available on Windows.
+  resource = None
+
+
+# If set to anything but an empty string or 0, benchmarks are run in
+# low-impact mode.
+LOW_IMPACT_ENV_VAR = "SEATTLE_BENCHMARK_LOW_IMPACT"
+
+# The fraction of the time a throttled probe may be busy.
+DUTY_CYCLE = 0.25
+
+# How long (in seconds) a throttled probe works before it pauses.
+THROTTLE_BUSY_PERIOD = 0.05
+
+# The largest correction applied to the result of a throttled probe.
+MAX_CORRECTION = 2.0
+
+# A probe that was busy for less time (in seconds) is not corrected, as the
+# processor time is only counted in ticks.
+MIN_CORRECTION_BUSY_TIME = 0.5
+
+# How much (in bytes) the address space of a worker process may grow.
+PROBE_MEMORY_HEADROOM = 64 * 1024 * 1024
+
+# The nice value of the worker processes.
+LOW_IMPACT_NICENESS = 19
+
+# The number of the ioprio_set system call on Linux, for each architecture.
+IOPRIO_SET_SYSCALLS = {"x86_64": 251, "i386": 289, "i686": 289,
+                       "aarch64": 30, "armv6l": 314, "armv7l": 314,
+                       "ppc": 273, "ppc64": 273, "ppc64le": 273}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+
+# Windows priority classes, see SetPriorityClass.
+IDLE_PRIORITY_CLASS = 0x00000040
+PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000
+
+
+
+def _get_cputime():
+  """
+  <Purpose>
+    Get the processor time used by this process so far.
+
+  <Returns>
+    The user and system time, in seconds.
+  """
+  return sum(os.times()[:2])
+
+
+
+class Throttle(object):
+  """
+  <Purpose>
+    Keeps a timing probe busy no more than DUTY_CYCLE of the time. The probe
+    calls pause() between units of work, and the throttle sleeps whenever
+    the probe has been busy for THROTTLE_BUSY_PERIOD.
+
+    The throttle also keeps track of the processor time the probe got while
+    it was busy, see get_correction.
+
+  <Arguments>
+    duty_cycle:
+      The fraction of the time the probe may be busy.
+  """
+
+  def __init__(self, duty_cycle=DUTY_CYCLE):
+    self.duty_cycle = duty_cycle
+    self.busystart = None
+    self.busycpustart = None
+    self.busytime = 0.0
+    self.busycputime = 0.0
+    self.pausedtime = 0.0
+
+
+  def _start(self):
+    self.busystart = time.time()
+    self.busycpustart = _get_cputime()
+
+
+  def pause(self):
+    """
+    <Purpose>
+      Pause the probe if it has been busy for long enough.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      Sleeps.
+
+    <Returns>
+      The number of seconds paused, which the probe should leave out of its
+      timings.
+    """
+    if self.busystart is None:
+      self._start()
+      return 0.0
+
+    busy = time.time() - self.busystart
+    if busy < THROTTLE_BUSY_PERIOD:
+      return 0.0
+
+    self.busytime += busy
+    self.busycputime += _get_cputime() - self.busycpustart
+
+    pausestart = time.time()
+    time.sleep(busy * (1 - self.duty_cycle) / self.duty_cycle)
+    paused = time.time() - pausestart
+    self.pausedtime += paused
+
+    self._start()
+    return paused
+
+
+  def get_correction(self):
+    """
+    <Purpose>
+      Get the factor to scale the probe's result by, to make up for the
+      processor time it lost to other processes because of its low
+      priority. It is the time the probe was busy divided by the processor
+      time it got then, between 1 and MAX_CORRECTION.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Returns>
+      The correction.
+    """
+    if self.busystart is not None:
+      self.busytime += time.time() - self.busystart
+      self.busycputime += _get_cputime() - self.busycpustart
+      self._start()
+
+    if self.busytime < MIN_CORRECTION_BUSY_TIME or self.busycputime <= 0:
+      return 1.0
+    return max(1.0, min(self.busytime / self.busycputime, MAX_CORRECTION))
+
+
+
+def _set_io_priority_idle():
+  """
+  <Purpose>
+    Give this process the idle I/O priority on Linux.
+
+  <Returns>
+    True if it was set.
+  """
+  syscallnumber = IOPRIO_SET_SYSCALLS.get(platform.machine())
+  if ctypes is None or syscallnumber is None:
+    return False
+
+  try:
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    return libc.syscall(syscallnumber, IOPRIO_WHO_PROCESS, 0,
+        IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0
+  except (OSError, AttributeError):
+    return False
+
+
+
+def lower_priority():
+  """
+  <Purpose>
+    Give this process the lowest CPU and I/O priority. This is meant to be
+    called in a probe's worker process, never in the installer itself.
+
+  <Arguments>
+    None
+
+  <Exceptions>
+    None, a priority that cannot be lowered is left as it is.
+
+  <Side Effects>
+    Changes the priorities of this process.
+
+  <Returns>
+    None
+  """
+  if hasattr(os, "nice"):
+    try:
+      os.nice(LOW_IMPACT_NICENESS)
+    except OSError:
+      pass
+
+  if sys.platform.startswith("linux"):
+    _set_io_priority_idle()
+
+  elif sys.platform == "win32" and ctypes is not None:
+    # Background mode lowers the I/O and memory priorities as well.
+    try:
+      kernel32 = ctypes.windll.kernel32
+      process = kernel32.GetCurrentProcess()
+      kernel32.SetPriorityClass(process, IDLE_PRIORITY_CLASS)
+      kernel32.SetPriorityClass(process, PROCESS_MODE_BACKGROUND_BEGIN)
+    except (OSError, AttributeError):
+      pass
+
+
+
+def limit_memory():
+  """
+  <Purpose>
+    Cap the address space of this process at PROBE_MEMORY_HEADROOM bytes
+    more than it uses now. Like lower_priority, this is only meant for a
+    probe's worker process.
+
+  <Arguments>
+    None
+
+  <Exceptions>
+    None, the limit is only set where the current size is known (Linux).
+
+  <Side Effects>
+    Lowers the RLIMIT_AS limit of this process.
+
+  <Returns>
+    None
+  """
+  if resource is None or not os.path.exists("/proc/self/statm"):
+    return
+
+  try:
+    statmfile = open("/proc/self/statm")
+    pages = int(statmfile.read().split()[0])
+    statmfile.close()
+
+    limit = pages * resource.getpagesize() + PROBE_MEMORY_HEADROOM
+    softlimit, hardlimit = resource.getrlimit(resource.RLIMIT_AS)
+    if hardlimit != resource.RLIM_INFINITY:
+      limit = min(limit, hardlimit)
+    if softlimit == resource.RLIM_INFINITY or limit < softlimit:
+      resource.setrlimit(resource.RLIMIT_AS, (limit, hardlimit))
+  except (IOError, ValueError, resource.error):
+    pass
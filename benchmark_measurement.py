@@ -0,0 +1,226 @@
+"""
+<Program Name>
+  benchmark_measurement.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Defines Measurement, the result of running a benchmark probe.
+
+  A probe function may simply return a value, which probe_executor wraps in
+  a Measurement, or it may return a Measurement itself to report more about
+  how the value was obtained, for instance that the probe ran out of time
+  and the value is only its best estimate so far.
+
+  This module deliberately imports nothing, so that the timing probes
+  (measure_random, measuredisk) can use it on every platform.
+
+<Value notes>
+  The value of a Measurement follows the conventions of the dictionaries
+  returned by the OS specific measure_resources() functions: a measured
+  value is a number, a failure is a string describing it and an
+  unimplemented test is None. A probe that measures several resources
+  returns a tuple or dictionary of values, which probe_executor splits into
+  one Measurement per resource.
+
+<Uncertainty notes>
+  The timing probes take many samples and report a central value (the
+  median for measure_random, the overall rate for measuredisk). How much
+  the samples vary says how far the value can be trusted. Every sample is
+  turned into a rate (sample_size divided by the seconds it took), and the
+  percentiles of these rates relative to their median are applied to the
+  value. get_interval() gives the range between the INTERVAL_PERCENTILES
+  this way, and get_percentile_value() any other percentile. Measurements
+  without enough samples (counts of processors, memory, ...) have no
+  interval, their value is taken as exact.
+"""
+
+
+# The percentiles of the sample rates that bound the interval of a
+# measurement.
+INTERVAL_PERCENTILES = (5, 95)
+
+# With fewer samples than this, the spread of the samples means nothing.
+MIN_INTERVAL_SAMPLES = 10
+
+
+
+def _get_percentile(sortedvalues, percentile):
+  """
+  <Purpose>
+    Get a percentile of a sorted list by the nearest rank.
+
+  <Arguments>
+    sortedvalues:
+      A non-empty sorted list of numbers.
+
+    percentile:
+      The percentile, from 0 to 100.
+
+  <Returns>
+    The value at the percentile.
+  """
+  index = int(round(percentile / 100.0 * (len(sortedvalues) - 1)))
+  return sortedvalues[index]
+
+
+
+class Measurement(object):
+  """
+  <Purpose>
+    The outcome of a probe for a resource.
+
+  <Arguments>
+    value:
+      The measured value, see the module's value notes.
+
+    degraded:
+      True if the probe could not finish (for instance because it ran out
+      of time) and value is only an estimate from partial data.
+
+    reason:
+      A string explaining why the probe failed or is degraded, or None.
+
+    cached:
+      True if value was not measured now but taken from the benchmark
+      cache.
+
+    samples:
+      A list of the raw samples the probe took, if it takes samples. For
+      the timing probes these are the number of seconds each sample took.
+
+    sample_size:
+      The amount of work done for each sample (for instance the number of
+      bytes), or None.
+
+    sources:
+      A dictionary of the values the value was chosen from, by where they
+      came from (for instance "host" and "cgroup", see Linux_resources), or
+      None.
+
+  <Attributes>
+    wall_time and cpu_time are set by probe_executor to the number of
+    seconds the probe took and the CPU time used while it ran, and cost to
+    what else running it cost (see probe_accounting).
+  """
+
+  def __init__(self, value, degraded=False, reason=None, cached=False,
+               samples=None, sample_size=None, sources=None):
+    self.value = value
+    self.degraded = degraded
+    self.reason = reason
+    self.cached = cached
+    self.samples = samples
+    self.sample_size = sample_size
+    self.sources = sources
+    self.wall_time = None
+    self.cpu_time = None
+    self.cost = None
+
+
+  def __repr__(self):
+    description = "<Measurement " + repr(self.value)
+    if self.degraded:
+      description += " degraded"
+    if self.cached:
+      description += " cached"
+    return description + ">"
+
+
+  def failed(self):
+    """
+    <Purpose>
+      Check whether the probe failed.
+
+    <Returns>
+      True if the value is a string describing a failure.
+    """
+    return isinstance(self.value, basestring)
+
+
+  def get_percentile_value(self, percentile):
+    """
+    <Purpose>
+      Estimate a percentile of the measured value from the spread of the
+      samples, see the module's uncertainty notes.
+
+    <Arguments>
+      percentile:
+        The percentile, from 0 to 100.
+
+    <Returns>
+      The value at that percentile (a float), or None if the value is not
+      a number or there are not enough samples to tell.
+    """
+    if not isinstance(self.value, (int, long, float)) or \
+        not self.samples or not self.sample_size:
+      return None
+
+    rates = [self.sample_size / float(sampletime) \
+               for sampletime in self.samples if sampletime > 0]
+    if len(rates) < MIN_INTERVAL_SAMPLES:
+      return None
+
+    rates.sort()
+    return self.value * _get_percentile(rates, percentile) / \
+        _get_percentile(rates, 50)
+
+
+  def get_interval(self):
+    """
+    <Purpose>
+      Get the range the measured value is likely to be in, see the module's
+      uncertainty notes.
+
+    <Returns>
+      A tuple (low, high) of the values at the INTERVAL_PERCENTILES, or None
+      if the measurement has no interval.
+    """
+    low = self.get_percentile_value(INTERVAL_PERCENTILES[0])
+    if low is None:
+      return None
+    return (low, self.get_percentile_value(INTERVAL_PERCENTILES[1]))
+
+
+  def copy(self, value):
+    """
+    <Purpose>
+      Make a Measurement with the same details as this one but a different
+      value. Used to split the result of a probe that measures several
+      resources.
+
+    <Arguments>
+      value:
+        The value of the new Measurement.
+
+    <Returns>
+      The new Measurement.
+    """
+    newmeasurement = Measurement(value)
+    newmeasurement.__dict__.update(self.__dict__)
+    newmeasurement.value = value
+    return newmeasurement
+
+
+
+def get_values(measurement_dict):
+  """
+  <Purpose>
+    Convert a dictionary of Measurements into the plain dictionary of values
+    returned by the OS specific measure_resources() functions.
+
+  <Arguments>
+    measurement_dict:
+      A dictionary mapping resource names to Measurements.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A dictionary mapping the same resource names to the measured values.
+  """
+  resource_dict = {}
+  for resource in measurement_dict:
+    resource_dict[resource] = measurement_dict[resource].value
+  return resource_dict
@@ -0,0 +1,296 @@
+"""
+<Program Name>
+  benchmark_policy.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Failure policies let run_benchmark deal with failed benchmarks without
+  asking anyone, so that unattended installs (a fleet of machines being
+  provisioned with nobody at the console) never stall at the "Continue with
+  installation?" prompt.
+
+  A policy says, for each resource, what to do when its benchmark fails:
+    continue: use the default value for the resource and carry on.
+    retry N [delay [max_delay]]: run the probe again up to N times,
+      waiting delay seconds (1 by default) before the first retry and
+      twice as long before each following one, but never more than
+      max_delay seconds (60 by default) before any one retry. If it still
+      fails, carry on with the default value.
+    abort: stop the installation.
+
+  However the rule is written, a resource is retried at most MAX_RETRIES
+  times, and the waits before its retries add up to at most
+  MAX_TOTAL_RETRY_DELAY seconds, the retries that would go past it are not
+  made. A policy cannot hold up an install for hours.
+
+  Policies are written one rule per line, a resource name (one of
+  resource_vector.RESOURCE_NAMES, or "default", which applies to every
+  resource without a rule of its own) followed by the action. A rule for
+  any other resource is an error, so a misspelt name is not silently
+  ignored. Blank lines and lines starting with # are ignored:
+
+    default continue
+    filewrite retry 3 5
+    memory abort
+
+  A policy is only used if one is configured, otherwise the user is asked
+  as before. In order of precedence, it is read from the environment
+  variable named by POLICY_ENV_VAR (where the rules may be separated by
+  semicolons instead of newlines), from the file named by
+  POLICY_PATH_ENV_VAR, or from POLICY_FILENAME in the install directory.
+"""
+
+import os
+
+import resource_vector
+
+
+# The name of the policy file in the install directory.
+POLICY_FILENAME = "benchmark_policy"
+
+# If set, the rules of the policy itself.
+POLICY_ENV_VAR = "SEATTLE_BENCHMARK_POLICY"
+
+# If set, the path of the policy file to use instead of the default.
+POLICY_PATH_ENV_VAR = "SEATTLE_BENCHMARK_POLICY_FILE"
+
+CONTINUE = "continue"
+RETRY = "retry"
+ABORT = "abort"
+
+# The action for resources that have no rule, if the policy has no default
+# rule either.
+DEFAULT_ACTION = CONTINUE
+
+# The number of seconds to wait before the first retry, if the rule does not
+# say.
+DEFAULT_RETRY_DELAY = 1
+
+# The most seconds to wait before any one retry, if the rule does not say.
+DEFAULT_MAX_RETRY_DELAY = 60
+
+# The most times a resource is retried, whatever its rule says.
+MAX_RETRIES = 100
+
+# The most seconds all the waits before the retries of a resource may add up
+# to, whatever its rule says.
+MAX_TOTAL_RETRY_DELAY = 600
+
+# What a rule may name besides a resource.
+DEFAULT_RULE = "default"
+
+
+
+class PolicyError(Exception):
+  """Error to indicate that a failure policy could not be parsed."""
+  pass
+
+
+
+class FailurePolicy(object):
+  """
+  <Purpose>
+    A parsed failure policy, see the module's purpose.
+
+  <Arguments>
+    policystring:
+      The rules of the policy, one per line (or separated by semicolons).
+
+    source:
+      A description of where the rules came from, used in error messages
+      and the log.
+
+  <Exceptions>
+    PolicyError if a rule cannot be parsed.
+  """
+
+  def __init__(self, policystring, source="policy"):
+    self.source = source
+    # Maps each resource (or "default") to (action, retries, delay,
+    # max_delay).
+    self.rules = {}
+
+    for line in policystring.replace(";", "\n").splitlines():
+      line = line.strip()
+      if not line or line.startswith("#"):
+        continue
+      self._parse_rule(line)
+
+
+  def _parse_rule(self, line):
+    """
+    <Purpose>
+      Parse a single rule and add it to the policy.
+
+    <Arguments>
+      line:
+        The rule, without comments or surrounding whitespace.
+
+    <Exceptions>
+      PolicyError if the rule cannot be parsed.
+
+    <Returns>
+      None
+    """
+    words = line.split()
+    if len(words) < 2:
+      raise PolicyError("Rule '" + line + "' in " + self.source + \
+                          " has no action")
+
+    resource, action, arguments = words[0], words[1].lower(), words[2:]
+
+    if resource != DEFAULT_RULE and \
+        resource not in resource_vector.RESOURCE_NAMES:
+      raise PolicyError("Unknown resource '" + resource + "' in " + \
+                          self.source)
+
+    if resource in self.rules:
+      raise PolicyError("More than one rule for " + resource + " in " + \
+                          self.source)
+
+    if action in (CONTINUE, ABORT):
+      if arguments:
+        raise PolicyError("Rule '" + line + "' in " + self.source + \
+                            " has unexpected arguments")
+      self.rules[resource] = (action, 0, 0, 0)
+
+    elif action == RETRY:
+      if len(arguments) not in (1, 2, 3):
+        raise PolicyError("Rule '" + line + "' in " + self.source + \
+            " must be: resource retry count [delay [max_delay]]")
+      try:
+        retries = int(arguments[0])
+        delay = DEFAULT_RETRY_DELAY
+        maxdelay = DEFAULT_MAX_RETRY_DELAY
+        if len(arguments) >= 2:
+          delay = float(arguments[1])
+        if len(arguments) == 3:
+          maxdelay = float(arguments[2])
+      except ValueError:
+        raise PolicyError("Rule '" + line + "' in " + self.source + \
+                            " has a bad retry count or delay")
+      # NaN is not a number of seconds either.
+      if retries < 0 or not delay >= 0 or not maxdelay >= 0:
+        raise PolicyError("Rule '" + line + "' in " + self.source + \
+                            " has a negative retry count or delay")
+      self.rules[resource] = (RETRY, retries, delay, maxdelay)
+
+    else:
+      raise PolicyError("Unknown action '" + action + "' in " + self.source)
+
+
+  def get_action(self, resource):
+    """
+    <Purpose>
+      Find what to do when the benchmark for a resource fails.
+
+    <Arguments>
+      resource:
+        The name of the resource.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A tuple (action, retries, delay, max_delay), where action is
+      CONTINUE, RETRY or ABORT, and the rest are only meaningful for RETRY.
+    """
+    if resource in self.rules:
+      return self.rules[resource]
+    return self.rules.get(DEFAULT_RULE, (DEFAULT_ACTION, 0, 0, 0))
+
+
+  def get_retry_delays(self, resource):
+    """
+    <Purpose>
+      Get the number of seconds to wait before each retry of the benchmark
+      for a resource.
+
+    <Arguments>
+      resource:
+        The name of the resource.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A list with one delay per retry, empty if the policy does not retry
+      the resource. There are at most MAX_RETRIES, and the retries whose
+      waits would add up to more than MAX_TOTAL_RETRY_DELAY are left out.
+    """
+    action, retries, delay, maxdelay = self.get_action(resource)
+    if action != RETRY:
+      return []
+
+    delays = []
+    totaldelay = 0
+    for attempt in range(min(retries, MAX_RETRIES)):
+      attemptdelay = min(delay * 2 ** attempt, maxdelay)
+      if totaldelay + attemptdelay > MAX_TOTAL_RETRY_DELAY:
+        break
+      totaldelay += attemptdelay
+      delays.append(attemptdelay)
+    return delays
+
+
+  def should_abort(self, resource):
+    """
+    <Purpose>
+      Decide whether a resource whose benchmark failed (after any retries)
+      stops the installation.
+
+    <Arguments>
+      resource:
+        The name of the resource.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      True to abort the installation, False to continue with the default
+      value.
+    """
+    return self.get_action(resource)[0] == ABORT
+
+
+
+def load_policy(installdir):
+  """
+  <Purpose>
+    Load the configured failure policy, see the module's purpose.
+
+  <Arguments>
+    installdir:
+      The directory seattle is being installed in.
+
+  <Exceptions>
+    PolicyError if the policy cannot be read or parsed.
+
+  <Side Effects>
+    None
+
+  <Returns>
+    A FailurePolicy, or None if no policy is configured.
+  """
+  if os.environ.get(POLICY_ENV_VAR):
+    return FailurePolicy(os.environ[POLICY_ENV_VAR],
+                         "environment variable " + POLICY_ENV_VAR)
+
+  if os.environ.get(POLICY_PATH_ENV_VAR):
+    policypath = os.environ[POLICY_PATH_ENV_VAR]
+  else:
+    policypath = os.path.join(installdir, POLICY_FILENAME)
+    if not os.path.exists(policypath):
+      return None
+
+  try:
+    policyfile = open(policypath, 'r')
+    policystring = policyfile.read()
+    policyfile.close()
+  except IOError, e:
+    raise PolicyError("Cannot read the failure policy " + policypath + \
+                        ": " + str(e))
+
+  return FailurePolicy(policystring, policypath)
@@ -0,0 +1,254 @@
+"""
+<Program Name>
+  benchmark_profiling.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Optional profiling of an install, to find out where the time goes. When
+  it is turned on, every benchmark probe and every phase of
+  benchmark_resources.main (the benchmark as a whole, the donation
+  calculations and create_installer_state) is run under cProfile, and its
+  statistics are written to a .pstats file that can be loaded with the
+  pstats module:
+
+    probe_<resources>.pstats, one for every probe that is run (a probe run
+      in the thread of a profiled phase is part of that phase's profile
+      instead)
+    phase_<name>.pstats, one for every phase of the install
+
+  At the end a summary table of the functions with the most cumulative time
+  in each of them is written to SUMMARY_FILENAME.
+
+  Profiling is turned on by giving benchmark_resources.main a directory for
+  the files, or by setting the environment variable named by
+  PROFILE_DIR_ENV_VAR to one. When it is off nothing is profiled and
+  cProfile is never involved.
+"""
+
+import os
+import sys
+import time
+
+try:
+  import cProfile
+  import pstats
+except ImportError:
+  # Python 2.4 has no cProfile.
+  cProfile = None
+
+
+# If set, the directory to write profiles to.
+PROFILE_DIR_ENV_VAR = "SEATTLE_BENCHMARK_PROFILE"
+
+# The name of the summary table in the profile directory.
+SUMMARY_FILENAME = "profile_summary.txt"
+
+# The number of functions listed for each probe or phase in the summary.
+SUMMARY_FUNCTION_COUNT = 10
+
+
+
+def get_probe_profile_path(profile_dir, probe):
+  """
+  <Purpose>
+    Get the path of the profile of a probe.
+
+  <Arguments>
+    profile_dir:
+      The profile directory.
+
+    probe:
+      The probe_executor.Probe.
+
+  <Returns>
+    The path of the .pstats file.
+  """
+  return os.path.join(profile_dir,
+                      "probe_" + "_".join(probe.resources) + ".pstats")
+
+
+
+def run_profiled(profile_path, function, *args, **kwargs):
+  """
+  <Purpose>
+    Call a function under cProfile and write its statistics to a file.
+
+  <Arguments>
+    profile_path:
+      The path of the .pstats file to write.
+
+    function:
+      The function to call.
+
+    args, kwargs:
+      The arguments to call it with.
+
+  <Exceptions>
+    Whatever the function raises. The statistics are written either way.
+
+  <Side Effects>
+    Writes the .pstats file, unless the thread is already being profiled
+    (a probe run in the thread of a profiled phase). A second profiler
+    would replace the hook of the first and then clear it, cutting the
+    first profile short, so the function is only profiled as part of the
+    first.
+
+  <Returns>
+    What the function returns.
+  """
+  if getattr(sys, "getprofile", None) is not None and \
+      sys.getprofile() is not None:
+    return function(*args, **kwargs)
+
+  profiler = cProfile.Profile()
+  try:
+    return profiler.runcall(function, *args, **kwargs)
+  finally:
+    profiler.dump_stats(profile_path)
+
+
+
+class Profiler(object):
+  """
+  <Purpose>
+    Profiles the phases of an install and summarizes the profiles.
+
+  <Arguments>
+    profile_dir:
+      The directory to write the profiles to, which is created if it does
+      not exist, or None when profiling is off.
+  """
+
+  def __init__(self, profile_dir):
+    self.profile_dir = profile_dir
+    self.start_time = time.time()
+
+    if profile_dir is not None and not os.path.isdir(profile_dir):
+      os.makedirs(profile_dir)
+
+
+  def enabled(self):
+    """
+    <Purpose>
+      Check whether profiling is on.
+
+    <Returns>
+      True if it is.
+    """
+    return self.profile_dir is not None
+
+
+  def run(self, phase, function, *args, **kwargs):
+    """
+    <Purpose>
+      Run a phase of the install, profiled if profiling is on.
+
+    <Arguments>
+      phase:
+        The name of the phase, used in the name of its .pstats file.
+
+      function:
+        The function that performs the phase.
+
+      args, kwargs:
+        The arguments to call it with.
+
+    <Exceptions>
+      Whatever the function raises.
+
+    <Side Effects>
+      Writes the phase's .pstats file if profiling is on.
+
+    <Returns>
+      What the function returns.
+    """
+    if self.profile_dir is None:
+      return function(*args, **kwargs)
+
+    return run_profiled(os.path.join(self.profile_dir,
+                                     "phase_" + phase + ".pstats"),
+                        function, *args, **kwargs)
+
+
+  def write_summary(self):
+    """
+    <Purpose>
+      Write a table of the functions with the most cumulative time in every
+      profile written during this install (older profiles in the directory
+      are left out).
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      IOError if the summary cannot be written.
+
+    <Side Effects>
+      Writes SUMMARY_FILENAME in the profile directory.
+
+    <Returns>
+      The path of the summary, or None if profiling is off.
+    """
+    if self.profile_dir is None:
+      return None
+
+    profilenames = []
+    for filename in sorted(os.listdir(self.profile_dir)):
+      profilepath = os.path.join(self.profile_dir, filename)
+      if filename.endswith(".pstats") and \
+          os.path.getmtime(profilepath) >= int(self.start_time):
+        profilenames.append(filename)
+
+    summarypath = os.path.join(self.profile_dir, SUMMARY_FILENAME)
+    summaryfile = open(summarypath, 'w')
+    summaryfile.write("%-40s %10s %10s %10s  %s\n" % \
+        ("profile", "cumtime", "tottime", "calls", "function"))
+
+    for filename in profilenames:
+      stats = pstats.Stats(os.path.join(self.profile_dir, filename))
+      functions = stats.stats.items()
+      # Sort by cumulative time, the fourth of (primitive calls, calls,
+      # total time, cumulative time, callers).
+      functions.sort(key=lambda item: item[1][3], reverse=True)
+
+      for (path, line, name), (primitivecalls, calls, totaltime, cumtime,
+          callers) in functions[:SUMMARY_FUNCTION_COUNT]:
+        summaryfile.write("%-40s %10.4f %10.4f %10d  %s:%d(%s)\n" % \
+            (filename[:-len(".pstats")], cumtime, totaltime, calls,
+             os.path.basename(path), line, name))
+
+    summaryfile.close()
+    return summarypath
+
+
+
+def get_profiler(profile_dir=None):
+  """
+  <Purpose>
+    Get the profiler for an install.
+
+  <Arguments>
+    profile_dir:
+      The directory to write profiles to, or None to use the value of the
+      PROFILE_DIR_ENV_VAR environment variable. If neither is set,
+      profiling is off.
+
+  <Exceptions>
+    OSError if the profile directory cannot be created.
+
+  <Side Effects>
+    Creates the profile directory.
+
+  <Returns>
+    A Profiler, which does nothing when profiling is off (including when
+    cProfile is not available).
+  """
+  if profile_dir is None:
+    profile_dir = os.environ.get(PROFILE_DIR_ENV_VAR) or None
+
+  if cProfile is None:
+    profile_dir = None
+
+  return Profiler(profile_dir)
@@ -0,0 +1,321 @@
+"""
+<Program Name>
+  benchmark_refinement.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  The second phase of a two-phase install (see benchmark_resources.main).
+  The first phase writes the vessels' resource files from a quick
+  provisional benchmark, so the node can start right away, and then starts
+  this module in a background process. It runs the full benchmark and
+  rewrites the resource files with the results, each in a single step (see
+  create_installer_state.write_resource_files). The node manager uses the
+  new resources the next time it reads them.
+
+  The first phase leaves what the refinement needs in REFINEMENT_FILENAME
+  in the install directory: the vessels, the donated percentage, the
+  options of the benchmark, the offcut of a vessel and the contents of
+  every resource file as it was written. If any resource file has changed
+  by the time the refinement is done (the node manager split a vessel,
+  say), the new results no longer fit the vessels and none of the files are
+  rewritten.
+
+  Nobody is around to ask what to do about failed benchmarks, so unless a
+  failure policy is configured (see benchmark_policy) failed benchmarks use
+  their defaults. If the policy stops the benchmark, the provisional
+  resource files are kept and the refinement can be run again by hand:
+
+    python benchmark_refinement.py <install directory>
+
+  The refinement logs to REFINEMENT_LOG_FILENAME in the install directory.
+"""
+
+import os
+import subprocess
+import sys
+import traceback
+
+import persist
+
+import benchmark_policy
+import benchmark_profiling
+import benchmark_resources
+import benchmark_service
+import benchmark_telemetry
+import create_installer_state
+
+
+# The name of the file in the install directory that holds what the
+# refinement needs, see the module's purpose.
+REFINEMENT_FILENAME = "benchmark_refinement"
+
+# The name of the refinement's log file in the install directory.
+REFINEMENT_LOG_FILENAME = "benchmark_refinement.log"
+
+# The policy used if none is configured, see the module's purpose.
+DEFAULT_REFINEMENT_POLICY = "default continue"
+
+# Lets the refinement outlive the console of the installer on Windows.
+DETACHED_PROCESS = 0x00000008
+
+
+
+def _get_resource_files(installdir, vesselcreationlist):
+  """
+  <Purpose>
+    Read the resource file of every vessel.
+
+  <Arguments>
+    installdir:
+      The directory seattle is installed in.
+
+    vesselcreationlist:
+      The list of vessels, see create_installer_state.main.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A dictionary mapping the name of each resource file to its contents, or
+    None if it cannot be read.
+  """
+  resourcefiles = {}
+  for vesselnumber in range(1, len(vesselcreationlist) + 1):
+    resourcefilename = os.path.join(installdir,
+                                    "resource.v" + str(vesselnumber))
+    try:
+      resourcefileobj = open(resourcefilename)
+      resourcefiles[resourcefilename] = resourcefileobj.read()
+      resourcefileobj.close()
+    except IOError:
+      resourcefiles[resourcefilename] = None
+
+  return resourcefiles
+
+
+
+def start_refinement(installdir, vesselcreationlist, resource_percent,
+                     conservative_percentile, no_degraded_raises, low_impact,
+                     offcut_dict, numa_local, logfileobj):
+  """
+  <Purpose>
+    Start the refinement of a provisional install in a background process.
+    It is called once the resource files have been written.
+
+  <Arguments>
+    installdir:
+      The directory seattle is being installed in.
+
+    vesselcreationlist:
+      The list of vessels, see create_installer_state.main.
+
+    resource_percent:
+      The percent of the system resources that is donated.
+
+    conservative_percentile, no_degraded_raises, low_impact:
+      The options of the provisional benchmark, see
+      benchmark_resources.run_benchmark. The refinement uses them too.
+
+    offcut_dict:
+      The offcut of a vessel the install used, or None for the default, see
+      benchmark_resources.get_tenpercent_dict. The refinement uses it too.
+
+    numa_local:
+      True if the install kept every vessel on a single NUMA node, see
+      benchmark_resources.apply_numa_placement. The refinement does too.
+
+    logfileobj:
+      The open file object used for logging.
+
+  <Exceptions>
+    None, the provisional install works without the refinement.
+
+  <Side Effects>
+    Writes REFINEMENT_FILENAME and starts a process.
+
+  <Returns>
+    True if the refinement was started, False otherwise.
+  """
+  state = {"vesselcreationlist": vesselcreationlist,
+           "resource_percent": resource_percent,
+           "conservative_percentile": conservative_percentile,
+           "no_degraded_raises": no_degraded_raises,
+           "low_impact": low_impact,
+           "offcut_dict": offcut_dict,
+           "numa_local": numa_local,
+           "resourcefiles": _get_resource_files(installdir,
+                                                vesselcreationlist)}
+
+  arguments = [sys.executable,
+               os.path.splitext(os.path.abspath(__file__))[0] + ".py",
+               installdir]
+
+  try:
+    persist.commit_object(state, os.path.join(installdir,
+                                              REFINEMENT_FILENAME))
+
+    devnull = open(os.devnull, "r+")
+    if os.name == "nt":
+      subprocess.Popen(arguments, cwd=installdir, stdin=devnull,
+                       stdout=devnull, stderr=devnull,
+                       creationflags=DETACHED_PROCESS)
+    else:
+      # A session of its own keeps it running when the installer's terminal
+      # goes away.
+      subprocess.Popen(arguments, cwd=installdir, stdin=devnull,
+                       stdout=devnull, stderr=devnull, close_fds=True,
+                       preexec_fn=os.setsid)
+    devnull.close()
+  except Exception, e:
+    logfileobj.write("Unable to start the benchmark refinement, keeping " + \
+                     "the provisional resources: " + str(e) + "\n")
+    return False
+
+  logfileobj.write("Started the benchmark refinement, see " + \
+                   os.path.join(installdir, REFINEMENT_LOG_FILENAME) + "\n")
+  return True
+
+
+
+def refine(installdir, logfileobj):
+  """
+  <Purpose>
+    Run the full benchmark and rewrite the resource files of a provisional
+    install, see the module's purpose.
+
+  <Arguments>
+    installdir:
+      The directory seattle is installed in. It must be the current
+      directory, as run_benchmark and create_installer_state use it.
+
+    logfileobj:
+      The open file object used for logging.
+
+  <Exceptions>
+    IOError or OSError if REFINEMENT_FILENAME cannot be read.
+    The exceptions of benchmark_resources.get_tenpercent_dict and
+    create_installer_state.write_resource_files.
+
+  <Side Effects>
+    Runs the benchmark (see benchmark_resources.run_benchmark), rewrites
+    the resource files and the results file of the benchmark service (see
+    benchmark_service) and removes REFINEMENT_FILENAME.
+
+  <Returns>
+    True if the resource files were rewritten, False otherwise.
+  """
+  statepath = os.path.join(installdir, REFINEMENT_FILENAME)
+  state = persist.restore_object(statepath)
+  vesselcreationlist = state["vesselcreationlist"]
+
+  if _get_resource_files(installdir, vesselcreationlist) != \
+      state["resourcefiles"]:
+    logfileobj.write("The resource files have changed since the install, " + \
+                     "not refining them.\n")
+    os.remove(statepath)
+    return False
+
+  try:
+    policy = benchmark_policy.load_policy(installdir)
+  except benchmark_policy.PolicyError, e:
+    logfileobj.write("Invalid benchmark failure policy, keeping the " + \
+                     "provisional resources: " + str(e) + "\n")
+    return False
+  if policy is None:
+    policy = benchmark_policy.FailurePolicy(DEFAULT_REFINEMENT_POLICY,
+                                            "the benchmark refinement")
+
+  telemetry = benchmark_telemetry.open_telemetry(installdir)
+  try:
+    # The provisional estimates were never cached, so the probes that
+    # produced them run in full, while what the provisional benchmark
+    # measured completely is reused.
+    max_resources_dict = benchmark_resources.run_benchmark(logfileobj,
+        telemetry=telemetry, policy=policy,
+        conservative_percentile=state["conservative_percentile"],
+        no_degraded_raises=state["no_degraded_raises"],
+        low_impact=state["low_impact"])
+  except benchmark_resources.BenchmarkingFailureError:
+    telemetry.close()
+    logfileobj.write("Keeping the provisional resources.\n")
+    return False
+
+  tenpercentdict = benchmark_resources.get_tenpercent_dict(
+      max_resources_dict, state["resource_percent"], len(vesselcreationlist),
+      logfileobj, telemetry, benchmark_profiling.Profiler(None),
+      state.get("offcut_dict"))
+  placement = None
+  if state.get("numa_local"):
+    placement = benchmark_resources.apply_numa_placement(tenpercentdict,
+        vesselcreationlist, logfileobj, telemetry)
+  telemetry.close()
+
+  # Check again, the benchmark took a while.
+  if _get_resource_files(installdir, vesselcreationlist) != \
+      state["resourcefiles"]:
+    logfileobj.write("The resource files changed during the refinement, " + \
+                     "not refining them.\n")
+    os.remove(statepath)
+    return False
+
+  create_installer_state.write_resource_files(vesselcreationlist,
+                                              tenpercentdict, installdir)
+  os.remove(statepath)
+
+  try:
+    vesselresources = create_installer_state.get_vessel_resources(
+        vesselcreationlist, tenpercentdict)
+    if placement is not None:
+      for vesselnumber in range(len(vesselresources)):
+        vesselresources[vesselnumber]["numa_node"] = placement[vesselnumber]
+    benchmark_service.write_results(installdir, max_resources_dict,
+        benchmark_resources.get_donated_from_maxresources(max_resources_dict,
+            state["resource_percent"]).to_dict(),
+        vesselresources)
+  except Exception, e:
+    logfileobj.write("Unable to write the benchmark results: " + str(e) + \
+                     "\n")
+  logfileobj.write("Resource files refined.\n")
+  return True
+
+
+
+def main(installdir):
+  """
+  <Purpose>
+    Run the refinement of an install, logging to REFINEMENT_LOG_FILENAME.
+
+  <Arguments>
+    installdir:
+      The directory seattle is installed in.
+
+  <Exceptions>
+    None, everything is logged.
+
+  <Side Effects>
+    Changes the current directory to installdir, see refine.
+
+  <Returns>
+    None
+  """
+  os.chdir(installdir)
+  logfileobj = open(os.path.join(installdir, REFINEMENT_LOG_FILENAME), "a")
+  try:
+    try:
+      refine(installdir, logfileobj)
+    except Exception, e:
+      logfileobj.write("Benchmark refinement failed, keeping the " + \
+                       "provisional resources: " + str(e) + "\n" + \
+                       traceback.format_exc())
+  finally:
+    logfileobj.close()
+
+
+
+if __name__ == "__main__":
+  if len(sys.argv) != 2:
+    print "Usage: python benchmark_refinement.py <install directory>"
+    sys.exit(1)
+  main(os.path.abspath(sys.argv[1]))
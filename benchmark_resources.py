@@ -43,48 +43,61 @@
 
 import nonportable
 import create_installer_state
-import nmresourcemath
+import benchmark_cache
+import benchmark_checkpoint
+import benchmark_coordination
+import benchmark_history
+import benchmark_lowimpact
+import benchmark_measurement
+import benchmark_policy
+import benchmark_profiling
+import benchmark_refinement
+import benchmark_service
+import benchmark_telemetry
+import idle_sampler
+import offcut_calibration
+import numa_placement
+import probe_registry
+import resource_vector
+import vessel_feasibility
+import os
 import sys
+import time
 import traceback
 import platform # for detecting Nokia tablets
 
 
-# These are the default maximum values that we assume a computer to have
-# These values will be used in the event the OS specific script is unable
-# to determine a maximum for the value.
-# These were the lower numbers returned from developer testing.
-DEFAULT_MAX_RESOURCE_DICT = {"cpu":1,
-                             "memory":510000000, # allmost 512MB
-                             "diskused":3700000000, # 3.44589 GB
-                             "events":500, # see module's doc string.
-                             "filesopened":250,
-                             "insockets":250,
-                             "outsockets":250,
-                             "random":200000,
-                             "filewrite":1200000,
-                             "fileread":1200000,
-                             "netrecv":500000,
-                             "netsend":500000,
-                             "lograte":1500000,
-                             "loopsend":50000000,
-                             "looprecv":50000000}
-
-# Default resources that define the cost of splitting a vessel
-DEFAULT_OFFCUT_DICT =  {'cpu':.002,
-                        'memory': 1000000,   # 1 MiB
-                        'diskused': 100000, # .1 MiB
-                        'events':2,
-                        'filewrite':1000,
-                        'fileread':1000,
-                        'filesopened':1, 
-                        'insockets':0,
-                        'outsockets':0,
-                        'netsend':0,
-                        'netrecv':0,
-                        'loopsend':0,  # would change with prompt functionality (?)
-                        'looprecv':0,
-                        'lograte':100, # the monitor might log something
-                        'random':0 }
+# The default maximum values that we assume a computer to have, see
+# resource_vector.
+DEFAULT_MAX_RESOURCE_DICT = resource_vector.DEFAULT_MAX_RESOURCE_DICT
+
+# If set, the default time budget (in seconds) for all the benchmark probes
+# together, see probe_registry.
+TIME_BUDGET_ENV_VAR = "SEATTLE_BENCHMARK_TIME_BUDGET"
+
+# If set, the default percentile for conservative donations, see
+# apply_conservative_percentile.
+CONSERVATIVE_PERCENTILE_ENV_VAR = "SEATTLE_BENCHMARK_CONSERVATIVE_PERCENTILE"
+
+# If set to anything but an empty string or 0, degraded measurements may
+# not raise a resource above its history, see check_history.
+NO_DEGRADED_RAISES_ENV_VAR = "SEATTLE_BENCHMARK_NO_DEGRADED_RAISES"
+
+# If set to anything but an empty string or 0, installs are two-phase: a
+# provisional benchmark followed by a background refinement, see main.
+PROVISIONAL_ENV_VAR = "SEATTLE_BENCHMARK_PROVISIONAL"
+
+# The time budget (in seconds) of a provisional benchmark. It is enough for
+# the static probes, and the timing probes return early estimates.
+PROVISIONAL_TIME_BUDGET = 5
+
+# The early estimates of a provisional benchmark are lowered to this
+# fraction, as they are based on very few samples.
+PROVISIONAL_SCALE = 0.5
+
+# Default resources that define the cost of splitting a vessel, kept in
+# resource_vector so that it can be used without the installer.
+DEFAULT_OFFCUT_DICT = resource_vector.DEFAULT_OFFCUT_DICT
 
 
 # Reduce the default max resources for ARM devices such as Android 
@@ -99,12 +112,11 @@ if platform.machine().startswith('armv'):
     })
 
 
-# Current this is only raised when nmresourcemath raises a ResourceParseError.
-# I suppose we could let the nmresourcemath exception propagate instead
-# of catching it and raising out own, but I was hoping this would provide 
-# more useful information and possibly be more useful if at some point
-# this module takes over some of the functionality of nmresourcemath, or
-# performs more checking on initial resources.
+# Currently this is only raised when the offcut costs leave a negative
+# amount of some resource. This module now does the resource arithmetic
+# itself (see resource_vector) instead of relying on nmresourcemath to
+# raise a ResourceParseError, but the error is still reported the same way
+# and could be used if we perform more checking on initial resources.
 class InsufficientResourceError(Exception):
   """Error to indicate that vessels cannot be created with given resources."""
   pass
@@ -181,107 +193,546 @@ def prompt_user(promptstring):
     userinput = raw_input("Please enter either yes or no: ")
 
 
-def run_benchmark(logfileobj):
+def is_failed_value(value):
   """
   <Purpose>
-    To run the individual OS specific scripts and supplement their results
-    (if they do not returned a benchmark for every resource) with default
-    values if needed.
-    
-    This method has some cut and paste, but it seemed to be the simplest
-    way to handle the OS specific imports and logging.
-    
-    WARNING the dictionary returned still treats cpu as an integer representing
-    the number of processors (not a float like it will be later in the process).
-       
+    Check whether a value returned by a probe is a failure, either a string
+    describing one or a value that cannot possibly be right.
+
+  <Arguments>
+    value: The value returned by the probe.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    None
+
+  <Return>
+    True if the value is a failure. None (a resource that is not measured)
+    is not.
+  """
+  if value is None:
+    return False
+  if isinstance(value, basestring):
+    return True
+  # The cpu may be a fraction of a core, so nothing is truncated. NaN is
+  # not positive either.
+  try:
+    return not float(value) > 0
+  except (TypeError, ValueError):
+    return True
+
+
+def retry_failed_probes(policy, OS, measurement_dict, cached_resource_dict,
+                        logfileobj, telemetry, low_impact=False,
+                        profile_dir=None):
+  """
+  <Purpose>
+    Run the probes of failed resources again, as often as the failure
+    policy says.
+
+  <Arguments>
+    policy: The benchmark_policy.FailurePolicy to follow.
+
+    OS: The operating system, as given by nonportable.ostype.
+
+    measurement_dict: The dictionary of Measurements returned by
+        probe_registry.measure. Failed Measurements are replaced by the
+        result of the last retry.
+
+    cached_resource_dict: The cached values, so that probes the failed
+        probes depend on are not run again.
+
+    logfileobj: The open file object used for logging.
+
+    telemetry: The benchmark_telemetry.TelemetryWriter for the install.
+
+    low_impact: True to run the probes in low-impact mode.
+
+    profile_dir: If given, the retried probes are profiled into this
+        directory, see benchmark_profiling.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    Runs probes and sleeps between the attempts. Logs every decision.
+    Writes the profiles of the retried probes if profile_dir is given.
+
+  <Return>
+    None
+  """
+  for resource in DEFAULT_MAX_RESOURCE_DICT:
+    if resource not in measurement_dict:
+      continue
+
+    delays = policy.get_retry_delays(resource)
+    for attempt, delay in enumerate(delays):
+      if not is_failed_value(measurement_dict[resource].value):
+        break
+
+      logfileobj.write("Failure policy: benchmark for " + resource + \
+                       " failed (" + str(measurement_dict[resource].value) + \
+                       "), retrying (attempt " + str(attempt + 1) + " of " + \
+                       str(len(delays)) + ") in " + str(delay) + \
+                       " seconds.\n")
+      telemetry.write_record("policy", {"resource": resource,
+                                        "decision": benchmark_policy.RETRY,
+                                        "attempt": attempt + 1,
+                                        "delay": delay})
+      time.sleep(delay)
+
+      retried_dict = probe_registry.measure(OS, [resource],
+          cached_resource_dict, profile_dir=profile_dir,
+          low_impact=low_impact)
+      if resource in retried_dict:
+        measurement_dict[resource] = retried_dict[resource]
+
+    if delays and not is_failed_value(measurement_dict[resource].value):
+      logfileobj.write("Failure policy: benchmark for " + resource + \
+                       " succeeded after retrying.\n")
+
+
+def follow_failure_policy(policy, failed_resources, logfileobj, telemetry):
+  """
+  <Purpose>
+    Decide, without asking the user, whether to continue the installation
+    after benchmarks failed.
+
+  <Arguments>
+    policy: The benchmark_policy.FailurePolicy to follow.
+
+    failed_resources: A list of the resources whose benchmarks failed. If
+        it is empty, benchmarking failed as a whole and the policy's
+        default rule decides.
+
+    logfileobj: The open file object used for logging.
+
+    telemetry: The benchmark_telemetry.TelemetryWriter for the install.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    Logs every decision.
+
+  <Return>
+    True to continue the installation with default values, False to abort
+    it.
+  """
+  continue_install = True
+  for resource in failed_resources or ["default"]:
+    if policy.should_abort(resource):
+      decision = benchmark_policy.ABORT
+      continue_install = False
+    else:
+      decision = benchmark_policy.CONTINUE
+    logfileobj.write("Failure policy (" + policy.source + "): " + decision + \
+                     " after the failed benchmark for " + resource + ".\n")
+    telemetry.write_record("policy", {"resource": resource,
+                                      "decision": decision})
+
+  return continue_install
+
+
+def store_in_cache(cache, fingerprint, max_resource_dict, cached_resource_dict,
+                   logfileobj):
+  """
+  <Purpose>
+    To add the newly measured resources to the benchmark cache. Values that
+    came from the cache are not stored again, so that reusing a measurement
+    does not extend its lifetime.
+
+    This function exists to keep run_benchmark a bit cleaner.
+
   <Arguments>
+    cache: The benchmark_cache.BenchmarkCache to store the results in.
+
+    fingerprint: The hardware fingerprint of this host.
+
+    max_resource_dict: The dictionary returned by probe_registry.measure.
+
+    cached_resource_dict: The dictionary of cached values that was given to
+        probe_registry.measure.
+
     logfileobj: The open file object that will be used for logging
-        the benchmark process and the creation of the installer state.
-    
+        failures to write the cache.
+
   <Exceptions>
-    BenchmarkingFailureError: Indicates that one or more benchmark failed and
-      the user opted to terminate installation.
-    
+    None, failing to write the cache does not affect the installation.
+
   <Side Effects>
-    May use the drive to measure read/write, network resources to measure
-    bandwidth, and request OS sources of crypto-graphically strong 
-    pseudo-random numbers.
-    Will use servicelogger to log benchmark failures to 'installInfo'.
-  
+    Writes the benchmark cache file.
+
   <Return>
-    A dictionary with measurement value for all the resources in the dict.
-     
+    None
+
   """
-  OS = nonportable.ostype
-  
-  max_resource_dict = None
-  benchmarking_failed = False
+  measured_resource_dict = {}
+  for resource in max_resource_dict:
+    if resource not in cached_resource_dict:
+      measured_resource_dict[resource] = max_resource_dict[resource]
 
-  # The imports are all done based on OS because the scripts cannot be
-  # imported into a different OS. I can not import the Windows script on
-  # Linux because I lack required libraries etc..
-  # If any of them crash we want to log it and continue with default values.
-  if OS == "Windows":
-    try:
-      import Win_WinCE_resources
-      max_resource_dict = Win_WinCE_resources.measure_resources() 
-    except Exception:
-      log_failure("Failed to benchmark Windows OS.", logfileobj)
-      exceptionType, exceptionValue, exceptionTraceback = sys.exc_info()
-      traceback.print_exception(exceptionType, exceptionValue, \
-                                exceptionTraceback, file=logfileobj)
-      max_resource_dict = DEFAULT_MAX_RESOURCE_DICT.copy()
-      benchmarking_failed = True
+  try:
+    cache.store(fingerprint, measured_resource_dict)
+  except Exception, e:
+    logfileobj.write("Unable to update the benchmark cache: " + str(e) + "\n")
 
-  elif OS == "Linux":
-    try:
-      import Linux_resources
-      max_resource_dict = Linux_resources.measure_resources()
-      try:
-        import android
-        is_android = True
-        import os
-        # Use environmental variables to pass data from Java->Python on Android
-        cores = long(os.environ.get('SEATTLE_AVAILABLE_CORES', 0))
-        if cores > 0:
-          max_resource_dict["cpu"] = cores
-        diskused = long(os.environ.get('SEATTLE_AVAILABLE_SPACE', 0))
-        if diskused > 0:
-          max_resource_dict["diskused"] = diskused
-      except ImportError:
-        is_android = False
-    except Exception:
-      log_failure("Failed to benchmark Linux OS.", logfileobj)
-      exceptionType, exceptionValue, exceptionTraceback = sys.exc_info()
-      traceback.print_exception(exceptionType, exceptionValue, \
-                                exceptionTraceback, file=logfileobj)
-      max_resource_dict = DEFAULT_MAX_RESOURCE_DICT.copy()
-      benchmarking_failed = True
-      
-  elif OS == "Darwin":
-    try:
-      import Mac_BSD_resources
-      max_resource_dict = Mac_BSD_resources.measure_resources()
-    except Exception:
-      log_failure("Failed to benchmark Darwin OS.", logfileobj)
-      exceptionType, exceptionValue, exceptionTraceback = sys.exc_info()
-      traceback.print_exception(exceptionType, exceptionValue, \
-                                exceptionTraceback, file=logfileobj)
-      max_resource_dict = DEFAULT_MAX_RESOURCE_DICT.copy()
-      benchmarking_failed = True
-  else:
-    raise nonportable.UnsupportedSystemException("The operating system '" \
-              + OS + "' is not supported.")
-    
-  # We are going to log the benchmarked system resources, this will be
-  # very useful in the event a user chooses to share the data with us.
-  if not benchmarking_failed:
-    logfileobj.write("Total resources measured by the script for " + OS + \
-                   " OS: " + str(max_resource_dict) + "\n")    
-    
+
+def checkpoint_results(checkpoint, measurement_dict, logfileobj):
+  """
+  <Purpose>
+    To record the results of a probe in the benchmark checkpoint as soon as
+    the probe finishes.
+
+    This function exists to keep run_benchmark a bit cleaner.
+
+  <Arguments>
+    checkpoint: The benchmark_checkpoint.BenchmarkCheckpoint of this install.
+
+    measurement_dict: The dictionary of Measurements of the probe.
+
+    logfileobj: The open file object that will be used for logging
+        failures to write the checkpoint.
+
+  <Exceptions>
+    None, failing to write the checkpoint does not affect the installation.
+
+  <Side Effects>
+    Writes the checkpoint file.
+
+  <Return>
+    None
+
+  """
+  try:
+    checkpoint.record(measurement_dict)
+  except Exception, e:
+    logfileobj.write("Unable to update the benchmark checkpoint: " + \
+                     str(e) + "\n")
+
+
+def check_history(history, hostidentity, max_resource_dict, measurement_dict,
+                  no_degraded_raises, logfileobj, telemetry):
+  """
+  <Purpose>
+    To compare the measured resources with the earlier results of this host
+    (see benchmark_history), flag significant regressions, and add the new
+    results to the history.
+
+  <Arguments>
+    history: The benchmark_history.BenchmarkHistory to use.
+
+    hostidentity: The identity of this host, see
+        benchmark_cache.get_host_identity.
+
+    max_resource_dict: The checked dictionary of resources. It is modified
+        if no_degraded_raises is True.
+
+    measurement_dict: The Measurements of the resources that were measured
+        (not the ones that fell back to defaults).
+
+    no_degraded_raises: If True, a degraded measurement (see run_benchmark)
+        that is above the median of the resource's history is lowered to
+        that median, so an unreliable estimate never raises a donation.
+
+    logfileobj: The open file object used for logging.
+
+    telemetry: The benchmark_telemetry.TelemetryWriter for the install.
+
+  <Exceptions>
+    None, failing to write the history does not affect the installation.
+
+  <Side Effects>
+    Writes the history file. May modify max_resource_dict.
+
+  <Return>
+    A list of the resources with a regression.
+
+  """
+  regressions = []
+  newresults = {}
+
+  for resource in DEFAULT_MAX_RESOURCE_DICT:
+    # Cached values have been compared (and recorded) before.
+    if resource not in measurement_dict or measurement_dict[resource].cached:
+      continue
+
+    measurement = measurement_dict[resource]
+    value = max_resource_dict[resource]
+    pastvalues = history.get_history(hostidentity, resource)
+
+    regression = benchmark_history.find_regression(pastvalues, value,
+                                                   measurement.get_interval())
+    if regression is not None:
+      regressions.append(resource)
+      log_failure("Benchmark regression for " + resource + ": " + \
+                  str(value) + " is " + \
+                  str(int(100 * regression["drop"])) + "% below the " + \
+                  "median " + str(regression["median"]) + " of the last " + \
+                  str(regression["runs"]) + " runs on this host.", logfileobj)
+      regression.update({"resource": resource, "value": value})
+      telemetry.write_record("regression", regression)
+
+    if measurement.degraded:
+      # Estimates are not good enough to be compared with later runs.
+      if no_degraded_raises and pastvalues:
+        median = benchmark_history.get_median(pastvalues)
+        if value > median:
+          max_resource_dict[resource] = int(median)
+          logfileobj.write("Not raising " + resource + " from a degraded " + \
+                           "measurement, using " + str(int(median)) + \
+                           " from its history instead of " + str(value) + \
+                           ".\n")
+    else:
+      newresults[resource] = value
+
+  try:
+    history.record(hostidentity, newresults)
+  except Exception, e:
+    logfileobj.write("Unable to update the benchmark history: " + str(e) + \
+                     "\n")
+
+  return regressions
+
+
+def apply_conservative_percentile(max_resource_dict, measurement_dict,
+                                  percentile, logfileobj, telemetry):
+  """
+  <Purpose>
+    To lower the measured resources to a lower percentile of their
+    measurements (see benchmark_measurement), so that a noisy measurement
+    does not lead to donating more than the machine can usually deliver.
+    Only resources whose probe took enough samples are changed, and a
+    resource is never raised above its point estimate.
+
+  <Arguments>
+    max_resource_dict: The checked dictionary of resources. It is modified.
+
+    measurement_dict: The Measurements the values came from.
+
+    percentile: The percentile to use, from 0 to 100 (50 is the median of
+        the samples, anything below it is more conservative).
+
+    logfileobj: The open file object used for logging how much margin
+        was removed from every resource.
+
+    telemetry: The benchmark_telemetry.TelemetryWriter for the install.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    Modifies max_resource_dict.
+
+  <Return>
+    None
+
+  """
+  for resource in DEFAULT_MAX_RESOURCE_DICT:
+    if resource not in measurement_dict:
+      continue
+
+    conservativevalue = \
+        measurement_dict[resource].get_percentile_value(percentile)
+    if conservativevalue is None:
+      continue
+
+    pointvalue = max_resource_dict[resource]
+    conservativevalue = max(min(int(conservativevalue), pointvalue), 1)
+    max_resource_dict[resource] = conservativevalue
+
+    margin = pointvalue - conservativevalue
+    logfileobj.write("Conservative donation: using percentile " + \
+                     str(percentile) + " for " + resource + ", " + \
+                     str(conservativevalue) + " instead of " + \
+                     str(pointvalue) + " (margin removed: " + str(margin) + \
+                     ", " + str(round(100.0 * margin / pointvalue, 1)) + \
+                     "%).\n")
+    telemetry.write_record("conservative", {"resource": resource,
+                                            "percentile": percentile,
+                                            "point_value": pointvalue,
+                                            "value": conservativevalue,
+                                            "margin": margin})
+
+
+def apply_provisional_scaling(max_resource_dict, measurement_dict, logfileobj,
+                              telemetry):
+  """
+  <Purpose>
+    To lower the degraded estimates of a provisional benchmark (see
+    run_benchmark) to PROVISIONAL_SCALE of their value. They are only used
+    until the background refinement has measured the resources properly,
+    and should not donate more than the machine has in the meantime.
+
+  <Arguments>
+    max_resource_dict: The checked dictionary of resources. It is modified.
+
+    measurement_dict: The Measurements the values came from.
+
+    logfileobj: The open file object used for logging.
+
+    telemetry: The benchmark_telemetry.TelemetryWriter for the install.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    Modifies max_resource_dict.
+
+  <Return>
+    None
+
+  """
+  for resource in DEFAULT_MAX_RESOURCE_DICT:
+    if resource not in measurement_dict or \
+        not measurement_dict[resource].degraded:
+      continue
+
+    estimate = max_resource_dict[resource]
+    provisionalvalue = max(int(estimate * PROVISIONAL_SCALE), 1)
+    max_resource_dict[resource] = provisionalvalue
+    logfileobj.write("Provisional benchmark: using " + \
+                     str(provisionalvalue) + " for " + resource + \
+                     " instead of its estimate " + str(estimate) + ".\n")
+    telemetry.write_record("provisional", {"resource": resource,
+                                           "estimate": estimate,
+                                           "value": provisionalvalue})
+
+
+def _get_cores_per_processor(logfileobj):
+  """
+  <Purpose>
+    To get the number of physical cores per logical processor of the host,
+    which converts the idle processors counted by idle_sampler to the cores
+    counted by the cpu probe.
+
+  <Arguments>
+    logfileobj: The open file object used for logging.
+
+  <Exceptions>
+    None
+
+  <Return>
+    The number of cores per processor, or 1.0 if the processor topology
+    cannot be read.
+  """
+  if platform.system() != "Linux":
+    return 1.0
+
+  # Linux_resources only imports on Linux.
+  import Linux_resources
+  try:
+    topology = Linux_resources.get_cpu_topology()
+  except Exception, e:
+    logfileobj.write("Unable to read the processor topology, counting " + \
+                     "every idle processor as a core: " + str(e) + "\n")
+    return 1.0
+  return topology["cores"] / float(topology["threads"])
+
+
+def apply_idle_capacity(max_resource_dict, idle_summary, logfileobj,
+                        telemetry):
+  """
+  <Purpose>
+    To lower the resources to what the host actually leaves idle (see
+    idle_sampler), so that the donation is a share of its spare capacity
+    rather than of its totals: the cpu to the cores idle 95% of the time
+    (the sampler counts logical processors, which are converted to cores
+    like the cpu probe counts), the memory to the memory available 95% of
+    the time, and the disk rates to the part of them left when the disk is
+    as busy as it is 95% of the time. A resource is never raised.
+
+  <Arguments>
+    max_resource_dict: The checked dictionary of resources. It is modified.
+
+    idle_summary: The summary of the host's idle capacity, as returned by
+        idle_sampler.sample_idle_capacity.
+
+    logfileobj: The open file object used for logging.
+
+    telemetry: The benchmark_telemetry.TelemetryWriter for the install.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    Modifies max_resource_dict.
+
+  <Return>
+    None
+
+  """
+  spare_dict = {}
+  idleprocessors = idle_summary["cpu_idle"]["p95"]
+  if idleprocessors is not None:
+    spare_dict["cpu"] = idleprocessors * _get_cores_per_processor(logfileobj)
+    logfileobj.write("Idle capacity: " + str(idleprocessors) + \
+                     " logical processors are " + str(spare_dict["cpu"]) + \
+                     " cores.\n")
+  if idle_summary["memory_available"]["p95"] is not None:
+    spare_dict["memory"] = long(idle_summary["memory_available"]["p95"])
+  diskbusy = idle_summary["disk_busy"]["p95"]
+  if diskbusy is not None:
+    for resource in ["filewrite", "fileread"]:
+      if isinstance(max_resource_dict[resource], (int, long, float)):
+        spare_dict[resource] = int(max_resource_dict[resource] * \
+                                   (1 - diskbusy))
+
+  for resource in spare_dict:
+    totalvalue = max_resource_dict[resource]
+    if not isinstance(totalvalue, (int, long, float)) or \
+        spare_dict[resource] >= totalvalue:
+      continue
+
+    # The cpu may be a fraction of a processor, but the rest are counts.
+    if resource == "cpu":
+      max_resource_dict[resource] = spare_dict[resource]
+    else:
+      max_resource_dict[resource] = max(spare_dict[resource], 1)
+    logfileobj.write("Idle capacity: using " + \
+                     str(max_resource_dict[resource]) + " for " + resource + \
+                     " instead of the total " + str(totalvalue) + ".\n")
+    telemetry.write_record("idle", {"resource": resource,
+                                    "total": totalvalue,
+                                    "value": max_resource_dict[resource],
+                                    "summary": idle_summary})
+
+
+def check_max_resources(max_resource_dict, logfileobj):
+  """
+  <Purpose>
+    To check the benchmarked resources, replacing every value that is
+    missing, None, a failure or not a positive number with its default.
+
+  <Arguments>
+    max_resource_dict: The dictionary of benchmarked resources. It is
+        modified.
+
+    logfileobj: The open file object used for logging.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    Modifies max_resource_dict, the cpu becomes a float and the rest ints.
+    Logs every failure.
+
+  <Return>
+    A tuple (fallback resources, failed). The first is a dictionary mapping
+    every resource that fell back to its default to the reason, or to None
+    for a resource that is not measured. failed is True if any benchmark
+    failed.
+
+  """
   # The dictionary returned by the scripts will contain null values for
   # resources that they were not benchmarked. If a benchmark failed, the
   # dictionary will contain a string describing the failure that occurred.
+  # The resources that fall back to their defaults are remembered, together
+  # with the reason, for the telemetry records.
+  fallback_resources = {}
+  benchmarking_failed = False
   for resource in DEFAULT_MAX_RESOURCE_DICT:
     
     # Make sure the benchmarking script actually returned something for the
@@ -290,11 +741,13 @@ def run_benchmark(logfileobj):
     if resource not in max_resource_dict:
       log_failure("Benchmark script did not return value for " + resource, \
                          logfileobj)
+      fallback_resources[resource] = "no value returned"
       max_resource_dict[resource] = DEFAULT_MAX_RESOURCE_DICT[resource]
       benchmarking_failed = True
 
     # For all the null values, we want to set a default.
     elif max_resource_dict[resource] is None:
+      fallback_resources[resource] = None
       max_resource_dict[resource] = DEFAULT_MAX_RESOURCE_DICT[resource]
 
     # If the value is a string, then the benchmark failed, so we want to
@@ -302,6 +755,7 @@ def run_benchmark(logfileobj):
     elif isinstance(max_resource_dict[resource], basestring):
       log_failure("Benchmark failed for " + resource + " resource: " +
                     max_resource_dict[resource], logfileobj)
+      fallback_resources[resource] = max_resource_dict[resource]
       max_resource_dict[resource] = DEFAULT_MAX_RESOURCE_DICT[resource]
       benchmarking_failed = True
 
@@ -310,23 +764,391 @@ def run_benchmark(logfileobj):
       # modified in the future, it will get caught here if the scripts
       # are not catching bad values (since they all reach out to other 
       # OS specific files and programs).
+      # The cpu may be a fraction of a core (a cgroup quota of half a core,
+      # say), the rest are counts.
       try:
-        max_resource_dict[resource] = int(max_resource_dict[resource])
-      except ValueError, e:
+        if resource == "cpu":
+          max_resource_dict[resource] = float(max_resource_dict[resource])
+        else:
+          max_resource_dict[resource] = int(max_resource_dict[resource])
+      except (TypeError, ValueError), e:
         log_failure("Benchmark script had bad value for " + resource \
                            + ": " + str(max_resource_dict[resource]), logfileobj)
+        fallback_resources[resource] = "bad value " + \
+            str(max_resource_dict[resource])
         max_resource_dict[resource] = DEFAULT_MAX_RESOURCE_DICT[resource]
         benchmarking_failed = True
       
-      if max_resource_dict[resource] <= 0:
+      if not max_resource_dict[resource] > 0:
         log_failure("Benchmark script had non-positive value for " + resource \
                            + ": " + str(max_resource_dict[resource]), logfileobj)
+        fallback_resources[resource] = "non-positive value " + \
+            str(max_resource_dict[resource])
         max_resource_dict[resource] = DEFAULT_MAX_RESOURCE_DICT[resource]
         benchmarking_failed = True
+
+  return (fallback_resources, benchmarking_failed)
+
+
+def run_benchmark(logfileobj, force_refresh=False, time_budget=None,
+                  telemetry=None, policy=None, profile_dir=None,
+                  conservative_percentile=None, no_degraded_raises=None,
+                  provisional=False, low_impact=False, idle_window=None):
+  """
+  <Purpose>
+    To run the probes for this OS (see probe_registry) and supplement their
+    results (if they do not returned a benchmark for every resource) with
+    default values if needed.
+
+    Measurements previously made on a host with the same hardware are
+    reused from the benchmark cache (see benchmark_cache), and new
+    measurements are added to it.
+
+    Every probe's result is checkpointed as soon as the probe finishes (see
+    benchmark_checkpoint). If the installer is interrupted before the
+    benchmark is over, the next run resumes from the checkpoint and only
+    runs the probes that are missing or stale.
+    
+    WARNING the dictionary returned still treats cpu as an integer representing
+    the number of processors (not a float like it will be later in the process).
+       
+  <Arguments>
+    logfileobj: The open file object that will be used for logging
+        the benchmark process and the creation of the installer state.
+
+    force_refresh: If True, the benchmark cache and checkpoint are ignored
+        and every resource is measured again (the cache is still updated).
+        May also be a list of resource names, in which case only those
+        resources (and any others measured by the same probes) are
+        measured again.
+
+    time_budget: The number of seconds all the probes together may take.
+        Probes that run out of time use their best estimate so far, and
+        defaults are only used if they have nothing usable. If None, the
+        value of the TIME_BUDGET_ENV_VAR environment variable is used if it
+        is set, otherwise there is no limit.
+
+    telemetry: Optional benchmark_telemetry.TelemetryWriter, a probe record
+        is written to it for every resource.
+
+    policy: Optional benchmark_policy.FailurePolicy that decides what to do
+        about failed benchmarks instead of asking the user. If None, the
+        policy configured for the install directory is used, if any (see
+        benchmark_policy).
+
+    profile_dir: Optional directory to write a cProfile profile of every
+        probe to, see benchmark_profiling.
+
+    conservative_percentile: If given, measured resources are lowered to
+        this percentile of their samples instead of their point estimate
+        (see apply_conservative_percentile), and the margin removed is
+        logged. If None, the value of the CONSERVATIVE_PERCENTILE_ENV_VAR
+        environment variable is used if it is set. A percentile that is not
+        a number from 0 to 100 is logged and ignored. Cached values have no
+        samples and are used as they are.
+
+    no_degraded_raises: If True, a degraded measurement cannot raise a
+        resource above the median of this host's history (see
+        check_history). If None, it is True if the
+        NO_DEGRADED_RAISES_ENV_VAR environment variable is set to anything
+        but an empty string or 0.
+
+    provisional: If True, this is the quick first pass of a two-phase
+        install (see main). Unless a time budget is given the probes only
+        get PROVISIONAL_TIME_BUDGET seconds, and the degraded estimates
+        this leaves are lowered to PROVISIONAL_SCALE of their value.
+
+    low_impact: If True, the probes are run at a low priority and
+        throttled, so they do not slow down the services already running
+        on the host, and their results are scaled to make up for it (see
+        benchmark_lowimpact). The scaled timings are not cached.
+
+    idle_window: If given, the idle capacity of the host is sampled for
+        this many seconds before the probes run, and the resources are
+        lowered to what it leaves idle (see apply_idle_capacity). If None,
+        the value of the environment variable named by
+        idle_sampler.IDLE_WINDOW_ENV_VAR is used if it is set. A window
+        that is not a positive, finite number of seconds is logged and
+        ignored. A provisional benchmark does not take the time to sample.
+    
+  <Exceptions>
+    BenchmarkingFailureError: Indicates that one or more benchmark failed and
+      the user (or the failure policy) opted to terminate installation, or
+      that the configured failure policy is invalid.
+    
+  <Side Effects>
+    May use the drive to measure read/write, network resources to measure
+    bandwidth, and request OS sources of crypto-graphically strong 
+    pseudo-random numbers.
+    Will use servicelogger to log benchmark failures to 'installInfo'.
+    Reads and writes the benchmark cache file.
+    Writes the benchmark checkpoint file while the probes run and removes
+    it once they are done.
+    Reads and writes the benchmark history file, and logs any regressions
+    from earlier runs on this host.
+    Samples the host's idle capacity for idle_window seconds if asked to.
+    Waits for any other installer on this host that is benchmarking, and
+    reads and writes the host's shared result store.
+    Writes to the telemetry file if telemetry is given.
+  
+  <Return>
+    A dictionary with measurement value for all the resources in the dict.
+     
+  """
+  OS = nonportable.ostype
+  
+  max_resource_dict = None
+  measurement_dict = {}
+  benchmarking_failed = False
+  is_android = False
+
+  if telemetry is None:
+    telemetry = benchmark_telemetry.TelemetryWriter(None)
+
+  if OS not in probe_registry.SUPPORTED_PLATFORMS:
+    raise nonportable.UnsupportedSystemException("The operating system '" \
+              + OS + "' is not supported.")
+
+  # Look up what has already been measured on identical hardware. The
+  # benchmarks are run from the install directory, so that is the directory
+  # whose block device is part of the fingerprint.
+  installdir = os.getcwd()
+
+  # An unattended install must not end up waiting for an answer because its
+  # policy has a typo, so a bad policy stops the installation right away.
+  if policy is None:
+    try:
+      policy = benchmark_policy.load_policy(installdir)
+    except benchmark_policy.PolicyError, e:
+      log_failure("Invalid benchmark failure policy: " + str(e), logfileobj)
+      raise BenchmarkingFailureError(str(e))
+  if policy is not None:
+    logfileobj.write("Using the benchmark failure policy from " + \
+                     policy.source + ".\n")
+
+  fingerprint = benchmark_cache.get_hardware_fingerprint(installdir)
+  telemetry.set_common_field("fingerprint", fingerprint)
+  cache = benchmark_cache.BenchmarkCache(
+      benchmark_cache.get_cache_path(installdir))
+
+  if force_refresh is True:
+    cached_resource_dict = {}
+    logfileobj.write("Ignoring the benchmark cache, all resources will " + \
+                     "be measured.\n")
+  else:
+    cached_resource_dict = cache.lookup(fingerprint)
+    if force_refresh:
+      logfileobj.write("Measuring again: " + str(force_refresh) + "\n")
+      for resource in force_refresh:
+        cached_resource_dict.pop(resource, None)
+    if cached_resource_dict:
+      logfileobj.write("Cached measurements found for hardware " + \
+                       fingerprint + ": " + str(cached_resource_dict) + "\n")
+
+  # Resume an interrupted benchmark. The resumed results are treated like
+  # cached ones by the probes, but unlike them they are still added to the
+  # cache below.
+  checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+      os.path.join(installdir, benchmark_checkpoint.CHECKPOINT_FILENAME),
+      fingerprint)
+  known_resource_dict = cached_resource_dict.copy()
+  if force_refresh is not True:
+    resumed_resource_dict = checkpoint.lookup()
+    for resource in force_refresh or []:
+      resumed_resource_dict.pop(resource, None)
+    if resumed_resource_dict:
+      logfileobj.write("Resuming an interrupted benchmark, already " + \
+                       "measured: " + str(resumed_resource_dict) + "\n")
+      known_resource_dict.update(resumed_resource_dict)
+
+  if time_budget is None and TIME_BUDGET_ENV_VAR in os.environ:
+    try:
+      time_budget = float(os.environ[TIME_BUDGET_ENV_VAR])
+    except ValueError:
+      logfileobj.write("Ignoring bad benchmark time budget: " + \
+                       os.environ[TIME_BUDGET_ENV_VAR] + "\n")
+  if provisional and time_budget is None:
+    time_budget = PROVISIONAL_TIME_BUDGET
+  if time_budget is not None:
+    logfileobj.write("Benchmark time budget: " + str(time_budget) + \
+                     " seconds.\n")
+
+  if idle_window is None and idle_sampler.IDLE_WINDOW_ENV_VAR in os.environ:
+    idle_window = os.environ[idle_sampler.IDLE_WINDOW_ENV_VAR]
+  if idle_window is not None:
+    try:
+      window = float(idle_window)
+    except (TypeError, ValueError):
+      window = None
+    # NaN fails the comparisons too, and an infinite window would never end.
+    if window is None or not (0 < window < float("inf")):
+      logfileobj.write("Ignoring bad idle sampling window: " + \
+                       str(idle_window) + "\n")
+      idle_window = None
+    else:
+      idle_window = window
+
+  # The host is sampled before the probes, which would only be measuring
+  # themselves.
+  idle_summary = None
+  if idle_window and provisional:
+    logfileobj.write("Not sampling the idle capacity of the host for a " + \
+                     "provisional benchmark.\n")
+  elif idle_window:
+    idle_summary = idle_sampler.sample_idle_capacity(idle_window, logfileobj,
+                                                     installdir)
+
+  # Take turns with any other installer of this user, so the probes do not
+  # compete, and reuse whatever it measured while we were waiting (see
+  # benchmark_coordination). If the lock cannot be had, we benchmark anyway.
+  hostlock = None
+  sharedstore = None
+  coordinationdir = benchmark_coordination.get_coordination_dir()
+  if coordinationdir is not None:
+    hostlock = benchmark_coordination.HostLock(
+        benchmark_coordination.get_lock_path(coordinationdir))
+    # A provisional benchmark is meant to be quick, so it does not wait for
+    # long either.
+    locktimeout = benchmark_coordination.LOCK_TIMEOUT
+    if provisional:
+      locktimeout = time_budget
+    try:
+      if not hostlock.acquire(locktimeout):
+        logfileobj.write("Timed out waiting for another installer to " + \
+                         "finish benchmarking, benchmarking anyway.\n")
+    except OSError, e:
+      logfileobj.write("Unable to coordinate with other installers: " + \
+                       str(e) + "\n")
+
+    sharedstore = benchmark_coordination.open_shared_store(coordinationdir)
+    if sharedstore is not None and force_refresh is not True:
+      shared_resource_dict = sharedstore.lookup(fingerprint)
+      for resource in list(force_refresh or []) + known_resource_dict.keys():
+        shared_resource_dict.pop(resource, None)
+      if shared_resource_dict:
+        logfileobj.write("Reusing results measured by another installer " + \
+                         "on this host: " + str(shared_resource_dict) + "\n")
+        known_resource_dict.update(shared_resource_dict)
+
+  # The registry only imports the OS specific scripts for the probes it
+  # actually runs, because the scripts cannot be imported into a different
+  # OS. A failed probe is reported as a string for its resources and is
+  # dealt with below, but if anything else crashes we want to log it and
+  # continue with default values.
+  try:
+    measurement_dict = probe_registry.measure(OS,
+        DEFAULT_MAX_RESOURCE_DICT.keys(), known_resource_dict, time_budget,
+        profile_dir, lambda probe_measurement_dict: checkpoint_results(
+            checkpoint, probe_measurement_dict, logfileobj), low_impact)
+    if policy is not None:
+      retry_failed_probes(policy, OS, measurement_dict, known_resource_dict,
+                          logfileobj, telemetry, low_impact, profile_dir)
+    max_resource_dict = benchmark_measurement.get_values(measurement_dict)
+
+    # A probe that ran out of time still gives us a usable estimate, it
+    # is only replaced by a default below if it has nothing usable.
+    degraded_resource_dict = {}
+    for resource in measurement_dict:
+      if measurement_dict[resource].sources:
+        logfileobj.write("Benchmark for " + resource + " is " + \
+                         str(max_resource_dict[resource]) + ", from " + \
+                         str(measurement_dict[resource].sources) + ".\n")
+      if measurement_dict[resource].degraded:
+        degraded_resource_dict[resource] = max_resource_dict[resource]
+        logfileobj.write("Benchmark for " + resource + " is degraded (" + \
+                         str(measurement_dict[resource].reason) + \
+                         "), using its estimate.\n")
+
+    # Degraded estimates are not good enough to be reused.
+    for resource in degraded_resource_dict:
+      del max_resource_dict[resource]
+
+    # Neither are the throttled timings of a low-impact benchmark (see
+    # benchmark_lowimpact), which a normal benchmark should measure itself.
+    stored_resource_dict = max_resource_dict.copy()
+    if low_impact:
+      for resource in max_resource_dict:
+        probe = probe_registry.get_probe(resource, OS)
+        if probe is not None and probe.throttleable:
+          del stored_resource_dict[resource]
+
+    store_in_cache(cache, fingerprint, stored_resource_dict,
+                   cached_resource_dict, logfileobj)
+
+    if sharedstore is not None:
+      store_in_cache(sharedstore, fingerprint, stored_resource_dict,
+                     known_resource_dict, logfileobj)
+
+    # Everything worth keeping is in the cache now.
+    try:
+      checkpoint.clear()
+    except OSError, e:
+      logfileobj.write("Unable to remove the benchmark checkpoint: " + \
+                       str(e) + "\n")
+    max_resource_dict.update(degraded_resource_dict)
+  except Exception:
+    log_failure("Failed to benchmark " + OS + " OS.", logfileobj)
+    exceptionType, exceptionValue, exceptionTraceback = sys.exc_info()
+    traceback.print_exception(exceptionType, exceptionValue, \
+                              exceptionTraceback, file=logfileobj)
+    max_resource_dict = DEFAULT_MAX_RESOURCE_DICT.copy()
+    benchmarking_failed = True
+
+  # The lock is also released if the installer dies, so there is no need
+  # for a finally clause.
+  if hostlock is not None:
+    hostlock.release()
+
+  if OS == "Linux":
+    try:
+      import android
+      is_android = True
+      # Use environmental variables to pass data from Java->Python on Android
+      cores = long(os.environ.get('SEATTLE_AVAILABLE_CORES', 0))
+      if cores > 0:
+        max_resource_dict["cpu"] = cores
+      diskused = long(os.environ.get('SEATTLE_AVAILABLE_SPACE', 0))
+      if diskused > 0:
+        max_resource_dict["diskused"] = diskused
+    except ImportError:
+      is_android = False
+    
+  # We are going to log the benchmarked system resources, this will be
+  # very useful in the event a user chooses to share the data with us.
+  if not benchmarking_failed:
+    logfileobj.write("Total resources measured by the script for " + OS + \
+                   " OS: " + str(max_resource_dict) + "\n")    
+    
+  fallback_resources, checkfailed = check_max_resources(max_resource_dict,
+                                                        logfileobj)
+  benchmarking_failed = benchmarking_failed or checkfailed
+
+  for resource in DEFAULT_MAX_RESOURCE_DICT:
+    measurement = measurement_dict.get(resource,
+                                       benchmark_measurement.Measurement(None))
+    if resource in fallback_resources:
+      telemetry.write_probe_record(resource, measurement,
+                                   DEFAULT_MAX_RESOURCE_DICT[resource],
+                                   fallback_resources[resource])
+    else:
+      telemetry.write_probe_record(resource, measurement)
        
   # If one or more benchmark failed, then we want to give the user the option
-  # of aborting the installation
-  if benchmarking_failed:
+  # of aborting the installation, unless a failure policy decides for them.
+  if benchmarking_failed and policy is not None:
+    failed_resources = [resource for resource in fallback_resources \
+                          if fallback_resources[resource] is not None]
+    if not follow_failure_policy(policy, failed_resources, logfileobj,
+                                 telemetry):
+      logfileobj.write("Installation terminated by the failure policy " + \
+                       "after one or more failed benchmarks.\n")
+      raise BenchmarkingFailureError()
+
+    logfileobj.write("Installation continued by the failure policy. " + \
+                     "Default values are being used for failed " + \
+                     "benchmarks.\n")
+
+  elif benchmarking_failed:
     print "The above benchmarking error(s) occurred."
     print "If you choose to continue anyways then default values will be " + \
                     "used for failed benchmarks."
@@ -359,6 +1181,52 @@ def run_benchmark(logfileobj):
     logfileobj.write("Installation continued by user. Default values are " + \
                     "being used for failed benchmarks.\n")
 
+  if conservative_percentile is None and \
+      CONSERVATIVE_PERCENTILE_ENV_VAR in os.environ:
+    conservative_percentile = os.environ[CONSERVATIVE_PERCENTILE_ENV_VAR]
+  if conservative_percentile is not None:
+    try:
+      percentile = float(conservative_percentile)
+    except (TypeError, ValueError):
+      percentile = None
+    # NaN fails both comparisons, so it is turned away too.
+    if percentile is None or not (0 <= percentile <= 100):
+      logfileobj.write("Ignoring bad conservative percentile: " + \
+                       str(conservative_percentile) + "\n")
+      conservative_percentile = None
+    else:
+      conservative_percentile = percentile
+
+  if no_degraded_raises is None:
+    no_degraded_raises = os.environ.get(NO_DEGRADED_RAISES_ENV_VAR, "") \
+        not in ("", "0")
+
+  # The measurements that fell back to defaults have no history and nothing
+  # to be conservative about.
+  measured_dict = {}
+  for resource in measurement_dict:
+    if resource not in fallback_resources:
+      measured_dict[resource] = measurement_dict[resource]
+
+  history = benchmark_history.open_history(installdir)
+  if history is not None:
+    check_history(history, benchmark_cache.get_host_identity(),
+                  max_resource_dict, measured_dict, no_degraded_raises,
+                  logfileobj, telemetry)
+
+  if conservative_percentile is not None:
+    apply_conservative_percentile(max_resource_dict, measured_dict,
+                                  conservative_percentile, logfileobj,
+                                  telemetry)
+
+  if provisional:
+    apply_provisional_scaling(max_resource_dict, measured_dict, logfileobj,
+                              telemetry)
+
+  if idle_summary is not None:
+    apply_idle_capacity(max_resource_dict, idle_summary, logfileobj,
+                        telemetry)
+
   # These are the resources the script will use to calculate the donated
   # resources, I am going to log this just to be safe.     
   logfileobj.write("Final checked resources that we will use: " + \
@@ -396,33 +1264,23 @@ def get_donated_from_maxresources(max_resources_dict, resource_percent):
     None
   
   <Return>
-    Dictionary with the same keys as the DEFAULT_MAX_RESOURCE_DICT that
-    contains the donated system resources.
+    resource_vector.ResourceVector of the donated system resources, use
+    its to_dict() for a dictionary with the same keys as the
+    DEFAULT_MAX_RESOURCE_DICT.
   
   """    
   
-  donatedresources = {}  
-  resource_percent /= 100.0
-  
   # So far only cpu and events are handled specially. Computed result should
-  # be an integer
-  for resource in max_resources_dict:
-    if resource == 'cpu':
-      # Result should be a float in [0,1] (while most other
-      # values in the resource file are integers). 
-      tmp_resource = (max_resources_dict['cpu'] * resource_percent)
-      donatedresources[resource] = tmp_resource
-    elif resource == 'events':
-      # Given the difficulty of accurately measuring this on
-      # most systems, 500 was chosen as a reasonable value, if
-      # for some reason a system has less, the node will deal
-      # with that later.
-      donatedresources[resource] = 500      
-    else:
-      tmp_resource = int(max_resources_dict[resource] * resource_percent)
-      donatedresources[resource] = tmp_resource      
-      
-  return donatedresources
+  # be an integer, except for cpu which should be a float in [0,1] (while
+  # most other values in the resource file are integers), truncate() takes
+  # care of that.
+  donatedresources = resource_vector.ResourceVector.from_dict(
+      max_resources_dict).scale(resource_percent / 100.0).truncate()
+
+  # Given the difficulty of accurately measuring this on most systems, 500
+  # was chosen as a reasonable value for events, if for some reason a system
+  # has less, the node will deal with that later.
+  return donatedresources.replace('events', 500)
 
 
     
@@ -433,8 +1291,8 @@ def get_tenpercent_of_donated(donatedresources):
     resources for the multiple vessels has already been removed).
     
   <Arguments>
-    max_resource_dict: dictionary containing the total amount of each
-      donated resource on the machine.  
+    donatedresources: resource_vector.ResourceVector containing the total
+      amount of each donated resource on the machine.  
         
   <Exceptions>
     None
@@ -443,33 +1301,194 @@ def get_tenpercent_of_donated(donatedresources):
     None
   
   <Return>
-    Dictionary with the same keys as the DEFAULT_MAX_RESOURCE_DICT that
-    contains ten percent of the donated system resources.
+    resource_vector.ResourceVector that contains ten percent of the donated
+    system resources.
   
   """    
   
-  tenpercent = {}  
+  # So far only cpu is handled specially (it stays a float), if others
+  # needed special consideration it could be added here. Computed result
+  # should be an integer
+  return donatedresources.scale(.1).truncate()
+
+
+
+def get_tenpercent_dict(max_resources_dict, resource_percent, vesselcount,
+                        logfileobj, telemetry, profiler, offcut_dict=None):
+  """
+  <Purpose>
+    To work out the resources of ten percent of the donation, from the
+    benchmark results: the donated resources, minus the offcut of every
+    vessel (the cost of splitting them), divided into ten.
+
+  <Arguments>
+    max_resources_dict: The dictionary returned by run_benchmark.
+
+    resource_percent: The number representing the percent of system resources
+        that will be donated to seattle (Normally 10 is requested).
+
+    vesselcount: The number of vessels the donation is split into.
+
+    logfileobj: The open file object used for logging.
+
+    telemetry: The benchmark_telemetry.TelemetryWriter for the install.
+
+    profiler: The benchmark_profiling.Profiler for the install.
+
+    offcut_dict: The offcut of a vessel, DEFAULT_OFFCUT_DICT if None (see
+        offcut_calibration).
+
+  <Exceptions>
+    InsufficientResourceError: the offcut of the vessels leaves a negative
+      amount of some resource.
+
+  <Side Effects>
+    Writes donation, offcut and tenpercent telemetry records.
+
+  <Return>
+    A dictionary with ten percent of the donated resources, as expected by
+    create_installer_state.
+
+  """
+  # I am logging the percentage that should donated to make it easier
+  # to track down the cause of exceptions related to resource splitting.
+  logfileobj.write("User intended to donate :" + str(resource_percent) + \
+                   " percent.\n")
   
-  # So far only cpu is handled specially, if others needed special
-  # consideration it could be added here. Computed result should
-  # be an integer
-  for resource in donatedresources:
-    if resource == 'cpu':
-      # Result should be a float in [0,1] (while most other
-      # values in the resource file are integers). 
-      tenpercent[resource] = donatedresources['cpu'] * .1   
-    else:
-      tenpercent[resource] = int(donatedresources[resource] * .1)    
-      
-  return tenpercent
+  # Take the max resources and get the donated resources.
+  donatedresources = profiler.run("donation", get_donated_from_maxresources,
+                                 max_resources_dict, resource_percent)
+  logfileobj.write("Donated resources:" + str(donatedresources.to_dict()) + \
+                   "\n")
+  telemetry.write_record("donation", {"resource_percent": resource_percent,
+                                      "max_resources": max_resources_dict,
+                                      "donated": donatedresources.to_dict()})
+  
+  
+  # Deduct the appropriate offcut resources to account for all the vessels.
+  if offcut_dict is None:
+    offcut_dict = DEFAULT_OFFCUT_DICT
+  offcutresources = resource_vector.ResourceVector.from_dict(
+      offcut_dict).scale(vesselcount)
+  donatedresources = donatedresources.subtract(offcutresources)
 
+  negativeresources = donatedresources.get_negative_resources()
+  telemetry.write_record("offcut", {"vessel_count": vesselcount,
+                                    "offcut": offcut_dict,
+                                    "remaining": donatedresources.to_dict(),
+                                    "negative_resources": negativeresources})
+  
+  # ensure there aren't negative resources, we will log this and raise
+  # an exception for seattleinstaller to catch.
+  if negativeresources:
+    logfileobj.write("donatedresources that contain a negative resource" +  \
+                      str(donatedresources.to_dict()) + "\n")
+    logfileobj.write("Insufficient resources for desired number of " + \
+                      "vessels :" + ", ".join(negativeresources) + \
+                      "\nThis means that after " + \
+                      "accounting for the resources.offcut (the cost of " + \
+                      "splitting a vessel) there were negative " + \
+                      "resources.\n")
+    minimumpercent, bottleneck = \
+        vessel_feasibility.get_minimum_resource_percent(max_resources_dict,
+                                                        vesselcount,
+                                                        offcut_dict)
+    maximumvessels = vessel_feasibility.get_maximum_vessel_count(
+        max_resources_dict, resource_percent, offcut_dict)[0]
+    logfileobj.write("At least " + str(minimumpercent) + " percent is " + \
+                      "needed for " + str(vesselcount) + " vessels (" + \
+                      str(bottleneck) + " runs out first), " + \
+                      str(resource_percent) + " percent allows " + \
+                      str(maximumvessels) + " vessels.\n")
+
+    raise InsufficientResourceError("Cost of splitting vessels resulted in " + \
+                                   "negative resource values.")
+    
+  # ten percent is selected to make the job of create_installer_state as
+  # simple as possible, it requires vessels be alloted from the donated 
+  # resources in increments of 10 percent. If we allowed vessels to be
+  # alloted portions like 22% of the donated resources we would need to
+  # split the donated resources down farther and the likely hood of vessels
+  # getting little or none of a resource increases. It could be possible
+  # to improve this in the future but for now this seems safest, especially
+  # since some of the benchmark scripts pick very safe/low values.
+  tenpercentdict = profiler.run("tenpercent", get_tenpercent_of_donated,
+                                donatedresources).to_dict()
+  # Going to go ahead and log it just to be safe.
+  logfileobj.write("Useful amount of the donatedresources (offcut costs " + \
+                    "removed already): " + str(tenpercentdict) + "\n")
+  telemetry.write_record("tenpercent", {"tenpercent": tenpercentdict})
 
+  return tenpercentdict
 
-def main(prog_path, resource_percent, logfileobj):
+
+
+def apply_numa_placement(tenpercentdict, vesselcreationlist, logfileobj,
+                         telemetry):
+  """
+  <Purpose>
+    To place every vessel on a single NUMA node of the host, lowering the
+    cpu and memory of the vessels as much as needed for them to fit on
+    their nodes, see numa_placement.
+
+  <Arguments>
+    tenpercentdict: Ten percent of the donated resources, as returned by
+        get_tenpercent_dict. It is modified.
+
+    vesselcreationlist: The list of vessels, see create_installer_state.main.
+
+    logfileobj: The open file object used for logging.
+
+    telemetry: The benchmark_telemetry.TelemetryWriter for the install.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    Modifies tenpercentdict.
+    Writes a numa telemetry record if the vessels were placed.
+
+  <Return>
+    A list with the NUMA node of every vessel, in the order of the vessels,
+    or None if the vessels were not placed.
+
+  """
+  result = numa_placement.get_numa_placement(vesselcreationlist,
+                                             tenpercentdict, logfileobj)
+  if result is None:
+    return None
+
+  scale, placement, numa_nodes = result
+  if scale < 1:
+    tenpercentdict["cpu"] = tenpercentdict["cpu"] * scale
+    tenpercentdict["memory"] = int(tenpercentdict["memory"] * scale)
+    logfileobj.write("Keeping the vessels on their NUMA nodes: using " + \
+                     str(tenpercentdict["cpu"]) + " cpu and " + \
+                     str(tenpercentdict["memory"]) + " memory for ten " + \
+                     "percent.\n")
+  telemetry.write_record("numa", {"nodes": numa_nodes,
+                                  "scale": scale,
+                                  "placement": placement})
+  return placement
+
+
+
+def main(prog_path, resource_percent, logfileobj, force_refresh=False,
+         time_budget=None, profile_dir=None, conservative_percentile=None,
+         no_degraded_raises=None, provisional=None, low_impact=None,
+         calibrate_offcut=None, numa_local=None):
   """
   <Purpose>
     To run the benchmarks and use the writecustominstaller to create
     the state for the vessels (resource files and directories).
+
+    The install can be done in two phases, so that the node comes online
+    in seconds rather than after the full benchmark. The first is a quick
+    provisional benchmark (see run_benchmark), whose conservative results
+    are used to write the vessels' resource files. The second is a
+    background refinement that measures the resources properly and
+    rewrites the resource files with the results (see
+    benchmark_refinement).
     
   <Arguments>
     prog_path:
@@ -480,6 +1499,46 @@ def main(prog_path, resource_percent, logfileobj):
         
     logfileobj: The open file object that will be used for logging
         the benchmark process and the creation of the installer state.
+
+    force_refresh: If True, cached benchmark results are ignored and every
+        resource is measured again. May also be a list of the resources to
+        measure again.
+
+    time_budget: The number of seconds the benchmarks may take in total,
+        see run_benchmark.
+
+    profile_dir: If given, every benchmark probe and every phase of the
+        installation is profiled with cProfile and the profiles are written
+        to this directory, see benchmark_profiling. If None, the directory
+        in the SEATTLE_BENCHMARK_PROFILE environment variable is used, if
+        it is set.
+
+    conservative_percentile: If given, resources are donated from this
+        lower percentile of their measurements rather than their point
+        estimate, see run_benchmark.
+
+    no_degraded_raises: If True, degraded measurements cannot raise a
+        resource above this host's earlier results, see run_benchmark.
+
+    provisional: If True, the install is done in two phases. If None, it
+        is if the PROVISIONAL_ENV_VAR environment variable is set to
+        anything but an empty string or 0.
+
+    low_impact: If True, the benchmark is run in low-impact mode, see
+        run_benchmark. If None, it is if the environment variable named by
+        benchmark_lowimpact.LOW_IMPACT_ENV_VAR is set to anything but an
+        empty string or 0.
+
+    calibrate_offcut: If True, the offcut of the vessels is measured on
+        this host instead of using DEFAULT_OFFCUT_DICT, see
+        offcut_calibration. If None, it is if the environment variable
+        named by offcut_calibration.CALIBRATE_OFFCUT_ENV_VAR is set to
+        anything but an empty string or 0.
+
+    numa_local: If True, every vessel is kept on a single NUMA node of the
+        host, see apply_numa_placement. If None, it is if the environment
+        variable named by numa_placement.NUMA_LOCAL_ENV_VAR is set to
+        anything but an empty string or 0.
     
   <Exceptions>
     InsufficientResourceError: Exception to indicate that there was
@@ -520,6 +1579,12 @@ def main(prog_path, resource_percent, logfileobj):
     a failure. 
     Writes out resource.v1, resource.v2, ... vessel resources files and 
     creates directories v1,v2,...
+    Appends records to the benchmark telemetry file (see
+    benchmark_telemetry).
+    Writes profiles and a summary of them if profiling is on.
+    Writes the results file of the benchmark service (see
+    benchmark_service).
+    Starts the background refinement if the install is done in two phases.
     
   <Return>
     None
@@ -539,62 +1604,103 @@ def main(prog_path, resource_percent, logfileobj):
     vesselinfodata.close()
     raise
   
-  max_resources_dict = run_benchmark(logfileobj)  
-  
-  # I am logging the percentage that should donated to make it easier
-  # to track down the cause of exceptions related to resource splitting.
-  logfileobj.write("User intended to donate :" + str(resource_percent) + \
-                   " percent.\n")
-  
-  # Take the max resources and get the donated resources.
-  donatedresources = get_donated_from_maxresources(max_resources_dict, 
-                                                   resource_percent)
-  logfileobj.write("Donated resources:" + str(donatedresources) + "\n")
-  
-  
-  # Find the number of vessels and that the initial node should contain
-  # and deduct the appropriate offcut resources to account for all the vessels.
-  vesselcount = 0
-  for item in vesselcreationlist:
-    vesselcount += 1
+  # Structured records of the benchmark and the calculations below, see
+  # benchmark_telemetry. Every record is flushed as it is written, so
+  # nothing is lost if one of the exceptions below stops the install.
+  telemetry = benchmark_telemetry.open_telemetry(prog_path)
+
+  # The telemetry file is closed however the benchmark and the calculations
+  # end, so that the records of a failed install are complete.
+  try:
+    # Profiling is off unless asked for, in which case the profile of every
+    # phase is written as soon as it finishes. The summary is only written if
+    # the installation gets to the end.
+    profiler = benchmark_profiling.get_profiler(profile_dir)
+    if profiler.enabled():
+      logfileobj.write("Writing profiles to " + profiler.profile_dir + "\n")
+
+    if provisional is None:
+      provisional = os.environ.get(PROVISIONAL_ENV_VAR, "") not in ("", "0")
+    if provisional:
+      logfileobj.write("Provisional benchmark, the results will be refined " + \
+                       "in the background.\n")
+
+    if low_impact is None:
+      low_impact = os.environ.get(benchmark_lowimpact.LOW_IMPACT_ENV_VAR,
+                                  "") not in ("", "0")
+    if low_impact:
+      logfileobj.write("Benchmarking in low-impact mode.\n")
+
+    max_resources_dict = profiler.run("benchmark", run_benchmark, logfileobj,
+        force_refresh, time_budget, telemetry, None, profiler.profile_dir,
+        conservative_percentile, no_degraded_raises, provisional, low_impact)
   
-  for i in range(vesselcount):
-    donatedresources = nmresourcemath.subtract(donatedresources, 
-                                               DEFAULT_OFFCUT_DICT)
+    # Find the number of vessels and that the initial node should contain.
+    vesselcount = 0
+    for item in vesselcreationlist:
+      vesselcount += 1
+
+    if calibrate_offcut is None:
+      calibrate_offcut = os.environ.get(
+          offcut_calibration.CALIBRATE_OFFCUT_ENV_VAR, "") not in ("", "0")
+    offcut_dict = None
+    if calibrate_offcut:
+      offcut_dict, measured = profiler.run("offcut_calibration",
+          offcut_calibration.calibrate_offcut, vesselcount, logfileobj)
+      telemetry.write_record("offcut_calibration", {"measured": measured,
+                                                    "offcut": offcut_dict})
   
-  # ensure there aren't negative resources, we will log this and raise
-  # an exception for seattleinstaller to catch.
-  try:
-    nmresourcemath.check_for_negative_resources(donatedresources)
-  except nmresourcemath.ResourceParseError, e:
-    logfileobj.write("donatedresources that contain a negative resource" +  \
-                      str(donatedresources) + "\n")
-    logfileobj.write("Insufficient resources for desired number of " + \
-                      "vessels :" + str(e) + "\nThis means that after " + \
-                      "accounting for the resources.offcut (the cost of " + \
-                      "splitting a vessel) there were negative " + \
-                      "resources.\n")
-    
-    
-    raise InsufficientResourceError("Cost of splitting vessels resulted in " + \
-                                   "negative resource values.")
-    
-  # ten percent is selected to make the job of create_installer_state as
-  # simple as possible, it requires vessels be alloted from the donated 
-  # resources in increments of 10 percent. If we allowed vessels to be
-  # alloted portions like 22% of the donated resources we would need to
-  # split the donated resources down farther and the likely hood of vessels
-  # getting little or none of a resource increases. It could be possible
-  # to improve this in the future but for now this seems safest, especially
-  # since some of the benchmark scripts pick very safe/low values.
-  tenpercentdict = get_tenpercent_of_donated(donatedresources)
-  # Going to go ahead and log it just to be safe.
-  logfileobj.write("Useful amount of the donatedresources (offcut costs " + \
-                    "removed already): " + str(tenpercentdict) + "\n")
+    tenpercentdict = get_tenpercent_dict(max_resources_dict, resource_percent,
+                                         vesselcount, logfileobj, telemetry,
+                                         profiler, offcut_dict)
+
+    if numa_local is None:
+      numa_local = os.environ.get(numa_placement.NUMA_LOCAL_ENV_VAR,
+                                  "") not in ("", "0")
+    placement = None
+    if numa_local:
+      placement = profiler.run("numa_placement", apply_numa_placement,
+                               tenpercentdict, vesselcreationlist, logfileobj,
+                               telemetry)
+  finally:
+    telemetry.close()
   
   # Create the installer installer initial vessel state, this will create
   # the vesseldict, vessel directories, and vessel resource files. 
   # Note: possible exceptions for this module are: ValueError, IOError, 
   # OSError, WindowsError. But they will be allowed to propagate up.
-  create_installer_state.main(vesselcreationlist, tenpercentdict, prog_path)
+  profiler.run("create_installer_state", create_installer_state.main,
+               vesselcreationlist, tenpercentdict, prog_path)
+
+  # Let the other node components look the results up (see
+  # benchmark_service), the NUMA node of every vessel included. The node
+  # works without them.
+  try:
+    vesselresources = create_installer_state.get_vessel_resources(
+        vesselcreationlist, tenpercentdict)
+    if placement is not None:
+      for vesselnumber in range(len(vesselresources)):
+        vesselresources[vesselnumber]["numa_node"] = placement[vesselnumber]
+    benchmark_service.write_results(prog_path, max_resources_dict,
+        get_donated_from_maxresources(max_resources_dict,
+                                      resource_percent).to_dict(),
+        vesselresources)
+  except Exception, e:
+    logfileobj.write("Unable to write the benchmark results: " + str(e) + \
+                     "\n")
+
+  # The node can start with the provisional resources, they are replaced
+  # once the refinement is done.
+  if provisional:
+    benchmark_refinement.start_refinement(prog_path, vesselcreationlist,
+        resource_percent, conservative_percentile, no_degraded_raises,
+        low_impact, offcut_dict, numa_local, logfileobj)
+
+  if profiler.enabled():
+    try:
+      logfileobj.write("Profile summary written to " + \
+                       profiler.write_summary() + "\n")
+    except IOError, e:
+      logfileobj.write("Failed to write the profile summary: " + str(e) + \
+                       "\n")
 
@@ -0,0 +1,480 @@
+"""
+<Program Name>
+  benchmark_service.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  A small local service that answers questions about the host's measured
+  capacity, so that other node components do not have to parse the
+  resource.vN files or run the probes again.
+
+  Every install (and every benchmark refinement, see benchmark_refinement)
+  writes its results to RESULTS_FILENAME in the install directory with
+  write_results: the benchmark results of run_benchmark, the donated
+  resources and the resources of every vessel. The service keeps the latest
+  results in memory, reloads them when the file changes and tells its
+  subscribers about it.
+
+  To run the service:
+
+    python benchmark_service.py <install directory>
+
+  It listens on a Unix socket, SOCKET_FILENAME in the install directory, or
+  where there are no Unix sockets (Windows) on SERVICE_PORT on localhost.
+  The protocol is line based. Every request is a line, and every answer a
+  line holding a JSON object:
+
+    get <what>: where what is "benchmark", "donated", "vessels" or "all".
+      The answer is {"version": version, "data": results}. The version
+      goes up every time the results change, and the data is None until
+      there are results.
+    subscribe [version]: the answer is {"version": ..., "data": ...} with
+      all the results as soon as their version differs from the given one
+      (the current version if none is given), and again every time they
+      change after that, until the connection is closed.
+
+  An unknown request is answered with {"error": description}. query() and
+  subscribe() do all this for a client.
+"""
+
+import os
+import select
+import socket
+import sys
+import threading
+import time
+
+try:
+  import SocketServer
+except ImportError:
+  import socketserver as SocketServer
+
+try:
+  import json
+except ImportError:
+  import simplejson as json
+
+import persist
+
+
+# The name of the results file in the install directory.
+RESULTS_FILENAME = "benchmark_results"
+
+# The name of the service's Unix socket in the install directory.
+SOCKET_FILENAME = "benchmark_service.sock"
+
+# The localhost port of the service where there are no Unix sockets.
+SERVICE_PORT = 63090
+
+# How often (in seconds) the service checks whether the results changed.
+RESULTS_POLL_INTERVAL = 1
+
+# What can be asked for, and the key of each in the results file ("all" is
+# the whole file).
+QUERIES = {"benchmark": "max_resources", "donated": "donated",
+           "vessels": "vessels", "all": None}
+
+
+
+def _make_serializable(value):
+  """
+  <Purpose>
+    Turn the sets in a resource dictionary (the ports) into sorted lists,
+    so the results can be sent as JSON.
+
+  <Arguments>
+    value:
+      A resource dictionary, or any value in one.
+
+  <Returns>
+    The converted value.
+  """
+  if isinstance(value, dict):
+    newdict = {}
+    for key in value:
+      newdict[key] = _make_serializable(value[key])
+    return newdict
+  if isinstance(value, (set, frozenset)):
+    return sorted(value)
+  return value
+
+
+
+def write_results(installdir, max_resources_dict, donated_dict,
+                  vesselresources):
+  """
+  <Purpose>
+    Write the results of an install to RESULTS_FILENAME, for the service.
+
+  <Arguments>
+    installdir:
+      The directory seattle is installed in.
+
+    max_resources_dict:
+      The results of benchmark_resources.run_benchmark.
+
+    donated_dict:
+      The donated resources (before the offcut of the vessels).
+
+    vesselresources:
+      The resources of every vessel, as returned by
+      create_installer_state.get_vessel_resources. If the vessels were
+      placed on NUMA nodes, each also has its numa_node (see
+      numa_placement).
+
+  <Exceptions>
+    Exceptions raised by persist.commit_object if the file cannot be
+    written.
+
+  <Side Effects>
+    Writes RESULTS_FILENAME.
+
+  <Returns>
+    None
+  """
+  vessels = {}
+  for vesselnumber in range(len(vesselresources)):
+    vessels["v" + str(vesselnumber + 1)] = \
+        _make_serializable(vesselresources[vesselnumber])
+
+  persist.commit_object({"time": time.time(),
+                         "max_resources": max_resources_dict,
+                         "donated": donated_dict,
+                         "vessels": vessels},
+                        os.path.join(installdir, RESULTS_FILENAME))
+
+
+
+class ResultCache(object):
+  """
+  <Purpose>
+    Keeps the latest results in memory, together with the answer to every
+    query, already encoded.
+
+  <Arguments>
+    resultspath:
+      The path of the results file. It does not need to exist yet.
+  """
+
+  def __init__(self, resultspath):
+    self.resultspath = resultspath
+    self.results = None
+    self.mtime = None
+    self.version = 0
+    self.answers = {}
+    self.condition = threading.Condition()
+
+
+  def reload(self):
+    """
+    <Purpose>
+      Read the results file again if it changed, and wake up the
+      subscribers if it did.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None, a file that cannot be read is tried again on the next call.
+
+    <Returns>
+      True if the results changed.
+    """
+    try:
+      mtime = os.path.getmtime(self.resultspath)
+    except OSError:
+      return False
+    if mtime == self.mtime:
+      return False
+
+    try:
+      results = persist.restore_object(self.resultspath)
+    except Exception:
+      return False
+
+    self.condition.acquire()
+    try:
+      self.results = results
+      self.mtime = mtime
+      self.version += 1
+      self.answers = {}
+      self.condition.notifyAll()
+    finally:
+      self.condition.release()
+    return True
+
+
+  def get_answer(self, query):
+    """
+    <Purpose>
+      Get the answer to a query.
+
+    <Arguments>
+      query:
+        One of the keys of QUERIES.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      The answer as a line of JSON.
+    """
+    self.condition.acquire()
+    try:
+      if query not in self.answers:
+        data = self.results
+        if data is not None and QUERIES[query] is not None:
+          data = data.get(QUERIES[query])
+        self.answers[query] = json.dumps({"version": self.version,
+                                          "data": data}) + "\n"
+      return self.answers[query]
+    finally:
+      self.condition.release()
+
+
+  def wait_for_change(self, version, timeout=None):
+    """
+    <Purpose>
+      Wait until the version of the results differs from the given one.
+
+    <Arguments>
+      version:
+        The version the caller already has.
+
+      timeout:
+        The number of seconds to wait at most, or None to wait forever.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      The current version, which is still the given one if the time ran
+      out.
+    """
+    self.condition.acquire()
+    try:
+      if self.version == version:
+        self.condition.wait(timeout)
+      return self.version
+    finally:
+      self.condition.release()
+
+
+
+class _RequestHandler(SocketServer.StreamRequestHandler):
+  """
+  <Purpose>
+    Answers the requests of one client, see the module's purpose.
+  """
+
+  def handle(self):
+    cache = self.server.cache
+
+    while True:
+      line = self.rfile.readline()
+      if not line:
+        return
+      words = line.split()
+      if not words:
+        continue
+
+      if words[0] == "get" and len(words) == 2 and words[1] in QUERIES:
+        self.wfile.write(cache.get_answer(words[1]))
+
+      elif words[0] == "subscribe" and len(words) <= 2:
+        try:
+          version = cache.version
+          if len(words) == 2:
+            version = int(words[1])
+        except ValueError:
+          self.wfile.write(json.dumps({"error": "bad version"}) + "\n")
+          continue
+
+        # The only way out is the client closing the connection. The
+        # results may never change again, so the connection is checked for
+        # that every RESULTS_POLL_INTERVAL rather than left to the next
+        # write, or the thread and socket of a client that went away would
+        # be kept forever. Anything else the client sends is ignored.
+        try:
+          while True:
+            newversion = cache.wait_for_change(version,
+                                               RESULTS_POLL_INTERVAL)
+            if newversion != version:
+              version = newversion
+              self.wfile.write(cache.get_answer("all"))
+              self.wfile.flush()
+            if select.select([self.request], [], [], 0)[0] and \
+                not self.request.recv(4096):
+              return
+        except (socket.error, select.error):
+          return
+
+      else:
+        self.wfile.write(json.dumps({"error": "unknown request " + \
+                                              repr(line.strip())}) + "\n")
+      self.wfile.flush()
+
+
+
+def _get_address(installdir):
+  """
+  <Purpose>
+    Get the address of the service of an install.
+
+  <Arguments>
+    installdir:
+      The directory seattle is installed in.
+
+  <Returns>
+    A (family, address) tuple.
+  """
+  if hasattr(socket, "AF_UNIX"):
+    return (socket.AF_UNIX, os.path.join(installdir, SOCKET_FILENAME))
+  return (socket.AF_INET, ("127.0.0.1", SERVICE_PORT))
+
+
+
+def serve(installdir):
+  """
+  <Purpose>
+    Run the service for an install, see the module's purpose. It never
+    returns.
+
+  <Arguments>
+    installdir:
+      The directory seattle is installed in.
+
+  <Exceptions>
+    socket.error if the service cannot listen on its address.
+
+  <Side Effects>
+    Creates the socket, replacing one left behind by an earlier service.
+    Starts a thread that watches the results file, and one for every
+    client.
+
+  <Returns>
+    None
+  """
+  cache = ResultCache(os.path.join(installdir, RESULTS_FILENAME))
+  cache.reload()
+
+  family, address = _get_address(installdir)
+  if family == socket.AF_INET:
+    server = SocketServer.ThreadingTCPServer(address, _RequestHandler)
+  else:
+    if os.path.exists(address):
+      os.remove(address)
+    server = SocketServer.ThreadingUnixStreamServer(address,
+                                                    _RequestHandler)
+  server.daemon_threads = True
+  server.cache = cache
+
+  def watch_results():
+    while True:
+      time.sleep(RESULTS_POLL_INTERVAL)
+      cache.reload()
+
+  watcher = threading.Thread(target=watch_results)
+  watcher.setDaemon(True)
+  watcher.start()
+
+  server.serve_forever()
+
+
+
+def _connect(installdir):
+  """
+  <Purpose>
+    Connect to the service of an install.
+
+  <Returns>
+    The connected socket.
+  """
+  family, address = _get_address(installdir)
+  serversocket = socket.socket(family, socket.SOCK_STREAM)
+  serversocket.connect(address)
+  return serversocket
+
+
+
+def query(installdir, what="all"):
+  """
+  <Purpose>
+    Ask the service of an install for results.
+
+  <Arguments>
+    installdir:
+      The directory seattle is installed in.
+
+    what:
+      "benchmark", "donated", "vessels" or "all", see the module's purpose.
+
+  <Exceptions>
+    socket.error if the service is not running.
+    ValueError if the service does not understand the question.
+
+  <Returns>
+    A (version, data) tuple.
+  """
+  serversocket = _connect(installdir)
+  try:
+    serverfile = serversocket.makefile("rw")
+    serverfile.write("get " + what + "\n")
+    serverfile.flush()
+    answer = json.loads(serverfile.readline())
+    serverfile.close()
+  finally:
+    serversocket.close()
+
+  if "error" in answer:
+    raise ValueError(answer["error"])
+  return (answer["version"], answer["data"])
+
+
+
+def subscribe(installdir, version=None):
+  """
+  <Purpose>
+    Follow the changes of the results of an install.
+
+  <Arguments>
+    installdir:
+      The directory seattle is installed in.
+
+    version:
+      The version the caller already has, or None for the current one.
+
+  <Exceptions>
+    socket.error if the service is not running or goes away.
+
+  <Returns>
+    A generator of (version, all the results) tuples, one for every change.
+  """
+  serversocket = _connect(installdir)
+  serverfile = serversocket.makefile("rw")
+  request = "subscribe"
+  if version is not None:
+    request += " " + str(version)
+  serverfile.write(request + "\n")
+  serverfile.flush()
+
+  try:
+    while True:
+      line = serverfile.readline()
+      if not line:
+        return
+      answer = json.loads(line)
+      yield (answer["version"], answer["data"])
+  finally:
+    serverfile.close()
+    serversocket.close()
+
+
+
+if __name__ == "__main__":
+  if len(sys.argv) != 2:
+    print "Usage: python benchmark_service.py <install directory>"
+    sys.exit(1)
+  serve(os.path.abspath(sys.argv[1]))
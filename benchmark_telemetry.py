@@ -0,0 +1,256 @@
+"""
+<Program Name>
+  benchmark_telemetry.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Writes a structured record of the benchmark process, one JSON object per
+  line, so that measurements can be analyzed across many installs without
+  parsing the free-form installer log.
+
+  There is a "probe" record for every resource, with the value, its unit,
+  its interval (see benchmark_measurement), the raw samples the probe took,
+  how long the probe ran (wall clock and CPU), what else it cost (see
+  probe_accounting), the values it was chosen from (the host's and the
+  cgroup's, see Linux_resources), why it failed and which default was used
+  instead, if any. The offcut calibration (see offcut_calibration) and the
+  donation, offcut and ten percent calculations in benchmark_resources.main
+  each write a record too, and so does every decision taken by a failure
+  policy (see benchmark_policy), every resource lowered by a conservative
+  donation, a provisional benchmark or the host's idle capacity (see
+  idle_sampler), every regression found in the host's history (see
+  benchmark_history) and the placement of the vessels on NUMA nodes (see
+  numa_placement).
+
+  Every record has these fields:
+    type: "probe", "offcut_calibration", "donation", "offcut",
+      "tenpercent", "numa", "policy", "conservative", "provisional", "idle"
+      or "regression"
+    time: when the record was written (seconds since the epoch)
+    run: an identifier shared by every record of a single benchmark run
+    fingerprint: the hardware fingerprint of the host (see benchmark_cache),
+      once it is known
+
+  The records are appended to TELEMETRY_FILENAME in the install directory,
+  unless the environment variable named by TELEMETRY_PATH_ENV_VAR gives
+  another path. Setting that variable to an empty string turns telemetry
+  off. If no json module is available (Python 2.5 and older), telemetry is
+  off as well.
+"""
+
+import os
+import time
+
+try:
+  import json
+except ImportError:
+  try:
+    import simplejson as json
+  except ImportError:
+    json = None
+
+
+# The name of the telemetry file in the install directory.
+TELEMETRY_FILENAME = "benchmark_telemetry.jsonl"
+
+# If set, the path of the telemetry file, or an empty string for none.
+TELEMETRY_PATH_ENV_VAR = "SEATTLE_BENCHMARK_TELEMETRY"
+
+# At most this many raw samples are written for a probe. Probes with more
+# (measure_random takes 10000) have theirs evenly thinned out, the
+# sample_count field still gives the total.
+MAX_RECORDED_SAMPLES = 1000
+
+# The unit each resource is measured in.
+RESOURCE_UNITS = {"cpu": "processors",
+                  "memory": "bytes",
+                  "diskused": "bytes",
+                  "events": "threads",
+                  "filesopened": "files",
+                  "insockets": "sockets",
+                  "outsockets": "sockets",
+                  "random": "bytes/s",
+                  "filewrite": "bytes/s",
+                  "fileread": "bytes/s",
+                  "netrecv": "bytes/s",
+                  "netsend": "bytes/s",
+                  "lograte": "bytes/s",
+                  "loopsend": "bytes/s",
+                  "looprecv": "bytes/s"}
+
+
+
+class TelemetryWriter(object):
+  """
+  <Purpose>
+    Writes telemetry records to an open file.
+
+  <Arguments>
+    fileobj:
+      The open file object the records are written to, or None to discard
+      them (when telemetry is off).
+  """
+
+  def __init__(self, fileobj):
+    self.fileobj = fileobj
+    self.common_fields = {"run": os.urandom(8).encode("hex")}
+
+
+  def set_common_field(self, name, value):
+    """
+    <Purpose>
+      Add a field to every record written from now on.
+
+    <Arguments>
+      name:
+        The name of the field.
+
+      value:
+        Its value, which must be JSON serializable.
+
+    <Returns>
+      None
+    """
+    self.common_fields[name] = value
+
+
+  def write_record(self, recordtype, fields):
+    """
+    <Purpose>
+      Write a single record.
+
+    <Arguments>
+      recordtype:
+        The type of the record.
+
+      fields:
+        A dictionary of the record's fields, which must be JSON
+        serializable.
+
+    <Exceptions>
+      None, telemetry must never stop an installation so errors writing
+      the record are ignored.
+
+    <Side Effects>
+      Writes a line to the telemetry file.
+
+    <Returns>
+      None
+    """
+    if self.fileobj is None:
+      return
+
+    record = self.common_fields.copy()
+    record.update(fields)
+    record["type"] = recordtype
+    record["time"] = time.time()
+
+    try:
+      self.fileobj.write(json.dumps(record, sort_keys=True) + "\n")
+      self.fileobj.flush()
+    except Exception:
+      pass
+
+
+  def write_probe_record(self, resource, measurement, fallback=None,
+                         failure=None):
+    """
+    <Purpose>
+      Write the record for the probe of a resource.
+
+    <Arguments>
+      resource:
+        The name of the resource.
+
+      measurement:
+        The benchmark_measurement.Measurement returned by the probe.
+
+      fallback:
+        The default value used instead of the measurement, or None.
+
+      failure:
+        A description of why the measurement could not be used, or None.
+        Defaults to the measurement's reason if it failed.
+
+    <Returns>
+      None
+    """
+    samples = measurement.samples or []
+    if len(samples) > MAX_RECORDED_SAMPLES:
+      step = len(samples) / float(MAX_RECORDED_SAMPLES)
+      samples = [samples[int(index * step)] \
+                   for index in range(MAX_RECORDED_SAMPLES)]
+
+    if failure is None and measurement.failed():
+      failure = measurement.reason or measurement.value
+
+    value = measurement.value
+    if isinstance(value, basestring):
+      value = None
+
+    self.write_record("probe", {
+        "resource": resource,
+        "value": value,
+        "unit": RESOURCE_UNITS.get(resource),
+        "interval": measurement.get_interval(),
+        "samples": samples,
+        "sample_count": len(measurement.samples or []),
+        "sample_size": measurement.sample_size,
+        "wall_time": measurement.wall_time,
+        "cpu_time": measurement.cpu_time,
+        "cost": measurement.cost,
+        "sources": measurement.sources,
+        "cached": measurement.cached,
+        "degraded": measurement.degraded,
+        "reason": measurement.reason,
+        "failure": failure,
+        "fallback": fallback})
+
+
+  def close(self):
+    """
+    <Purpose>
+      Close the telemetry file.
+
+    <Returns>
+      None
+    """
+    if self.fileobj is not None:
+      self.fileobj.close()
+      self.fileobj = None
+
+
+
+def open_telemetry(installdir):
+  """
+  <Purpose>
+    Open the telemetry file for appending.
+
+  <Arguments>
+    installdir:
+      The directory seattle is being installed in.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    Creates the telemetry file if it does not exist.
+
+  <Returns>
+    A TelemetryWriter. If telemetry is turned off or the file cannot be
+    opened, it discards every record.
+  """
+  if json is None:
+    return TelemetryWriter(None)
+
+  telemetrypath = os.environ.get(TELEMETRY_PATH_ENV_VAR,
+                                 os.path.join(installdir, TELEMETRY_FILENAME))
+  if not telemetrypath:
+    return TelemetryWriter(None)
+
+  try:
+    return TelemetryWriter(open(telemetrypath, "a"))
+  except IOError:
+    return TelemetryWriter(None)
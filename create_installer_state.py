@@ -32,6 +32,8 @@ import persist
 
 import nmresourcemath
 
+import resource_vector
+
 import shutil
 
 class InvalidVesselInfoError(Exception):
@@ -152,6 +154,153 @@ def read_vesselinfo_from_file(filename):
   return retvesselinfo
 
 
+def _replace_file(newfilename, filename):
+  """
+  <Purpose>
+    Rename a file over another one, replacing it in a single step where the
+    OS allows it.
+
+  <Arguements>
+    newfilename: the file to rename.
+
+    filename: the file to replace, it does not need to exist.
+
+  <Exceptions>
+    OSError if the file cannot be renamed.
+
+  <Side Effects>
+    Renames newfilename to filename.
+
+  <Return>
+    None
+  """
+  try:
+    os.rename(newfilename, filename)
+  except OSError:
+    # Windows does not rename over an existing file.
+    if not os.path.exists(filename):
+      raise
+    os.remove(filename)
+    os.rename(newfilename, filename)
+
+
+def get_vessel_resources(vesselcreationlist, tenpercentdict):
+  """
+  <Purpose>
+    To work out the resources of every vessel, its share of the donated
+    resources and its ports.
+
+  <Arguements>
+    vesselcreationlist: the list of vessels, see main.
+
+    tenpercentdict: ten percent of the donated resources, see main.
+
+  <Exceptions>
+    None
+
+  <Side Effects>
+    None
+
+  <Return>
+    A list with the resource dictionary of every vessel, in the order of
+    the vessels. The ports ('messport' and 'connport') are sets.
+  """
+  onetenth = resource_vector.ResourceVector.from_dict(tenpercentdict)
+
+  vesselresources = []
+
+  # I'll use this to figure out which ports to assign
+  usedpercent = 0
+
+  for item in vesselcreationlist:
+    
+    # the percentcount variable is slightly confusing, up until we have talked
+    # about vessels as haveing 10 or 20 or ... percent of the donated resources.
+    # We restrict vessels to being a multiple of ten so that we do not have to
+    # cut down the donated resources to far (this is an attempt to keep things
+    # simple and avoid getting resources at zero).
+    # percentcount should be an integer between 0 and 10
+    percentcount = item[0] / 10
+    # make a resource file of the right size...
+    thisresourcedata = onetenth.scale(percentcount).to_dict()
+
+    # I need the ports...
+    startpercent = usedpercent
+    endpercent = usedpercent + percentcount
+    # a yucky way of getting the ports.   Should do 63100-63109 for the first,
+    # 63110-63119 for the second, etc.
+    thisresourcedata['messport'] = set(range(63100+10*startpercent, 63100+10*endpercent))
+    thisresourcedata['connport'] = set(range(63100+10*startpercent, 63100+10*endpercent))
+
+    vesselresources.append(thisresourcedata)
+    usedpercent = usedpercent + percentcount
+
+  return vesselresources
+
+
+def write_resource_files(vesselcreationlist, tenpercentdict, targetdirectory):
+  """
+  <Purpose>
+    To write the resource file of every vessel, from its share of the donated
+    resources (see get_vessel_resources) and the restrictions in
+    vessel.restrictions. This is part of main, but it is also used to
+    rewrite the resource files of an existing install with better benchmark
+    results (see benchmark_refinement).
+
+    Every file is replaced in a single step, so it holds either the old or
+    the new resources, never a mix of them.
+
+  <Arguements>
+    vesselcreationlist: the list of vessels, see main.
+
+    tenpercentdict: ten percent of the donated resources, see main.
+
+    targetdirectory: a string containing the directory where the
+      resource files will be placed.
+
+  <Exceptions>
+    IOError: if vessel.restrictions is not found, this must be included
+      ahead of time in the target directory.
+
+    OSError: if a resource file cannot be replaced.
+
+  <Side Effects>
+    Creates or replaces resource files for each vessel with names of the
+    form resource.v1, resource.v2, ...
+
+  <Return>
+    A list of the names of the resource files, in the order of the vessels.
+  """
+  # These are the restrictions that apply to all vessels, they are
+  # not a resource we measure.
+  restrictionsfo = file('vessel.restrictions')
+  restrictionsstring = restrictionsfo.read()
+  restrictionsfo.close()
+
+  resourcefilenames = []
+  vesselnumber = 1
+
+  for thisresourcedata in get_vessel_resources(vesselcreationlist,
+                                               tenpercentdict):
+    
+    # The file is written under a temporary name and then renamed, so that
+    # a node manager reading it never sees a half written file.
+    resourcefilename = targetdirectory+"/resource.v"+str(vesselnumber)
+    nmresourcemath.write_resource_dict(thisresourcedata, resourcefilename+".new")
+        
+    # append the restrictions data.
+    restrictionsfo = file(resourcefilename+".new","a")
+    restrictionsfo.write(restrictionsstring)
+    restrictionsfo.close()
+
+    _replace_file(resourcefilename+".new", resourcefilename)
+    resourcefilenames.append(resourcefilename)
+
+    vesselnumber = vesselnumber + 1
+
+  return resourcefilenames
+
+
 def main(vesselcreationlist, tenpercentdict, targetdirectory):
   """
   <Purpose>
@@ -257,53 +406,7 @@ def main(vesselcreationlist, tenpercentdict, targetdirectory):
 
 
   # I'm going to do the resources / restrictions now...
-  onetenth = tenpercentdict.copy()
-  
-  # These are the restrictions that apply to all vessels, they are
-  # not a resource we measure.
-  restrictionsfo = file('vessel.restrictions')
-  restrictionsstring = restrictionsfo.read()
-  restrictionsfo.close()
-
-  # I'll use this to figure out which ports to assign
-  usedpercent = 0
-  vesselnumber = 1
-
-  for item in vesselcreationlist:
-    
-    # the percentcount variable is slightly confusing, up until we have talked
-    # about vessels as haveing 10 or 20 or ... percent of the donated resources.
-    # We restrict vessels to being a multiple of ten so that we do not have to
-    # cut down the donated resources to far (this is an attempt to keep things
-    # simple and avoid getting resources at zero).
-    # percentcount should be an integer between 0 and 10
-    percentcount = item[0] / 10
-    # make a resource file of the right size...
-    size = percentcount
-    thisresourcedata = tenpercentdict.copy()
-    while size > 1:
-      thisresourcedata = nmresourcemath.add(thisresourcedata, onetenth)
-      size = size - 1
-
-    # I need the ports...
-    startpercent = usedpercent
-    endpercent = usedpercent + percentcount
-    # a yucky way of getting the ports.   Should do 63100-63109 for the first,
-    # 63110-63119 for the second, etc.
-    thisresourcedata['messport'] = set(range(63100+10*startpercent, 63100+10*endpercent))
-    thisresourcedata['connport'] = set(range(63100+10*startpercent, 63100+10*endpercent))
-    
-    
-    nmresourcemath.write_resource_dict(thisresourcedata, targetdirectory+"/resource.v"+str(vesselnumber))
-        
-    # append the restrictions data.
-    restrictionsfo = file(targetdirectory+'/resource.v'+str(vesselnumber),"a")
-    restrictionsfo.write(restrictionsstring)
-    restrictionsfo.close()
-
-    # increment the vesselnumber and used percent
-    vesselnumber = vesselnumber + 1
-    usedpercent = usedpercent + percentcount
+  write_resource_files(vesselcreationlist, tenpercentdict, targetdirectory)
 
 
   # Get the directory, if any, that is used for security layers.
@@ -0,0 +1,501 @@
+"""
+<Program Name>
+  donation_planner.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Runs the donation calculations of benchmark_resources.main over a large
+  number of recorded host measurements at once, to answer capacity
+  questions (how many hosts can take a given vessel layout, what each
+  vessel would get) before a rollout.
+
+  For every host this does what an install would do after the benchmark:
+  get_donated_from_maxresources, the subtraction of the offcut costs for
+  every vessel, the InsufficientResourceError check and
+  get_tenpercent_of_donated, followed by the per-vessel resources
+  create_installer_state would write. The calculations are done on NumPy
+  arrays for a chunk of hosts at a time, so millions of hosts can be
+  planned in one run.
+
+  NumPy is only needed by this planner, never by the installer itself.
+  The planner itself only needs resource_vector, not the installer (or the
+  seattle modules it imports).
+
+<Usage>
+  python donation_planner.py hosts.jsonl [plan.jsonl]
+
+  The input is read from a file (or stdin if it is -) and the plan written
+  to a file (or stdout). Files whose names end in .csv are read and written
+  as CSV, anything else as JSON lines.
+
+<Input format>
+  JSON lines, one host per line:
+    {"host": "node1", "resource_percent": 10, "vessels": [50, 50],
+     "max_resources": {"cpu": 2, "memory": 2047868000, ...}}
+
+  CSV, with a header line and one host per line:
+    host,resource_percent,vessels,cpu,memory,...
+    node1,10,50 50,2,2047868000,...
+
+  resource_percent defaults to DEFAULT_RESOURCE_PERCENT. vessels are the
+  vessel percents of the vesselinfo file, which must be multiples of ten
+  adding up to 100 (separated by spaces or semicolons in CSV). Resources
+  that are missing (or empty in CSV) get the value run_benchmark would
+  have used, the one in resource_vector.DEFAULT_MAX_RESOURCE_DICT (not
+  lowered for ARM devices, whatever the planner runs on).
+
+<Output format>
+  JSON lines, one host per line:
+    {"host": "node1", "insufficient": false, "negative_resources": [],
+     "tenpercent": {...}, "vessels": [{...}, {...}]}
+
+  insufficient is true if the install would have raised
+  InsufficientResourceError, in which case vessels is empty. For CSV output
+  there is one line per vessel (or a single line with an empty vessel
+  number for an insufficient host) with the vessel's resources.
+"""
+
+import csv
+import sys
+
+try:
+  import json
+except ImportError:
+  import simplejson as json
+
+import numpy
+
+import resource_vector
+
+
+# The percent of the resources donated if a host does not say.
+DEFAULT_RESOURCE_PERCENT = 10
+
+# The number of hosts whose calculations are done together.
+CHUNK_SIZE = 65536
+
+RESOURCE_NAMES = resource_vector.RESOURCE_NAMES
+
+# The columns whose values stay fractional (cpu), the rest are truncated as
+# int() would.
+_FRACTIONAL_COLUMNS = numpy.array([resource in \
+    resource_vector.FRACTIONAL_RESOURCES for resource in RESOURCE_NAMES])
+
+_EVENTS_COLUMN = list(RESOURCE_NAMES).index("events")
+
+# The offcut costs of a single vessel, as a row.
+_OFFCUT_ROW = numpy.array([resource_vector.DEFAULT_OFFCUT_DICT[resource] \
+                             for resource in RESOURCE_NAMES], dtype=float)
+
+# The values of missing resources, as a row.
+_DEFAULT_ROW = numpy.array(
+    [resource_vector.DEFAULT_MAX_RESOURCE_DICT[resource] \
+       for resource in RESOURCE_NAMES], dtype=float)
+
+
+
+def _truncate(matrix):
+  """
+  <Purpose>
+    Truncate the integer resources of every row towards zero, leaving the
+    fractional ones alone (see resource_vector.ResourceVector.truncate).
+
+  <Arguments>
+    matrix:
+      A NumPy array with one column per resource.
+
+  <Returns>
+    The truncated array.
+  """
+  return numpy.where(_FRACTIONAL_COLUMNS, matrix, numpy.trunc(matrix))
+
+
+
+def plan_donations(max_resources, resource_percents, vesselcounts):
+  """
+  <Purpose>
+    Do the donation, offcut and ten percent calculations of
+    benchmark_resources.main for many hosts at once.
+
+  <Arguments>
+    max_resources:
+      A NumPy array with one row per host and one column per resource in
+      resource_vector.RESOURCE_NAMES, the checked results of run_benchmark.
+
+    resource_percents:
+      A NumPy array with the percent of its resources each host donates.
+
+    vesselcounts:
+      A NumPy array with the number of vessels on each host.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A tuple (tenpercent, negative). tenpercent is an array of ten percent of
+    each host's donated resources after the offcut costs, as returned by
+    get_tenpercent_of_donated. negative is a boolean array, True where the
+    offcut costs left a resource negative; a host with any True in its row
+    would raise InsufficientResourceError.
+  """
+  donated = _truncate(max_resources * (resource_percents / 100.0)[:, None])
+  donated[:, _EVENTS_COLUMN] = 500
+
+  donated -= vesselcounts[:, None] * _OFFCUT_ROW
+  negative = donated < 0
+
+  return _truncate(donated * .1), negative
+
+
+
+def _check_vessels(vessels, host):
+  """
+  <Purpose>
+    Check a vessel layout the way create_installer_state does.
+
+  <Arguments>
+    vessels:
+      The list of vessel percents.
+
+    host:
+      The name of the host, for the error message.
+
+  <Exceptions>
+    ValueError if the layout is invalid.
+
+  <Returns>
+    None
+  """
+  if not vessels:
+    raise ValueError("Host " + str(host) + " has no vessels")
+  for percent in vessels:
+    if percent not in range(10, 101, 10):
+      raise ValueError("Host " + str(host) + " has a vessel of " + \
+                         str(percent) + " percent")
+  if sum(vessels) != 100:
+    raise ValueError("The vessels of host " + str(host) + " add up to " + \
+                       str(sum(vessels)) + " percent")
+
+
+
+def _get_resource_row(max_resources, host):
+  """
+  <Purpose>
+    Turn a host's max resources into a row, filling in the defaults.
+
+  <Arguments>
+    max_resources:
+      A dictionary of resource values, which may be missing resources or
+      have None or an empty string for them.
+
+    host:
+      The name of the host, for the error message.
+
+  <Exceptions>
+    ValueError if a value is not a number.
+
+  <Returns>
+    A list with one float per resource.
+  """
+  row = []
+  for index, resource in enumerate(RESOURCE_NAMES):
+    value = max_resources.get(resource)
+    if value is None or value == "":
+      row.append(_DEFAULT_ROW[index])
+      continue
+    try:
+      row.append(float(value))
+    except ValueError:
+      raise ValueError("Host " + str(host) + " has a bad value for " + \
+                         resource + ": " + str(value))
+  return row
+
+
+
+def read_jsonl_hosts(fileobj):
+  """
+  <Purpose>
+    Read hosts from JSON lines, see the module's input format.
+
+  <Arguments>
+    fileobj:
+      The open file to read.
+
+  <Exceptions>
+    ValueError if a line cannot be parsed.
+
+  <Returns>
+    A generator of (host, resource row, resource percent, vessel list)
+    tuples.
+  """
+  for linenumber, line in enumerate(fileobj):
+    if not line.strip():
+      continue
+    try:
+      record = json.loads(line)
+    except ValueError, e:
+      raise ValueError("Line " + str(linenumber + 1) + ": " + str(e))
+
+    host = record.get("host", linenumber + 1)
+    vessels = [int(percent) for percent in record.get("vessels", [])]
+    _check_vessels(vessels, host)
+    yield (host, _get_resource_row(record.get("max_resources", {}), host),
+           float(record.get("resource_percent", DEFAULT_RESOURCE_PERCENT)),
+           vessels)
+
+
+
+def read_csv_hosts(fileobj):
+  """
+  <Purpose>
+    Read hosts from CSV, see the module's input format.
+
+  <Arguments>
+    fileobj:
+      The open file to read.
+
+  <Exceptions>
+    ValueError if a line cannot be parsed.
+
+  <Returns>
+    A generator of (host, resource row, resource percent, vessel list)
+    tuples.
+  """
+  for linenumber, record in enumerate(csv.DictReader(fileobj)):
+    host = record.get("host") or linenumber + 1
+    vessels = [int(percent) for percent in \
+                 record.get("vessels", "").replace(";", " ").split()]
+    _check_vessels(vessels, host)
+    yield (host, _get_resource_row(record, host),
+           float(record.get("resource_percent") or DEFAULT_RESOURCE_PERCENT),
+           vessels)
+
+
+
+def _to_resource_dict(row):
+  """
+  <Purpose>
+    Convert a row of resources to a resource dictionary, as
+    resource_vector.ResourceVector.to_dict does.
+
+  <Arguments>
+    row:
+      A list with one value per resource.
+
+  <Returns>
+    The dictionary.
+  """
+  resource_dict = {}
+  for resource, value, fractional in zip(RESOURCE_NAMES, row,
+                                         _FRACTIONAL_COLUMNS):
+    if fractional:
+      resource_dict[resource] = value
+    else:
+      resource_dict[resource] = int(value)
+  return resource_dict
+
+
+
+def _plan_chunk(chunk):
+  """
+  <Purpose>
+    Plan a chunk of hosts.
+
+  <Arguments>
+    chunk:
+      A list of (host, resource row, resource percent, vessel list) tuples.
+
+  <Returns>
+    A list with one plan dictionary per host, see the module's output
+    format.
+  """
+  max_resources = numpy.array([host[1] for host in chunk], dtype=float)
+  resource_percents = numpy.array([host[2] for host in chunk], dtype=float)
+  vesselcounts = numpy.array([len(host[3]) for host in chunk], dtype=float)
+
+  tenpercent, negative = plan_donations(max_resources, resource_percents,
+                                        vesselcounts)
+  insufficient = negative.any(axis=1)
+
+  # Every vessel gets a multiple of ten percent of its host's tenpercent,
+  # computed for the vessels of every host in one go.
+  vesselhosts = numpy.repeat(numpy.arange(len(chunk)),
+                             [len(host[3]) for host in chunk])
+  vesselpercents = numpy.array([percent / 10 for host in chunk \
+                                  for percent in host[3]], dtype=float)
+  vesselresources = tenpercent[vesselhosts] * vesselpercents[:, None]
+
+  tenpercentrows = tenpercent.tolist()
+  vesselrows = vesselresources.tolist()
+  plans = []
+  nextvessel = 0
+  for index, (host, row, percent, vessels) in enumerate(chunk):
+    plan = {"host": host,
+            "insufficient": bool(insufficient[index]),
+            "negative_resources": [resource for resource, isnegative \
+                in zip(RESOURCE_NAMES, negative[index]) if isnegative],
+            "tenpercent": _to_resource_dict(tenpercentrows[index]),
+            "vessels": []}
+    if not plan["insufficient"]:
+      for vesselrow in vesselrows[nextvessel:nextvessel + len(vessels)]:
+        plan["vessels"].append(_to_resource_dict(vesselrow))
+    nextvessel += len(vessels)
+    plans.append(plan)
+
+  return plans
+
+
+
+def plan_hosts(hosts):
+  """
+  <Purpose>
+    Plan the vessels of many hosts, CHUNK_SIZE hosts at a time.
+
+  <Arguments>
+    hosts:
+      An iterable of (host, resource row, resource percent, vessel list)
+      tuples, as returned by read_jsonl_hosts or read_csv_hosts.
+
+  <Exceptions>
+    ValueError if the input cannot be parsed.
+
+  <Returns>
+    A generator of plan dictionaries, one per host in the same order, see
+    the module's output format.
+  """
+  chunk = []
+  for host in hosts:
+    chunk.append(host)
+    if len(chunk) == CHUNK_SIZE:
+      for plan in _plan_chunk(chunk):
+        yield plan
+      chunk = []
+
+  if chunk:
+    for plan in _plan_chunk(chunk):
+      yield plan
+
+
+
+def write_jsonl_plans(plans, fileobj):
+  """
+  <Purpose>
+    Write plans as JSON lines.
+
+  <Arguments>
+    plans:
+      An iterable of plan dictionaries.
+
+    fileobj:
+      The open file to write to.
+
+  <Returns>
+    A tuple (number of hosts, number of insufficient hosts).
+  """
+  # sort_keys would make json fall back to its much slower pure Python
+  # encoder.
+  hostcount = insufficientcount = 0
+  for plan in plans:
+    fileobj.write(json.dumps(plan) + "\n")
+    hostcount += 1
+    insufficientcount += plan["insufficient"]
+  return hostcount, insufficientcount
+
+
+
+def write_csv_plans(plans, fileobj):
+  """
+  <Purpose>
+    Write plans as CSV, one line per vessel.
+
+  <Arguments>
+    plans:
+      An iterable of plan dictionaries.
+
+    fileobj:
+      The open file to write to.
+
+  <Returns>
+    A tuple (number of hosts, number of insufficient hosts).
+  """
+  writer = csv.writer(fileobj)
+  writer.writerow(["host", "vessel", "insufficient", "negative_resources"] + \
+                    list(RESOURCE_NAMES))
+
+  hostcount = insufficientcount = 0
+  for plan in plans:
+    hostcount += 1
+    if plan["insufficient"]:
+      insufficientcount += 1
+      writer.writerow([plan["host"], "", 1,
+                       " ".join(plan["negative_resources"])] + \
+                        [""] * len(RESOURCE_NAMES))
+      continue
+    for vesselnumber, vessel in enumerate(plan["vessels"]):
+      writer.writerow([plan["host"], "v" + str(vesselnumber + 1), 0, ""] + \
+                        [vessel[resource] for resource in RESOURCE_NAMES])
+
+  return hostcount, insufficientcount
+
+
+
+def main(inputpath, outputpath="-"):
+  """
+  <Purpose>
+    Plan the hosts in an input file and write the plans to an output file,
+    see the module's usage.
+
+  <Arguments>
+    inputpath:
+      The file to read, or - for stdin.
+
+    outputpath:
+      The file to write, or - for stdout.
+
+  <Exceptions>
+    ValueError if the input cannot be parsed.
+    IOError if a file cannot be opened.
+
+  <Side Effects>
+    Writes the output file.
+
+  <Returns>
+    A tuple (number of hosts, number of insufficient hosts).
+  """
+  if inputpath == "-":
+    inputfile = sys.stdin
+  else:
+    inputfile = open(inputpath, 'r')
+  if outputpath == "-":
+    outputfile = sys.stdout
+  else:
+    outputfile = open(outputpath, 'w')
+
+  try:
+    if inputpath.endswith(".csv"):
+      hosts = read_csv_hosts(inputfile)
+    else:
+      hosts = read_jsonl_hosts(inputfile)
+
+    if outputpath.endswith(".csv"):
+      return write_csv_plans(plan_hosts(hosts), outputfile)
+    return write_jsonl_plans(plan_hosts(hosts), outputfile)
+  finally:
+    if inputfile is not sys.stdin:
+      inputfile.close()
+    if outputfile is not sys.stdout:
+      outputfile.close()
+
+
+
+if __name__ == "__main__":
+  if len(sys.argv) not in (2, 3):
+    print >> sys.stderr, "Usage: donation_planner.py hosts.jsonl|hosts.csv " + \
+        "[plan.jsonl|plan.csv]"
+    sys.exit(1)
+
+  hostcount, insufficientcount = main(*sys.argv[1:])
+  print >> sys.stderr, "Planned " + str(hostcount) + " hosts, " + \
+      str(insufficientcount) + " with insufficient resources."
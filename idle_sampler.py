@@ -0,0 +1,475 @@
+"""
+<Program Name>
+  idle_sampler.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Measures how much of the host is actually left idle, rather than what it
+  has in total. The Linux probes measure the number of processors and the
+  size of RAM, but on a host that already runs other work only part of
+  that is ever spare.
+
+  An IdleSampler reads /proc/stat, /proc/meminfo and /proc/diskstats every
+  interval seconds and keeps the last window seconds of samples in ring
+  buffers of floats:
+
+    cpu_idle: the number of processors' worth of idle time since the
+      previous sample (idle and iowait time, over all processors). These
+      are logical processors, every hyperthread counts.
+    memory_available: the memory available for new work (MemAvailable)
+    disk_busy: the fraction of the time the disk of the install directory
+      was busy with I/O since the previous sample
+
+  get_summary() gives the p50 and p95 of each. Idle capacity is what is
+  left over, so for cpu_idle and memory_available the pN is the amount that
+  is idle at least N percent of the time (the (100 - N)th percentile of the
+  samples), and for disk_busy the fraction the disk is busy at most N
+  percent of the time. Either way the p95 is the cautious figure.
+
+  run_benchmark can sample the host for a while before the probes run
+  (see sample_idle_capacity), and then donates a share of the p95 spare
+  capacity rather than of the totals (see
+  benchmark_resources.apply_idle_capacity). The sampler can also run in a
+  thread of its own for as long as it is needed, see IdleSampler.start.
+
+  Only Linux has the /proc files, elsewhere nothing is sampled.
+"""
+
+import array
+import os
+import threading
+import time
+
+
+# If set, the number of seconds to sample the idle capacity of the host for
+# before benchmarking it, see run_benchmark.
+IDLE_WINDOW_ENV_VAR = "SEATTLE_BENCHMARK_IDLE_WINDOW"
+
+# How often (in seconds) the host is sampled.
+DEFAULT_SAMPLE_INTERVAL = 1.0
+
+# How many seconds of samples are kept.
+DEFAULT_WINDOW = 60.0
+
+# The percentiles get_summary reports.
+SUMMARY_PERCENTILES = (50, 95)
+
+# What is sampled, see the module's purpose.
+SAMPLED_RESOURCES = ("cpu_idle", "memory_available", "disk_busy")
+
+# Devices in /proc/diskstats that are not disks.
+VIRTUAL_DISK_PREFIXES = ("loop", "ram", "zram", "dm-", "md", "sr", "fd")
+
+
+
+class RingBuffer(object):
+  """
+  <Purpose>
+    Keeps the last capacity numbers added to it, in a compact array of
+    floats.
+
+  <Arguments>
+    capacity:
+      The number of values kept, at least 1.
+  """
+
+  def __init__(self, capacity):
+    self.values = array.array('d', [0.0]) * capacity
+    self.capacity = capacity
+    self.count = 0
+    self.next = 0
+
+
+  def append(self, value):
+    """
+    <Purpose>
+      Add a value, replacing the oldest one if the buffer is full.
+
+    <Arguments>
+      value:
+        The number to add.
+
+    <Returns>
+      None
+    """
+    self.values[self.next] = value
+    self.next = (self.next + 1) % self.capacity
+    self.count = min(self.count + 1, self.capacity)
+
+
+  def __len__(self):
+    return self.count
+
+
+  def get_percentile(self, percentile):
+    """
+    <Purpose>
+      Get a percentile of the values, by the nearest rank.
+
+    <Arguments>
+      percentile:
+        The percentile, from 0 to 100.
+
+    <Returns>
+      The value at the percentile, or None if the buffer is empty.
+    """
+    if self.count == 0:
+      return None
+    sortedvalues = sorted(self.values[:self.count])
+    index = int(round(percentile / 100.0 * (self.count - 1)))
+    return sortedvalues[index]
+
+
+
+def _read_cpu_times():
+  """
+  <Purpose>
+    Read the time all the processors spent idle and in total from the cpu
+    line of /proc/stat.
+
+  <Exceptions>
+    IOError or ValueError if /proc/stat cannot be read.
+
+  <Returns>
+    An (idle, total, number of processors) tuple, the times in clock ticks.
+  """
+  idle = None
+  total = None
+  cpus = 0
+  openfile = open("/proc/stat", 'r')
+  try:
+    for line in openfile:
+      if not line.startswith("cpu"):
+        continue
+      fields = line.split()
+      if fields[0] == "cpu":
+        # example value for the cpu line of /proc/stat, the fields are
+        # user nice system idle iowait irq softirq steal guest guest_nice
+        # ['cpu', '4705', '356', '584', '3699176', '23060', '0', '277', ...]
+        times = [long(field) for field in fields[1:]]
+        # guest time is already counted in user time.
+        total = sum(times[:8])
+        idle = sum(times[3:5])
+      else:
+        cpus += 1
+  finally:
+    openfile.close()
+
+  if total is None:
+    raise ValueError("no cpu line in /proc/stat")
+  return (idle, total, cpus or 1)
+
+
+
+def _read_available_memory():
+  """
+  <Purpose>
+    Read the memory available for new work from /proc/meminfo. Kernels
+    older than 3.14 have no MemAvailable, it is estimated from the free
+    memory and the caches there.
+
+  <Exceptions>
+    IOError or ValueError if /proc/meminfo cannot be read.
+
+  <Returns>
+    The available memory in bytes, counting 1000 bytes to the kB like
+    Linux_resources.get_memory.
+  """
+  fields = {}
+  openfile = open("/proc/meminfo", 'r')
+  try:
+    for line in openfile:
+      splitline = line.split()
+      if len(splitline) >= 2:
+        fields[splitline[0].rstrip(":")] = long(splitline[1])
+  finally:
+    openfile.close()
+
+  if "MemAvailable" in fields:
+    return fields["MemAvailable"] * 1000
+  return (fields["MemFree"] + fields.get("Buffers", 0) + \
+          fields.get("Cached", 0)) * 1000
+
+
+
+def _read_disk_ticks(device):
+  """
+  <Purpose>
+    Read how long a disk has spent doing I/O from /proc/diskstats.
+
+  <Arguments>
+    device:
+      The (major, minor) numbers of the disk, or None for the busiest of
+      all the disks.
+
+  <Exceptions>
+    IOError or ValueError if /proc/diskstats cannot be read.
+
+  <Returns>
+    A dictionary mapping the name of each disk read to its I/O time in
+    milliseconds.
+  """
+  ticks = {}
+  openfile = open("/proc/diskstats", 'r')
+  try:
+    for line in openfile:
+      # example value for a line of /proc/diskstats, the 13th field is the
+      # time spent doing I/O
+      # ['8', '1', 'sda1', '3371', '1162', ..., '7988', '12292', ...]
+      fields = line.split()
+      if len(fields) < 13:
+        continue
+      if device is not None:
+        if (int(fields[0]), int(fields[1])) == device:
+          ticks[fields[2]] = long(fields[12])
+      else:
+        for prefix in VIRTUAL_DISK_PREFIXES:
+          if fields[2].startswith(prefix):
+            break
+        else:
+          ticks[fields[2]] = long(fields[12])
+  finally:
+    openfile.close()
+  return ticks
+
+
+
+class IdleSampler(object):
+  """
+  <Purpose>
+    Samples the idle capacity of the host, see the module's purpose.
+
+  <Arguments>
+    interval:
+      How often (in seconds) to take a sample.
+
+    window:
+      How many seconds of samples to keep.
+
+    path:
+      A path on the disk whose busy time is sampled. If its device is not
+      in /proc/diskstats the busiest disk is used.
+  """
+
+  def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL, window=DEFAULT_WINDOW,
+               path="."):
+    self.interval = interval
+    capacity = max(int(window / interval), 1)
+    self.buffers = {}
+    for resource in SAMPLED_RESOURCES:
+      self.buffers[resource] = RingBuffer(capacity)
+
+    self.device = None
+    try:
+      devicenumber = os.stat(path).st_dev
+      self.device = (os.major(devicenumber), os.minor(devicenumber))
+      if not _read_disk_ticks(self.device):
+        self.device = None
+    except (OSError, IOError, ValueError):
+      self.device = None
+
+    self.previous = None
+    self.lock = threading.Lock()
+    self.stopped = threading.Event()
+    self.thread = None
+
+
+  def _read_counters(self):
+    return (time.time(), _read_cpu_times(), _read_disk_ticks(self.device))
+
+
+  def sample(self):
+    """
+    <Purpose>
+      Take a sample. The first one only reads the counters that the
+      following ones are compared with.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      IOError or ValueError if the /proc files cannot be read.
+
+    <Returns>
+      None
+    """
+    counters = self._read_counters()
+    memory = _read_available_memory()
+
+    self.lock.acquire()
+    try:
+      previous = self.previous
+      self.previous = counters
+      self.buffers["memory_available"].append(memory)
+      if previous is None:
+        return
+
+      now, (idle, total, cpus), diskticks = counters
+      then, (previousidle, previoustotal, previouscpus), previousticks = \
+          previous
+      if total > previoustotal:
+        self.buffers["cpu_idle"].append(cpus * float(idle - previousidle) / \
+                                        (total - previoustotal))
+
+      elapsed = (now - then) * 1000
+      busy = 0.0
+      for disk in diskticks:
+        if disk in previousticks and elapsed > 0:
+          busy = max(busy, (diskticks[disk] - previousticks[disk]) / elapsed)
+      self.buffers["disk_busy"].append(min(busy, 1.0))
+    finally:
+      self.lock.release()
+
+
+  def sample_for(self, duration):
+    """
+    <Purpose>
+      Take a sample every interval seconds for a while.
+
+    <Arguments>
+      duration:
+        The number of seconds to sample for.
+
+    <Exceptions>
+      IOError or ValueError if the /proc files cannot be read.
+
+    <Side Effects>
+      Sleeps for duration seconds.
+
+    <Returns>
+      None
+    """
+    endtime = time.time() + duration
+    self.sample()
+    while time.time() + self.interval <= endtime:
+      time.sleep(self.interval)
+      self.sample()
+
+
+  def _run(self):
+    while not self.stopped.isSet():
+      try:
+        self.sample()
+      except (IOError, ValueError):
+        pass
+      self.stopped.wait(self.interval)
+
+
+  def start(self):
+    """
+    <Purpose>
+      Keep sampling in a thread until stop() is called.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      Starts a daemon thread.
+
+    <Returns>
+      None
+    """
+    self.stopped.clear()
+    self.thread = threading.Thread(target=self._run)
+    self.thread.setDaemon(True)
+    self.thread.start()
+
+
+  def stop(self):
+    """
+    <Purpose>
+      Stop the thread started by start().
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Returns>
+      None
+    """
+    self.stopped.set()
+    if self.thread is not None:
+      self.thread.join()
+      self.thread = None
+
+
+  def get_summary(self):
+    """
+    <Purpose>
+      Summarize the samples kept, see the module's purpose.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A dictionary mapping each of SAMPLED_RESOURCES to a dictionary with
+      its "p50" and "p95" (None without samples) and its number of
+      "samples".
+    """
+    summary = {}
+    self.lock.acquire()
+    try:
+      for resource in SAMPLED_RESOURCES:
+        buffer = self.buffers[resource]
+        summary[resource] = {"samples": len(buffer)}
+        for percentile in SUMMARY_PERCENTILES:
+          if resource == "disk_busy":
+            value = buffer.get_percentile(percentile)
+          else:
+            value = buffer.get_percentile(100 - percentile)
+          summary[resource]["p" + str(percentile)] = value
+    finally:
+      self.lock.release()
+    return summary
+
+
+
+def sample_idle_capacity(window, logfileobj, path="."):
+  """
+  <Purpose>
+    Sample the idle capacity of the host for a while, for run_benchmark.
+
+  <Arguments>
+    window:
+      The number of seconds to sample for.
+
+    logfileobj:
+      The open file object used for logging.
+
+    path:
+      A path on the disk whose busy time is sampled.
+
+  <Exceptions>
+    None, nothing is sampled where the /proc files cannot be read.
+
+  <Side Effects>
+    Takes window seconds.
+
+  <Returns>
+    The summary of the samples (see IdleSampler.get_summary), or None if
+    the host could not be sampled.
+  """
+  sampler = IdleSampler(min(DEFAULT_SAMPLE_INTERVAL, window / 2.0), window,
+                        path)
+  logfileobj.write("Sampling the idle capacity of the host for " + \
+                   str(window) + " seconds.\n")
+  try:
+    sampler.sample_for(window)
+  except (IOError, ValueError), e:
+    logfileobj.write("Unable to sample the idle capacity of the host: " + \
+                     str(e) + "\n")
+    return None
+
+  summary = sampler.get_summary()
+  logfileobj.write("Idle capacity of the host: " + str(summary) + "\n")
+  return summary
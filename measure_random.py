@@ -19,6 +19,8 @@ import nonportable
 import os
 import time
 
+import benchmark_measurement
+
 class InvalidTimeMeasurementError(Exception):
   pass
 
@@ -104,6 +106,39 @@ def measure_random():
     The number of random bytes per second that were generated.
   """  
 
+  return benchmark_random().value
+
+
+
+def benchmark_random(time_limit=None, throttle=None):
+  """
+  <Purpose>
+    Same as measure_random, but the benchmark can be given a time limit
+    (see probe_registry). If it runs out of time, the rate is estimated from
+    the tests that did complete.
+  
+  <Arguments>
+    time_limit:
+        The maximum number of seconds to spend, or None for no limit.
+
+    throttle:
+        Optional benchmark_lowimpact.Throttle to pause the tests with in
+        low-impact mode. The rate is scaled by its correction.
+ 
+  <Side Effects>
+    Makes a call to OS specific random number generator.
+
+  <Exceptions>
+    InvalidTimeMeasurementError:
+        The system may generate numbers much faster than its clock
+        has granularity.
+        
+  <Returns>
+    A benchmark_measurement.Measurement of the number of random bytes per
+    second that were generated, marked as degraded if the time limit was
+    reached. Its samples are the times taken by the individual tests.
+  """  
+
   # 7 is the smallest number of bytes that can be called from urandom
   # and any time.
   num_of_bytes = 7 
@@ -113,14 +148,29 @@ def measure_random():
 
   # Fallback start time, in case OSRNG is to fast for time.time()
   starttime = get_time()
+  pausedtime = 0.0
   
   for i in range(num_of_tests):
     result = urandom_measurement(num_of_bytes)  
     data.append(result)
+
+    if time_limit is not None and get_time() - starttime > time_limit:
+      break
+
+    if throttle is not None:
+      pausedtime += throttle.pause()
   
   # This will be used in the event no data was gathered from individual
   # tests
-  totaltime = get_time() - starttime
+  totaltime = get_time() - starttime - pausedtime
+
+  # Keep the raw timings, in the order they were taken, for telemetry.
+  measurement = benchmark_measurement.Measurement(None, samples=list(data),
+                                                  sample_size=num_of_bytes)
+  if len(data) < num_of_tests:
+    measurement.degraded = True
+    measurement.reason = "time limit reached after " + str(len(data)) + \
+        " of " + str(num_of_tests) + " tests"
 
   # Attempt to get the median
   data.sort()
@@ -133,18 +183,23 @@ def measure_random():
   #   2) will use the time required for the entire test, if that fails
   #   3) will raise an exception and the test will have failed.
   if median != 0.0:
-    return int(num_of_bytes/median)
+    measurement.value = int(num_of_bytes/median)
   
   elif totaltime != 0.0:
     # No useful time measurement was taken for an individual tests,
     # so we will use the time required to perform the entire test.
-    return int((num_of_bytes * num_of_tests) / totaltime)
+    measurement.value = int((num_of_bytes * len(data)) / totaltime)
   
   else:
     # The number of tests per time measurement should be increased.
     # Will require that num_of_bytes or num_of_tests be increased.
     raise InvalidTimeMeasurementError("os.urandom generated bytes to quickly for valid time measurement") 
 
+  if throttle is not None:
+    measurement.value = int(measurement.value * throttle.get_correction())
+
+  return measurement
+
 
 if __name__ == "__main__":
   print measure_random()
@@ -20,6 +20,8 @@ import os
 # Used to determine the os type and for getruntime.
 import nonportable
 
+import benchmark_measurement
+
 # Get the ctypes stuff so we can call libc.sync() instead of using subprocces.
 # We want to do all the importing and such here so that it doesn't muck with
 # the timing.  These things don't seem to be available on Windows, so we will
@@ -36,7 +38,14 @@ if nonportable.osrealtype == 'Linux':
   libc = ctypes.CDLL(ctypes.util.find_library("c"))
 
 
-def measure_write(write_file_obj, blocksize, totalbytes, use_sync=False):
+# measure_write looks at the clock after writing this many bytes, to record
+# a sample and check the time limit. Doing it after every write would slow
+# down the writes being timed.
+SAMPLE_INTERVAL = 256
+
+
+def measure_write(write_file_obj, blocksize, totalbytes, use_sync=False,
+                  time_limit=None, throttle=None):
   """
   <Purpose>
     Attempts to measure the disk write rate by writing totalbytes bytes to a
@@ -44,6 +53,10 @@ def measure_write(write_file_obj, blocksize, totalbytes, use_sync=False):
     written), timing how long it took, and dividing num_bytes by the time
     to get the write rate.
 
+    If a time limit is given and reached, writing stops early and the rate
+    is calculated from the bytes written so far. The time taken to write
+    each SAMPLE_INTERVAL bytes is recorded as a sample.
+
   <Arguments>
     write_file - The file to be written to.  This should be an already opened
                  file handle that was opened with write access.
@@ -56,8 +69,15 @@ def measure_write(write_file_obj, blocksize, totalbytes, use_sync=False):
                actually written to disk.  Should not be set to True on
                Windows because sync does not exist there.  Defaults to False.
 
+    time_limit - The maximum number of seconds to spend writing, or None for
+                 no limit.
+
+    throttle - Optional benchmark_lowimpact.Throttle to pause the writing
+               with after every sample in low-impact mode. The pauses are
+               left out of the rate and the samples.
+
   <Side Effects>
-    Creates a file of size totalbytes.
+    Creates a file of size totalbytes (or less if the time limit is reached).
 
   <Exceptions>
     Exceptions could be thrown if there is a problem opening/writing the file.
@@ -66,25 +86,46 @@ def measure_write(write_file_obj, blocksize, totalbytes, use_sync=False):
     a fast drive in combination with a time that provided poor granularity.
 
   <Return>
-    A tuple (rate, fn) where rate is the measured write rate, and fn is the 
-    name of the file created.  It is up to the caller to ensure that this 
-    file is deleted.  We do not delete it here because it will likely be 
-    useful in doing the read rate measurments.
+    A tuple (rate, byteswritten, samples) where rate is the measured write
+    rate, byteswritten is the number of bytes actually written, which is
+    less than totalbytes if the time limit was reached, and samples is a
+    list of the seconds taken by each SAMPLE_INTERVAL bytes.  It is up to
+    the caller to ensure that the file is deleted.  We do not delete it here
+    because it will likely be useful in doing the read rate measurments.
   """
   
+  byteswritten = 0
+  samples = []
   start_time = nonportable.getruntime()
+  sample_start_time = start_time
+  paused_time = 0.0
  
   for trial in range(0, totalbytes, blocksize):
     write_file_obj.write(' ' * blocksize)
+    byteswritten += blocksize
     #write_file_obj.flush()
     #if use_sync:
     #  # Only use sync if it is requested. See comment at import for explanation.
     #  libc.sync()
 
+    if byteswritten % SAMPLE_INTERVAL == 0:
+      sample_end_time = nonportable.getruntime()
+      samples.append(sample_end_time - sample_start_time)
+      sample_start_time = sample_end_time
+
+      if time_limit is not None and sample_end_time - start_time > time_limit:
+        break
+
+      if throttle is not None:
+        paused = throttle.pause()
+        paused_time += paused
+        sample_start_time += paused
+
   write_file_obj.flush()
   end_time = nonportable.getruntime()
 
-  return (totalbytes)/(end_time - start_time)
+  return (byteswritten/(end_time - start_time - paused_time), byteswritten,
+          samples)
 
 
 def measure_read(read_file_obj, blocksize):
@@ -156,6 +197,34 @@ def main():
     A tuple containing the write rate and the read rate for the hard drive
     (in bytes/sec) where this program is run from. 
   """
+  return benchmark_disk().value
+
+
+
+def benchmark_disk(time_limit=None, throttle=None):
+  """
+  <Purpose>
+    Same as main, but the benchmark can be given a time limit (see
+    probe_registry). If it runs out of time, the rates are calculated from
+    the data written so far.
+  
+  <Arguements>
+    time_limit: The maximum number of seconds to spend, or None for no limit.
+
+    throttle: Optional benchmark_lowimpact.Throttle to pause the writing
+      with in low-impact mode. The rates are scaled by its correction.
+  
+  <Exceptions>
+    Same as main.
+  
+  <Side Effects>
+    Same as main.
+    
+  <Return>
+    A benchmark_measurement.Measurement whose value is a tuple containing
+    the write rate and the read rate, marked as degraded if the time limit
+    was reached. Its samples are those recorded by measure_write.
+  """
   # blocksize: the size in bytes of data to write or read at a time
   # (the amount of data to write before a flush/sync is called).
   # 1 byte was chosen because in testing it produced the slowest write
@@ -183,9 +252,11 @@ def main():
       # Anthony - I have not been able to measure the benefit of using
       # 'libc' on a linux system, until I am able explore the linux
       # specific advantage of performing this we will not use it.
-      write_rate = measure_write(write_file_obj, blocksize, totalbytes, False)
+      write_rate, byteswritten, samples = measure_write(write_file_obj,
+          blocksize, totalbytes, False, time_limit, throttle)
     else:
-      write_rate = measure_write(write_file_obj, blocksize, totalbytes)
+      write_rate, byteswritten, samples = measure_write(write_file_obj,
+          blocksize, totalbytes, time_limit=time_limit, throttle=throttle)
       
     write_file_obj.close()
   
@@ -195,12 +266,23 @@ def main():
   finally:
     os.remove(write_file_obj.name)
 
+  if throttle is not None:
+    write_rate *= throttle.get_correction()
+
   # Currently the read rate measurement is ridiculusly high, likely because
   # we are reading something that we just wrote.  Because it would be 
   # non-trivial to get an accurate read rate, we feel it is safe enough to
   # assume that the read and write rates are the same, so we just print out
   # the write_rate here as well.
-  return int(write_rate), int(write_rate)
+  measurement = benchmark_measurement.Measurement(
+      (int(write_rate), int(write_rate)), samples=samples,
+      sample_size=SAMPLE_INTERVAL)
+  if byteswritten < totalbytes:
+    measurement.degraded = True
+    measurement.reason = "time limit reached after writing " + \
+        str(byteswritten) + " of " + str(totalbytes) + " bytes"
+
+  return measurement
   
 if __name__ == '__main__':
 
@@ -0,0 +1,239 @@
+"""
+<Program Name>
+  numa_placement.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Keeps the processors and memory of every vessel on a single NUMA node.
+  On a host with several nodes, a vessel whose processes run on one node
+  but whose memory is on another pays for every access to it, and how much
+  depends on where the kernel happened to put things, which makes the
+  vessel's performance unpredictable.
+
+  Every node has its own cores and memory (see
+  Linux_resources.get_numa_nodes). A vessel of N percent gets N tenths of
+  ten percent of the donated cpu and memory (see
+  benchmark_resources.get_tenpercent_dict), and place_vessels assigns every
+  vessel to a node with that many cores and that much memory left, the
+  largest vessels first. The donation is only a part of the host, so the
+  vessels usually fit as they are. Only when they cannot all be placed that
+  way (a vessel with more cores than any one node has, say) are the cpu and
+  memory of every vessel scaled down, by as little as possible, until they
+  can.
+
+  The placement is written to the results of the benchmark service (see
+  benchmark_service), as the numa_node of every vessel, for whatever starts
+  the vessels to bind them to their nodes.
+
+  Only Linux describes its NUMA nodes (see Linux_resources.get_numa_nodes),
+  and a host with a single node needs no placement, so elsewhere nothing is
+  placed. Nor is anything placed when no node has both cores this process
+  may use (in its cgroup's cpuset) and memory, as no vessel could be kept
+  on a single node.
+"""
+
+import platform
+
+
+# If set to anything but an empty string or 0, the donation keeps every
+# vessel on a single NUMA node, see benchmark_resources.main.
+NUMA_LOCAL_ENV_VAR = "SEATTLE_BENCHMARK_NUMA_LOCAL"
+
+# How closely the scale of the vessels is searched for.
+SCALE_PRECISION = 0.001
+
+# Relative slack for the rounding of the vessels' cpu and memory.
+CAPACITY_EPSILON = 1e-9
+
+
+
+def _get_fraction_left(remaining, totalcores, totalmemory):
+  """
+  <Purpose>
+    Get how much of a node is left, as the smaller of the fractions of all
+    the host's cores and all its memory that it has left.
+
+  <Returns>
+    The fraction, between 0 and 1.
+  """
+  return min(remaining[0] / float(totalcores),
+             remaining[1] / float(totalmemory))
+
+
+
+def _assign(numa_nodes, vesselneeds, scale):
+  """
+  <Purpose>
+    Try to give every vessel a node with enough cores and memory left, the
+    largest vessels first, each on the node with the most left.
+
+  <Arguments>
+    numa_nodes:
+      The nodes, as returned by Linux_resources.get_numa_nodes.
+
+    vesselneeds:
+      A list with the (cpu, memory) of every vessel.
+
+    scale:
+      What the cpu and memory of every vessel are scaled by.
+
+  <Returns>
+    A list with the node number of every vessel, or None if they do not
+    all fit.
+  """
+  remaining = []
+  totalcores = 0
+  totalmemory = 0
+  for node in numa_nodes:
+    remaining.append([float(node["cores"]), float(node["memory"])])
+    totalcores += node["cores"]
+    totalmemory += node["memory"]
+
+  order = range(len(vesselneeds))
+  order.sort(key=lambda index: (-vesselneeds[index][0],
+                                 -vesselneeds[index][1]))
+
+  placement = [None] * len(vesselneeds)
+  for index in order:
+    cpu = vesselneeds[index][0] * scale
+    memory = vesselneeds[index][1] * scale
+    best = None
+    for nodeindex in range(len(numa_nodes)):
+      # A node without cores or memory can have nothing placed on it.
+      if numa_nodes[nodeindex]["cores"] <= 0 or \
+          numa_nodes[nodeindex]["memory"] <= 0:
+        continue
+      leftcpu, leftmemory = remaining[nodeindex]
+      if cpu > leftcpu * (1 + CAPACITY_EPSILON) or \
+          memory > leftmemory * (1 + CAPACITY_EPSILON):
+        continue
+      if best is None or \
+          _get_fraction_left(remaining[nodeindex], totalcores, totalmemory) > \
+          _get_fraction_left(remaining[best], totalcores, totalmemory):
+        best = nodeindex
+    if best is None:
+      return None
+    remaining[best][0] -= cpu
+    remaining[best][1] -= memory
+    placement[index] = numa_nodes[best]["node"]
+
+  return placement
+
+
+
+def place_vessels(numa_nodes, vesselcreationlist, tenpercentdict):
+  """
+  <Purpose>
+    Assign every vessel to a NUMA node, see the module's purpose.
+
+  <Arguments>
+    numa_nodes:
+      The nodes, as returned by Linux_resources.get_numa_nodes. There
+      must be at least one.
+
+    vesselcreationlist:
+      The list of vessels, see create_installer_state.main.
+
+    tenpercentdict:
+      Ten percent of the donated resources, as returned by
+      benchmark_resources.get_tenpercent_dict. Only its cpu (in cores) and
+      memory (in bytes) are used.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A (scale, placement) tuple, or None if no node has both cores and
+    memory. scale is what the cpu and memory of every vessel must be scaled
+    by for the placement to work, at most 1.
+    placement is a list with the node number of every vessel, in the order
+    of the vessels.
+  """
+  vesselneeds = []
+  for item in vesselcreationlist:
+    vesselneeds.append((tenpercentdict["cpu"] * item[0] / 10.0,
+                        tenpercentdict["memory"] * item[0] / 10.0))
+
+  placement = _assign(numa_nodes, vesselneeds, 1.0)
+  if placement is not None:
+    return (1.0, placement)
+
+  # The largest scale that works, to within SCALE_PRECISION. A small enough
+  # scale always works, as long as some node has cores and memory.
+  low = 0.0
+  high = 1.0
+  lowplacement = _assign(numa_nodes, vesselneeds, SCALE_PRECISION / 2)
+  while high - low > SCALE_PRECISION:
+    middle = (low + high) / 2
+    middleplacement = _assign(numa_nodes, vesselneeds, middle)
+    if middleplacement is None:
+      high = middle
+    else:
+      low = middle
+      lowplacement = middleplacement
+
+  if lowplacement is None:
+    # No node has both, so nothing can be kept on a single node.
+    return None
+  return (low, lowplacement)
+
+
+
+def get_numa_placement(vesselcreationlist, tenpercentdict, logfileobj):
+  """
+  <Purpose>
+    Read the NUMA nodes of this host and place the vessels on them, see
+    the module's purpose.
+
+  <Arguments>
+    vesselcreationlist:
+      The list of vessels, see create_installer_state.main.
+
+    tenpercentdict:
+      Ten percent of the donated resources, see place_vessels.
+
+    logfileobj:
+      The open file object used for logging.
+
+  <Exceptions>
+    None, the vessels are not placed if the nodes cannot be read.
+
+  <Returns>
+    A (scale, placement, nodes) tuple, see place_vessels for the first two
+    and Linux_resources.get_numa_nodes for the nodes, or None if the host
+    has fewer than two nodes, they cannot be read or the vessels cannot be
+    placed on them.
+  """
+  if platform.system() != "Linux":
+    logfileobj.write("The NUMA nodes cannot be read here, the vessels " + \
+                     "are not placed on them.\n")
+    return None
+
+  # Linux_resources only imports on Linux.
+  import Linux_resources
+  try:
+    numa_nodes = Linux_resources.get_numa_nodes()
+  except Exception, e:
+    logfileobj.write("Unable to read the NUMA nodes, the vessels are not " + \
+                     "placed on them: " + str(e) + "\n")
+    return None
+
+  if len(numa_nodes) < 2:
+    logfileobj.write("The host has a single NUMA node, the vessels are " + \
+                     "not placed.\n")
+    return None
+
+  logfileobj.write("NUMA nodes: " + str(numa_nodes) + "\n")
+  result = place_vessels(numa_nodes, vesselcreationlist, tenpercentdict)
+  if result is None:
+    logfileobj.write("No NUMA node has both cores and memory for the " + \
+                     "vessels, they are not placed on them.\n")
+    return None
+
+  scale, placement = result
+  logfileobj.write("Vessels placed on NUMA nodes " + str(placement) + \
+                   ", their cpu and memory scaled by " + \
+                   str(scale) + ".\n")
+  return (scale, placement, numa_nodes)
@@ -0,0 +1,238 @@
+"""
+<Program Name>
+  offcut_calibration.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Measures what a vessel costs the host, so that the install can take the
+  offcut of the vessels (see benchmark_resources.DEFAULT_OFFCUT_DICT) from
+  the donation with numbers measured on the host rather than the same
+  guess everywhere.
+
+  calibrate_offcut starts one idle stand-in for a sandbox for every vessel:
+  a Python interpreter like the one the vessels run in, that loads the
+  modules a sandbox loads, keeps a monitoring thread and a log file open
+  and otherwise waits. Once they have settled it measures, for every one of
+  them:
+
+    memory: its resident set size, in bytes
+    filesopened: the number of file descriptors it has open
+    cpu: the fraction of a processor it used while idle
+    lograte: the bytes per second it wrote to its log
+
+  The offcut of a vessel is the average over the stand-ins, so that the
+  total for all the vessels is what they used together. A resource that
+  cannot be measured on this host, or that is used too little to register
+  (the processor time is only counted in ticks), keeps its value in
+  DEFAULT_OFFCUT_DICT, as does everything that is not measured here.
+
+  The measurements are read from /proc, so the calibration is only done on
+  Linux. Elsewhere DEFAULT_OFFCUT_DICT is used as it is.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmark_resources
+
+
+# If set to anything but an empty string or 0, installs calibrate the
+# offcut of the vessels, see benchmark_resources.main.
+CALIBRATE_OFFCUT_ENV_VAR = "SEATTLE_BENCHMARK_CALIBRATE_OFFCUT"
+
+# How long (in seconds) the stand-ins are given to start up before they
+# are measured.
+CALIBRATION_SETTLE_TIME = 1.0
+
+# How long (in seconds) the processor time and the log output of the
+# stand-ins are measured for.
+CALIBRATION_INTERVAL = 2.0
+
+# The resources that are measured.
+CALIBRATED_RESOURCES = ("cpu", "memory", "filesopened", "lograte")
+
+# The idle stand-in for a sandbox. It is given the path of its log file.
+STANDIN_SOURCE = """
+import os, random, socket, sys, threading, time, traceback
+logfileobj = open(sys.argv[1], "a")
+logfileobj.write("Starting idle vessel %d\\n" % os.getpid())
+logfileobj.flush()
+def monitor():
+  while True:
+    time.sleep(0.5)
+monitorthread = threading.Thread(target=monitor)
+monitorthread.setDaemon(True)
+monitorthread.start()
+sys.stdin.read()
+"""
+
+
+
+def _read_process(pid):
+  """
+  <Purpose>
+    Read the resident set size, the open file descriptors and the processor
+    time of a process from /proc.
+
+  <Arguments>
+    pid:
+      The process id.
+
+  <Exceptions>
+    IOError, OSError or ValueError if the process cannot be read.
+
+  <Returns>
+    A (rss in bytes, number of file descriptors, processor time in seconds)
+    tuple.
+  """
+  rss = None
+  statusfile = open("/proc/" + str(pid) + "/status")
+  try:
+    for line in statusfile:
+      if line.startswith("VmRSS:"):
+        rss = int(line.split()[1]) * 1024
+  finally:
+    statusfile.close()
+  if rss is None:
+    raise ValueError("no VmRSS for process " + str(pid))
+
+  descriptors = len(os.listdir("/proc/" + str(pid) + "/fd"))
+
+  statfile = open("/proc/" + str(pid) + "/stat")
+  try:
+    # The command name may contain spaces, the fields after it do not.
+    fields = statfile.read().rsplit(")", 1)[1].split()
+  finally:
+    statfile.close()
+  # utime and stime, the 14th and 15th fields.
+  ticks = int(fields[11]) + int(fields[12])
+
+  return (rss, descriptors, float(ticks) / os.sysconf("SC_CLK_TCK"))
+
+
+
+def measure_vessels(vesselcount):
+  """
+  <Purpose>
+    Start an idle stand-in for every vessel and measure what they use, see
+    the module's purpose.
+
+  <Arguments>
+    vesselcount:
+      The number of vessels, at least one.
+
+  <Exceptions>
+    IOError, OSError or ValueError if a stand-in cannot be started or
+    measured.
+
+  <Side Effects>
+    Runs vesselcount processes for CALIBRATION_SETTLE_TIME +
+    CALIBRATION_INTERVAL seconds.
+
+  <Returns>
+    A dictionary with the average use of a stand-in of each resource in
+    CALIBRATED_RESOURCES, in the units of a resource file. The cpu and
+    lograte are None if they were too small to measure.
+  """
+  tempdir = tempfile.mkdtemp(prefix="offcut_calibration")
+  processes = []
+  try:
+    for vesselnumber in range(vesselcount):
+      logpath = os.path.join(tempdir, "v" + str(vesselnumber + 1) + ".log")
+      processes.append((subprocess.Popen([sys.executable, "-c",
+                                          STANDIN_SOURCE, logpath],
+                                         stdin=subprocess.PIPE,
+                                         close_fds=True), logpath))
+
+    time.sleep(CALIBRATION_SETTLE_TIME)
+    before = []
+    for process, logpath in processes:
+      before.append((_read_process(process.pid)[2],
+                     os.path.getsize(logpath)))
+    starttime = time.time()
+
+    time.sleep(CALIBRATION_INTERVAL)
+    totalrss = 0
+    totaldescriptors = 0
+    totalcputime = 0.0
+    totallogbytes = 0
+    for index in range(vesselcount):
+      process, logpath = processes[index]
+      rss, descriptors, cputime = _read_process(process.pid)
+      totalrss += rss
+      totaldescriptors += descriptors
+      totalcputime += cputime - before[index][0]
+      totallogbytes += os.path.getsize(logpath) - before[index][1]
+    elapsed = time.time() - starttime
+
+  finally:
+    for process, logpath in processes:
+      try:
+        process.stdin.close()
+        process.wait()
+      except (IOError, OSError):
+        pass
+    shutil.rmtree(tempdir, ignore_errors=True)
+
+  measured = {"memory": totalrss / vesselcount,
+              "filesopened": int(round(float(totaldescriptors) / vesselcount)),
+              "cpu": None,
+              "lograte": None}
+  if totalcputime > 0:
+    measured["cpu"] = totalcputime / elapsed / vesselcount
+  if totallogbytes > 0:
+    measured["lograte"] = int(totallogbytes / elapsed / vesselcount) + 1
+  return measured
+
+
+
+def calibrate_offcut(vesselcount, logfileobj):
+  """
+  <Purpose>
+    Get the offcut of a vessel measured on this host, see the module's
+    purpose.
+
+  <Arguments>
+    vesselcount:
+      The number of vessels the donation is split into.
+
+    logfileobj:
+      The open file object used for logging.
+
+  <Exceptions>
+    None, DEFAULT_OFFCUT_DICT is used if the calibration fails.
+
+  <Side Effects>
+    See measure_vessels.
+
+  <Returns>
+    A (offcut dictionary, measurements) tuple. The offcut dictionary has
+    the same keys as DEFAULT_OFFCUT_DICT. The measurements are those of
+    measure_vessels, or None if nothing was measured.
+  """
+  offcut_dict = benchmark_resources.DEFAULT_OFFCUT_DICT.copy()
+
+  if not sys.platform.startswith("linux") or vesselcount < 1:
+    logfileobj.write("The offcut of the vessels cannot be calibrated " + \
+                     "here, using the defaults.\n")
+    return (offcut_dict, None)
+
+  try:
+    measured = measure_vessels(vesselcount)
+  except (IOError, OSError, ValueError), e:
+    logfileobj.write("Calibrating the offcut of the vessels failed, using " + \
+                     "the defaults: " + str(e) + "\n")
+    return (offcut_dict, None)
+
+  for resource in CALIBRATED_RESOURCES:
+    if measured[resource] is not None:
+      offcut_dict[resource] = measured[resource]
+
+  logfileobj.write("Measured offcut of a vessel: " + str(measured) + "\n")
+  return (offcut_dict, measured)
@@ -0,0 +1,196 @@
+"""
+<Program Name>
+  probe_accounting.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Measures what running a benchmark probe costs the machine, so that the
+  probes that are too heavy for small devices can be found and the sizes
+  of the timing probes (num_of_tests in measure_random, totalbytes in
+  measuredisk) can be tuned with real numbers.
+
+  probe_executor takes a snapshot of the process's resource usage before
+  and after every probe and stores the difference in the probe's
+  Measurement as its cost, a dictionary of:
+
+    user_time, system_time: the CPU time the probe used, in seconds,
+      including the commands it ran
+    peak_rss_delta: how much the peak resident set size grew, in bytes
+    read_bytes, write_bytes: the bytes the probe made the process read from
+      and write to storage (from /proc/self/io, Linux only)
+    voluntary_switches, involuntary_switches: the number of context
+      switches (the probe waited, or was preempted), also including the
+      commands it ran
+
+  Anything that cannot be measured on this system is None.
+
+  A probe in a worker process of its own is charged with the counters of
+  that process. Most probes run in threads of the installer though (see
+  probe_executor), alongside each other, so their snapshots are taken
+  with thread=True and only count the thread: its CPU time and context
+  switches from getrusage(RUSAGE_THREAD) and its I/O from
+  /proc/thread-self/io. What cannot be told apart from the other threads
+  (the peak resident set size, the commands the probe ran, and anything
+  at all where the kernel has no per-thread counters) is None rather than
+  a share of the whole installer.
+"""
+
+import os
+import sys
+
+try:
+  import resource
+except ImportError:
+  # Not available on Windows.
+  resource = None
+
+
+# The fields of /proc/self/io that are recorded.
+PROC_IO_FIELDS = ("read_bytes", "write_bytes")
+
+# The I/O counters of the process, and of the calling thread alone.
+PROC_IO_PATH = "/proc/self/io"
+THREAD_IO_PATH = "/proc/thread-self/io"
+
+# Python 2 has no resource.RUSAGE_THREAD, but Linux has had it since
+# 2.6.26, as 1.
+RUSAGE_THREAD = None
+if resource is not None:
+  RUSAGE_THREAD = getattr(resource, "RUSAGE_THREAD", None)
+  if RUSAGE_THREAD is None and sys.platform.startswith("linux"):
+    RUSAGE_THREAD = 1
+
+# ru_maxrss is in kilobytes on Linux but in bytes on Mac OS X.
+if sys.platform == "darwin":
+  MAXRSS_UNIT = 1
+else:
+  MAXRSS_UNIT = 1024
+
+
+
+def _read_proc_io(path=PROC_IO_PATH):
+  """
+  <Purpose>
+    Read the I/O counters of this process, or of this thread.
+
+  <Arguments>
+    path:
+      PROC_IO_PATH or THREAD_IO_PATH.
+
+  <Returns>
+    A dictionary of the counters in PROC_IO_FIELDS, empty if the file
+    cannot be read.
+  """
+  counters = {}
+  try:
+    iofile = open(path)
+    try:
+      for line in iofile:
+        name, value = line.split(":")
+        if name in PROC_IO_FIELDS:
+          counters[name] = int(value)
+    finally:
+      iofile.close()
+  except (IOError, ValueError):
+    return {}
+  return counters
+
+
+
+def _take_thread_snapshot():
+  """
+  <Purpose>
+    Take a snapshot of the resource usage of the calling thread alone.
+
+  <Returns>
+    A dictionary of counters, without the ones that are not kept per
+    thread.
+  """
+  snapshot = _read_proc_io(THREAD_IO_PATH)
+  if RUSAGE_THREAD is None:
+    return snapshot
+
+  try:
+    usage = resource.getrusage(RUSAGE_THREAD)
+  except (ValueError, resource.error):
+    # The kernel does not have it after all.
+    return snapshot
+  snapshot["user_time"] = usage.ru_utime
+  snapshot["system_time"] = usage.ru_stime
+  snapshot["voluntary_switches"] = usage.ru_nvcsw
+  snapshot["involuntary_switches"] = usage.ru_nivcsw
+  return snapshot
+
+
+
+def take_snapshot(thread=False):
+  """
+  <Purpose>
+    Take a snapshot of the resource usage of this process so far.
+
+  <Arguments>
+    thread:
+      True to only count the calling thread, see the module's purpose.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A dictionary of counters, to be passed to get_cost.
+  """
+  if thread:
+    return _take_thread_snapshot()
+
+  snapshot = _read_proc_io()
+
+  if resource is not None:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # The commands the probe ran have been waited for by the time it
+    # returns, so they are counted here.
+    childusage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    snapshot["user_time"] = usage.ru_utime + childusage.ru_utime
+    snapshot["system_time"] = usage.ru_stime + childusage.ru_stime
+    snapshot["peak_rss"] = usage.ru_maxrss * MAXRSS_UNIT
+    snapshot["voluntary_switches"] = usage.ru_nvcsw + childusage.ru_nvcsw
+    snapshot["involuntary_switches"] = usage.ru_nivcsw + childusage.ru_nivcsw
+  else:
+    usertime, systemtime, childusertime, childsystemtime = os.times()[:4]
+    snapshot["user_time"] = usertime + childusertime
+    snapshot["system_time"] = systemtime + childsystemtime
+
+  return snapshot
+
+
+
+def get_cost(before, after):
+  """
+  <Purpose>
+    Work out the cost of a probe from snapshots taken before and after it.
+
+  <Arguments>
+    before, after:
+      The snapshots returned by take_snapshot.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    The cost, see the module's purpose.
+  """
+  cost = {}
+  for name, snapshotname in [("user_time", "user_time"),
+                             ("system_time", "system_time"),
+                             ("peak_rss_delta", "peak_rss"),
+                             ("read_bytes", "read_bytes"),
+                             ("write_bytes", "write_bytes"),
+                             ("voluntary_switches", "voluntary_switches"),
+                             ("involuntary_switches",
+                              "involuntary_switches")]:
+    if snapshotname in before and snapshotname in after:
+      cost[name] = after[snapshotname] - before[snapshotname]
+    else:
+      cost[name] = None
+
+  return cost
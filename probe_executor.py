@@ -0,0 +1,748 @@
+"""
+<Program Name>
+  probe_executor.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Runs a list of independent benchmark probes concurrently so that the time
+  spent benchmarking is set by the slowest probe rather than the sum of all
+  of them.
+
+  The CPU-bound timing probes, and the probes that run commands, are each
+  run in a worker process of their own, watched over by the installer. A
+  probe like that which takes longer than its timeout (a hung shell
+  command, a write that never completes) is killed, together with any
+  commands it started, and its resources are reported as failed so the
+  installation carries on with their defaults. One wedged probe only costs
+  its timeout.
+
+  The other probes only read from /proc or make a system call, so they are
+  run in threads of the installer instead of paying for a fork each. A
+  thread cannot be killed, but a probe that runs out of time is abandoned
+  all the same and its resources are reported as failed.
+
+  Cheap probes (reads from /proc, statvfs, ...) are all started at once.
+  CPU-bound timing probes (measure_random, measuredisk) never run more at a
+  time than there are spare processors, so they do not compete with each
+  other for a core. Probes that are too timing-sensitive to share the
+  machine with anything else can declare themselves exclusive, in which
+  case they are run one at a time after every other probe has finished.
+
+  In low-impact mode (see benchmark_lowimpact) the worker processes run at
+  the lowest priority with a capped address space, throttleable probes are
+  given a Throttle, and only one CPU-bound probe runs at a time.
+
+<Return value notes>
+  run_probes() returns a benchmark_measurement.Measurement for every
+  resource, whose value follows the same conventions as the dictionaries
+  returned by the OS specific measure_resources() functions: a successfully
+  measured resource has its value and a failed probe has a string
+  describing the failure for each of its resources.
+
+  If multiprocessing is broken or missing (as on some of the embedded
+  platforms seattle runs on), the timing probes are run in threads as
+  well.
+"""
+
+import os
+import signal
+import threading
+import time
+
+import benchmark_lowimpact
+import benchmark_measurement
+import benchmark_profiling
+import probe_accounting
+
+try:
+  import multiprocessing
+except ImportError:
+  multiprocessing = None
+
+
+# The number of seconds a probe may run for before it is killed, unless it
+# declares its own timeout.
+DEFAULT_PROBE_TIMEOUT = 120
+
+# The number of seconds past its time limit a time limited probe may take to
+# wrap up before it is killed.
+TIME_LIMIT_GRACE = 5
+
+# How often (in seconds) the running probes are checked on.
+WATCHDOG_INTERVAL = 0.01
+
+
+
+class Probe(object):
+  """
+  <Purpose>
+    Describes a single benchmark probe.
+
+  <Arguments>
+    resources:
+      A list of the resource names the probe measures.
+
+    function:
+      The function that performs the measurement, it takes no arguments.
+      Either a module level function (so it can be sent to a worker process)
+      or a string "module.function" naming one, which is only imported when
+      the probe is run. The latter allows probes for other operating systems
+      to be declared without importing their modules. If the probe measures
+      more than one resource, the function may return a tuple with one value
+      per resource (in the same order as resources), a dictionary containing
+      every resource, or a single value that is used for every resource. Any
+      of these may also be wrapped in a benchmark_measurement.Measurement.
+
+    use_process:
+      True if the probe is CPU-bound or runs commands, and should be run in
+      a worker process of its own (which can be killed, commands and all,
+      if it runs out of time), and only while there is a spare processor.
+      Other probes are run in threads of the installer.
+
+    exclusive:
+      True if the probe is timing-sensitive and must be run with no other
+      probe running.
+
+    cost:
+      The relative cost of running the probe, see probe_registry.
+
+    platforms:
+      A list of the nonportable.ostype values the probe can be run on, or
+      None if it can be run anywhere.
+
+    dependencies:
+      A list of resources that must be measured before this probe is run.
+
+    time_limited:
+      True if the function takes a time_limit argument, the number of
+      seconds it may run for (or None). When the time is up the function
+      should return its best estimate so far as a degraded
+      benchmark_measurement.Measurement.
+
+    timeout:
+      The number of seconds the probe may take before it is killed, or None
+      to let it run for as long as it takes. A time limited probe is also
+      killed TIME_LIMIT_GRACE seconds after its time limit.
+
+    throttleable:
+      True if the function takes a throttle argument, a
+      benchmark_lowimpact.Throttle (or None) to pause its work with in
+      low-impact mode.
+  """
+
+  def __init__(self, resources, function, use_process=False, exclusive=False,
+               cost=1, platforms=None, dependencies=None, time_limited=False,
+               timeout=DEFAULT_PROBE_TIMEOUT, throttleable=False):
+    self.resources = list(resources)
+    self.function = function
+    self.use_process = use_process
+    self.exclusive = exclusive
+    self.cost = cost
+    self.platforms = platforms
+    self.dependencies = list(dependencies or [])
+    self.time_limited = time_limited
+    self.timeout = timeout
+    self.throttleable = throttleable
+
+
+  def supports(self, ostype):
+    """
+    <Purpose>
+      Check whether the probe can be run on the given operating system.
+
+    <Arguments>
+      ostype:
+        The operating system, as given by nonportable.ostype.
+
+    <Returns>
+      True if the probe supports ostype.
+    """
+    return self.platforms is None or ostype in self.platforms
+
+
+  def __repr__(self):
+    return "<Probe " + "/".join(self.resources) + ">"
+
+
+  def unpack(self, measurement):
+    """
+    <Purpose>
+      Split the Measurement returned by run_probe_function into one
+      Measurement for each of the probe's resources.
+
+    <Arguments>
+      measurement:
+        The benchmark_measurement.Measurement returned by
+        run_probe_function.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A dictionary with a Measurement for every resource in self.resources.
+    """
+    value = measurement.value
+    measurement_dict = {}
+
+    if isinstance(value, dict):
+      for resource in self.resources:
+        if resource in value:
+          measurement_dict[resource] = measurement.copy(value[resource])
+        else:
+          measurement_dict[resource] = measurement.copy(
+              "probe did not return a value for " + resource)
+      return measurement_dict
+
+    if isinstance(value, tuple):
+      if len(value) != len(self.resources):
+        for resource in self.resources:
+          measurement_dict[resource] = measurement.copy("probe returned " + \
+              str(len(value)) + " values for " + str(len(self.resources)) + \
+              " resources")
+        return measurement_dict
+
+      for resource, resourcevalue in zip(self.resources, value):
+        measurement_dict[resource] = measurement.copy(resourcevalue)
+    else:
+      for resource in self.resources:
+        measurement_dict[resource] = measurement.copy(value)
+
+    return measurement_dict
+
+
+
+def resolve_function(function):
+  """
+  <Purpose>
+    Get the function a probe refers to, importing its module if the probe
+    names it with a string.
+
+  <Arguments>
+    function:
+      A function, or a string "module.function".
+
+  <Exceptions>
+    ImportError or AttributeError if the named function does not exist.
+
+  <Returns>
+    The function.
+  """
+  if not isinstance(function, basestring):
+    return function
+
+  modulename, functionname = function.rsplit(".", 1)
+  module = __import__(modulename)
+  return getattr(module, functionname)
+
+
+
+def run_probe_function(function, time_limit=None, profile_path=None,
+                       throttle=None, thread=False):
+  """
+  <Purpose>
+    Call a probe function, catching any exception it raises. This is what
+    actually runs inside the workers; exceptions are converted to strings
+    so they can always be sent back from a worker process.
+
+  <Arguments>
+    function:
+      The probe function to call, or a string naming it.
+
+    time_limit:
+      If not None, passed to the function as its time_limit argument.
+
+    profile_path:
+      If not None, the function is run under cProfile and its statistics
+      are written to this file (see benchmark_profiling).
+
+    throttle:
+      If not None, passed to the function as its throttle argument.
+
+    thread:
+      True if the function is run in a thread of the installer, alongside
+      other probes, rather than in a worker process of its own.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A benchmark_measurement.Measurement. If the function did not return one
+    itself, its return value is wrapped in one; if it raised an exception,
+    the Measurement holds a string describing it. Either way the wall clock
+    and CPU time the probe took, and its cost (see probe_accounting), are
+    recorded in it. For a probe run in a thread, the CPU time and cost
+    only count that thread (see probe_accounting), the CPU time is None
+    where that cannot be measured.
+  """
+  start_time = time.time()
+  start_cputime = sum(os.times()[:2])
+  start_snapshot = probe_accounting.take_snapshot(thread)
+
+  kwargs = {}
+  if time_limit is not None:
+    kwargs["time_limit"] = time_limit
+  if throttle is not None:
+    kwargs["throttle"] = throttle
+
+  try:
+    if profile_path is None:
+      value = resolve_function(function)(**kwargs)
+    else:
+      value = benchmark_profiling.run_profiled(profile_path,
+          resolve_function(function), **kwargs)
+  except Exception, e:
+    value = benchmark_measurement.Measurement(str(e), reason=str(e))
+
+  if isinstance(value, benchmark_measurement.Measurement):
+    measurement = value
+  else:
+    measurement = benchmark_measurement.Measurement(value)
+
+  measurement.wall_time = time.time() - start_time
+  measurement.cost = probe_accounting.get_cost(
+      start_snapshot, probe_accounting.take_snapshot(thread))
+  if not thread:
+    measurement.cpu_time = sum(os.times()[:2]) - start_cputime
+  elif measurement.cost["user_time"] is not None and \
+      measurement.cost["system_time"] is not None:
+    # os.times() would count every thread of the installer.
+    measurement.cpu_time = measurement.cost["user_time"] + \
+        measurement.cost["system_time"]
+  return measurement
+
+
+
+def _probe_process_main(connection, arguments, low_impact=False):
+  """
+  <Purpose>
+    The body of a probe's worker process: run the probe and send its
+    Measurement back.
+
+  <Arguments>
+    connection:
+      The writing end of the pipe to the parent.
+
+    arguments:
+      The arguments for run_probe_function.
+
+    low_impact:
+      True to lower the worker's priority and cap its memory first.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    None
+  """
+  # Put the worker in a process group of its own, so that if it has to be
+  # killed, the shell commands it started are killed along with it.
+  if hasattr(os, "setpgrp"):
+    os.setpgrp()
+
+  if low_impact:
+    benchmark_lowimpact.lower_priority()
+    benchmark_lowimpact.limit_memory()
+
+  measurement = run_probe_function(*arguments)
+  try:
+    connection.send(measurement)
+  except Exception, e:
+    # The result could not be pickled.
+    connection.send(benchmark_measurement.Measurement(
+        "probe worker failed: " + str(e), reason=str(e)))
+  connection.close()
+
+
+
+class _ProbeWorker(object):
+  """
+  <Purpose>
+    A probe running in a worker, watched over by the parent. Probes that
+    use_process get a worker process of their own, the others (and every
+    probe, if a worker process cannot be started) are run in a thread; a
+    thread cannot be killed, but the probe is abandoned all the same if it
+    runs out of time.
+
+  <Arguments>
+    probe:
+      The Probe to run.
+
+    arguments:
+      The arguments for run_probe_function.
+
+    timeout:
+      The number of seconds the probe may take, or None for no limit.
+
+    low_impact:
+      True to run the worker process in low-impact mode. A worker thread
+      shares the installer's priority and memory, so they are left alone.
+  """
+
+  def __init__(self, probe, arguments, timeout, low_impact=False):
+    self.probe = probe
+    self.timeout = timeout
+    self.measurement = None
+    self.process = None
+    self.connection = None
+    self.thread = None
+    self.threadresult = []
+
+    self.deadline = None
+    if timeout is not None:
+      self.deadline = time.time() + timeout
+
+    if probe.use_process and multiprocessing is not None:
+      try:
+        self.connection, childconnection = multiprocessing.Pipe(False)
+        self.process = multiprocessing.Process(target=_probe_process_main,
+            args=(childconnection, arguments, low_impact))
+        self.process.start()
+        childconnection.close()
+        return
+      except (ImportError, OSError):
+        # Some platforms (Android, older Nokia tablets) cannot start
+        # worker processes.
+        self.process = None
+
+    self.thread = threading.Thread(target=self._run_in_thread,
+                                   args=(arguments,))
+    self.thread.setDaemon(True)
+    self.thread.start()
+
+
+  def _run_in_thread(self, arguments):
+    self.threadresult.append(run_probe_function(thread=True, *arguments))
+
+
+  def _fail(self, reason):
+    self.measurement = benchmark_measurement.Measurement(reason,
+                                                         reason=reason)
+
+
+  def _kill(self):
+    """
+    <Purpose>
+      Kill the worker process and everything it started.
+
+    <Returns>
+      None
+    """
+    if hasattr(os, "killpg"):
+      try:
+        os.killpg(self.process.pid, signal.SIGKILL)
+      except OSError:
+        # The worker had not got its own process group yet, or is gone.
+        pass
+    self.process.terminate()
+    self.process.join()
+
+
+  def check(self):
+    """
+    <Purpose>
+      Check whether the probe has finished, killing it if it has run out of
+      time. Once it has finished, its result is in self.measurement.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      May kill the worker process, or abandon the worker thread.
+
+    <Returns>
+      True if the probe has finished (or was stopped).
+    """
+    if self.measurement is not None:
+      return True
+    return self._check_finished() or self._check_timed_out()
+
+
+  def _check_finished(self):
+    """
+    <Purpose>
+      Collect the result of the probe if its worker has finished.
+
+    <Returns>
+      True if it has, with its result in self.measurement.
+    """
+    if self.thread is not None:
+      if self.thread.isAlive():
+        return False
+      self.measurement = self.threadresult[0]
+      return True
+
+    # Whether the worker is alive is checked before the pipe is, so that a
+    # worker that exits right after sending its result still has it read.
+    alive = self.process.is_alive()
+    if self.connection.poll():
+      # The pipe is also readable once a worker died without a result.
+      try:
+        self.measurement = self.connection.recv()
+      except EOFError:
+        pass
+      self.connection.close()
+      self.process.join()
+      if self.measurement is None:
+        self._fail("probe worker died with exit code " + \
+                     str(self.process.exitcode))
+      return True
+
+    if not alive:
+      self.connection.close()
+      self._fail("probe worker died with exit code " + \
+                   str(self.process.exitcode))
+      return True
+
+    return False
+
+
+  def _check_timed_out(self):
+    """
+    <Purpose>
+      Stop the probe if it has run out of time: kill its worker process,
+      or abandon its worker thread.
+
+    <Returns>
+      True if it has, with the failure in self.measurement.
+    """
+    if self.deadline is None or time.time() <= self.deadline:
+      return False
+
+    if self.process is not None:
+      self.connection.close()
+      self._kill()
+    self._fail("probe timed out after " + str(self.timeout) + " seconds")
+    return True
+
+
+
+def _get_process_worker_count(low_impact=False):
+  """
+  <Purpose>
+    Get the number of CPU-bound probes that may run at once. One processor
+    is left for the other probes and the installer itself.
+
+  <Arguments>
+    low_impact:
+      True in low-impact mode, where only one may run at a time.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    The number of probes, at least 1.
+  """
+  if multiprocessing is None or low_impact:
+    return 1
+
+  try:
+    return max(multiprocessing.cpu_count() - 1, 1)
+  except NotImplementedError:
+    return 1
+
+
+
+def _get_timeout(probe, time_limit):
+  """
+  <Purpose>
+    Get the number of seconds a probe may take before it is killed.
+
+  <Arguments>
+    probe:
+      The Probe.
+
+    time_limit:
+      The time limit the probe is given, or None.
+
+  <Returns>
+    The timeout, or None if there is none.
+  """
+  if time_limit is None:
+    return probe.timeout
+  if probe.timeout is None:
+    return time_limit + TIME_LIMIT_GRACE
+  return min(probe.timeout, time_limit + TIME_LIMIT_GRACE)
+
+
+
+def _get_arguments(probe, time_limits, profile_dir, low_impact=False):
+  """
+  <Purpose>
+    Build the arguments for run_probe_function for a probe.
+
+  <Arguments>
+    probe:
+      The Probe to run.
+
+    time_limits:
+      A dictionary mapping probes to their time limits, or None.
+
+    profile_dir:
+      The directory to write the probe's profile to, or None.
+
+    low_impact:
+      True to give a throttleable probe a Throttle.
+
+  <Returns>
+    A tuple of arguments.
+  """
+  time_limit = None
+  if probe.time_limited and time_limits is not None:
+    time_limit = time_limits.get(probe)
+
+  profile_path = None
+  if profile_dir is not None:
+    profile_path = benchmark_profiling.get_probe_profile_path(profile_dir,
+                                                              probe)
+
+  throttle = None
+  if probe.throttleable and low_impact:
+    throttle = benchmark_lowimpact.Throttle()
+
+  return (probe.function, time_limit, profile_path, throttle)
+
+
+
+def _start_worker(probe, time_limits, profile_dir, low_impact=False):
+  """
+  <Purpose>
+    Start a probe in a worker.
+
+  <Arguments>
+    probe:
+      The Probe to run.
+
+    time_limits:
+      A dictionary mapping probes to their time limits, or None.
+
+    profile_dir:
+      The directory to write the probe's profile to, or None.
+
+    low_impact:
+      True to run the probe in low-impact mode.
+
+  <Returns>
+    The _ProbeWorker.
+  """
+  arguments = _get_arguments(probe, time_limits, profile_dir, low_impact)
+  return _ProbeWorker(probe, arguments, _get_timeout(probe, arguments[1]),
+                      low_impact)
+
+
+
+def _add_result(measurement_dict, worker, result_callback):
+  """
+  <Purpose>
+    Add the result of a finished probe to the results of run_probes.
+
+  <Arguments>
+    measurement_dict:
+      The dictionary of Measurements collected so far.
+
+    worker:
+      The finished _ProbeWorker.
+
+    result_callback:
+      The function to call with the probe's Measurements, or None.
+
+  <Returns>
+    None
+  """
+  probe_measurement_dict = worker.probe.unpack(worker.measurement)
+  measurement_dict.update(probe_measurement_dict)
+  if result_callback is not None:
+    result_callback(probe_measurement_dict)
+
+
+
+def run_probes(probelist, time_limits=None, profile_dir=None,
+               result_callback=None, low_impact=False):
+  """
+  <Purpose>
+    Run every probe in probelist, concurrently where allowed, each in a
+    worker of its own, and collect their results.
+
+  <Arguments>
+    probelist:
+      A list of Probe objects. No two probes should measure the same
+      resource.
+
+    time_limits:
+      Optional dictionary mapping probes to the number of seconds each may
+      run for. Only probes that are time_limited are given their limit.
+
+    profile_dir:
+      Optional directory to write a cProfile profile of every probe to (see
+      benchmark_profiling).
+
+    result_callback:
+      Optional function called with the dictionary of Measurements of each
+      probe as soon as the probe finishes.
+
+    low_impact:
+      True to run the probes in low-impact mode, see the module's purpose.
+
+  <Exceptions>
+    None, a probe that fails (or is killed because it ran out of time) has a
+    string describing the failure stored for each of its resources.
+
+  <Side Effects>
+    Starts (and stops, or kills) worker processes or threads. The probes
+    themselves may have side effects. Writes the profiles if profile_dir is
+    given.
+
+  <Returns>
+    A dictionary mapping each resource measured by the probes to a
+    benchmark_measurement.Measurement.
+  """
+  measurement_dict = {}
+
+  concurrentprobes = [probe for probe in probelist if not probe.exclusive]
+  exclusiveprobes = [probe for probe in probelist if probe.exclusive]
+
+  # The CPU-bound probes wait for a spare processor, the rest are all started
+  # right away. The slow probes are started first so they overlap as much
+  # as possible with the cheap ones.
+  waitingprobes = [probe for probe in concurrentprobes if probe.use_process]
+  processworkercount = _get_process_worker_count(low_impact)
+  runningworkers = []
+
+  for probe in waitingprobes[:processworkercount]:
+    runningworkers.append(_start_worker(probe, time_limits, profile_dir,
+                                        low_impact))
+  waitingprobes = waitingprobes[processworkercount:]
+
+  for probe in concurrentprobes:
+    if not probe.use_process:
+      runningworkers.append(_start_worker(probe, time_limits, profile_dir,
+                                          low_impact))
+
+  while runningworkers:
+    for worker in runningworkers[:]:
+      if not worker.check():
+        continue
+
+      runningworkers.remove(worker)
+      _add_result(measurement_dict, worker, result_callback)
+      if worker.probe.use_process and waitingprobes:
+        runningworkers.append(_start_worker(waitingprobes.pop(0),
+                                            time_limits, profile_dir,
+                                            low_impact))
+
+    if runningworkers:
+      time.sleep(WATCHDOG_INTERVAL)
+
+  # Now nothing else is running, so the exclusive probes get the machine
+  # to themselves.
+  for probe in exclusiveprobes:
+    worker = _start_worker(probe, time_limits, profile_dir, low_impact)
+    while not worker.check():
+      time.sleep(WATCHDOG_INTERVAL)
+    _add_result(measurement_dict, worker, result_callback)
+
+  return measurement_dict
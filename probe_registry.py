@@ -0,0 +1,349 @@
+"""
+<Program Name>
+  probe_registry.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Registry of the benchmark probes for every operating system, keyed by the
+  names of the resources they measure (the keys of
+  benchmark_resources.DEFAULT_MAX_RESOURCE_DICT).
+
+  Every probe declares the resources it measures, its relative cost, the
+  platforms it supports and the resources it depends on (see
+  probe_executor.Probe). run_benchmark asks the registry to measure all
+  the resources for the current OS, but any subset can be measured on its
+  own, for instance measure("Linux", ["filewrite", "fileread"]) only runs
+  the disk timing when only the disk has changed.
+
+  The probes name their functions with strings, so a platform's module is
+  only imported when one of its probes is actually run.
+
+  measure() can be given a time budget for all of the probes, which is
+  split between them in proportion to their cost. Each probe's share is
+  its time limit, so even if the probes end up running one after another
+  (on a single processor, say) they finish within the budget. Probes that
+  run out of time return their best estimate so far, marked as degraded.
+
+<Probe costs>
+  The cost of a probe is a relative weight, roughly proportional to the time
+  it takes on a typical machine. Reading a file in /proc or making a system
+  call is CHEAP_PROBE_COST, running a shell command is SHELL_PROBE_COST, and
+  the random and disk timings are TIMING_PROBE_COST.
+"""
+
+import benchmark_measurement
+import probe_executor
+
+
+CHEAP_PROBE_COST = 1
+SHELL_PROBE_COST = 10
+TIMING_PROBE_COST = 100
+
+# All the operating systems seattle can benchmark, the probes of each
+# must between them measure every resource (or leave it to the defaults).
+SUPPORTED_PLATFORMS = ["Linux", "Darwin", "Windows"]
+
+# Maps each resource name to the list of registered probes that measure it.
+# There may be several probes for a resource, but only one per platform.
+_probes_by_resource = {}
+
+
+
+class DuplicateProbeError(Exception):
+  """Error to indicate two probes measure the same resource on a platform."""
+  pass
+
+
+
+def register_probe(probe):
+  """
+  <Purpose>
+    Add a probe to the registry.
+
+  <Arguments>
+    probe:
+      The probe_executor.Probe to register.
+
+  <Exceptions>
+    DuplicateProbeError if another probe already measures one of the
+    probe's resources on one of the probe's platforms.
+
+  <Side Effects>
+    Modifies the registry.
+
+  <Returns>
+    None
+  """
+  platforms = probe.platforms or SUPPORTED_PLATFORMS
+
+  for resource in probe.resources:
+    for registeredprobe in _probes_by_resource.get(resource, []):
+      for platform in platforms:
+        if registeredprobe.supports(platform):
+          raise DuplicateProbeError("Both " + repr(registeredprobe) + \
+              " and " + repr(probe) + " measure " + resource + " on " + \
+              platform)
+
+  for resource in probe.resources:
+    _probes_by_resource.setdefault(resource, []).append(probe)
+
+
+
+def get_probe(resource, ostype):
+  """
+  <Purpose>
+    Find the probe that measures a resource on an operating system.
+
+  <Arguments>
+    resource:
+      The name of the resource.
+
+    ostype:
+      The operating system, as given by nonportable.ostype.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    The probe_executor.Probe, or None if the resource is not measured on
+    ostype.
+  """
+  for probe in _probes_by_resource.get(resource, []):
+    if probe.supports(ostype):
+      return probe
+  return None
+
+
+
+def get_probes(ostype, resources=None):
+  """
+  <Purpose>
+    Find the probes needed to measure the given resources, including the
+    probes for any resources they depend on.
+
+  <Arguments>
+    ostype:
+      The operating system, as given by nonportable.ostype.
+
+    resources:
+      A list of resource names, or None for every resource.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A list of probe_executor.Probe objects without duplicates.
+  """
+  if resources is None:
+    resources = _probes_by_resource.keys()
+
+  probelist = []
+  resources_to_check = list(resources)
+  while resources_to_check:
+    probe = get_probe(resources_to_check.pop(), ostype)
+    if probe is not None and probe not in probelist:
+      probelist.append(probe)
+      resources_to_check.extend(probe.dependencies)
+
+  return probelist
+
+
+
+def _order_by_dependencies(probelist, measured_resources):
+  """
+  <Purpose>
+    Split the probes into stages, where every probe in a stage only depends
+    on resources measured in earlier stages (or already known).
+
+  <Arguments>
+    probelist:
+      The list of probes to run.
+
+    measured_resources:
+      The resources whose values are already known.
+
+  <Exceptions>
+    ValueError if the dependencies contain a cycle.
+
+  <Returns>
+    A list of lists of probes.
+  """
+  known_resources = set(measured_resources)
+  remaining_probes = list(probelist)
+  stages = []
+
+  while remaining_probes:
+    stage = []
+    for probe in remaining_probes:
+      for resource in probe.dependencies:
+        if resource not in known_resources:
+          break
+      else:
+        stage.append(probe)
+
+    if not stage:
+      raise ValueError("Circular probe dependencies: " + \
+                         str(remaining_probes))
+
+    for probe in stage:
+      remaining_probes.remove(probe)
+      known_resources.update(probe.resources)
+    stages.append(stage)
+
+  return stages
+
+
+
+def split_time_budget(probelist, time_budget):
+  """
+  <Purpose>
+    Split a time budget between probes in proportion to their cost.
+
+  <Arguments>
+    probelist:
+      The list of probes that will be run.
+
+    time_budget:
+      The total number of seconds the probes may take.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A dictionary mapping each probe to its share of the budget in seconds.
+  """
+  totalcost = 0
+  for probe in probelist:
+    totalcost += probe.cost
+
+  time_limits = {}
+  for probe in probelist:
+    time_limits[probe] = time_budget * probe.cost / float(totalcost)
+
+  return time_limits
+
+
+
+def measure(ostype, resources=None, cached_resource_dict=None,
+            time_budget=None, profile_dir=None, result_callback=None,
+            low_impact=False):
+  """
+  <Purpose>
+    Measure the given resources on this machine, running only the probes
+    that are needed.
+
+  <Arguments>
+    ostype:
+      The operating system, as given by nonportable.ostype.
+
+    resources:
+      A list of the names of the resources to measure, or None to measure
+      every resource that has a probe on ostype.
+
+    cached_resource_dict:
+      Optional dictionary of previously measured values (see
+      benchmark_cache). A probe whose resources are all present in it is
+      not run, and the cached values are used instead.
+
+    time_budget:
+      Optional number of seconds all the probes together may take, see the
+      module's purpose.
+
+    profile_dir:
+      Optional directory to write a cProfile profile of every probe to, see
+      benchmark_profiling.
+
+    result_callback:
+      Optional function called with the dictionary of Measurements of each
+      probe that is run, as soon as it finishes (see
+      probe_executor.run_probes).
+
+    low_impact:
+      True to run the probes in low-impact mode (see benchmark_lowimpact).
+
+  <Exceptions>
+    ValueError if the probe dependencies contain a cycle.
+
+  <Side Effects>
+    Runs the probes, see probe_executor.run_probes.
+
+  <Returns>
+    A dictionary with a benchmark_measurement.Measurement for each requested
+    resource (and any resource measured along the way). The values follow
+    the conventions of the OS specific measure_resources() functions: None
+    for a resource that has no probe on ostype and a string for a probe
+    that failed.
+  """
+  if cached_resource_dict is None:
+    cached_resource_dict = {}
+  if resources is None:
+    resources = [resource for resource in _probes_by_resource \
+                   if get_probe(resource, ostype) is not None]
+
+  measurement_dict = {}
+  for resource in resources:
+    if get_probe(resource, ostype) is None:
+      measurement_dict[resource] = benchmark_measurement.Measurement(None)
+
+  probes_to_run = []
+  for probe in get_probes(ostype, resources):
+    for resource in probe.resources:
+      if resource not in cached_resource_dict:
+        probes_to_run.append(probe)
+        break
+    else:
+      for resource in probe.resources:
+        measurement_dict[resource] = benchmark_measurement.Measurement(
+            cached_resource_dict[resource], cached=True)
+
+  time_limits = None
+  if time_budget is not None and probes_to_run:
+    time_limits = split_time_budget(probes_to_run, time_budget)
+
+  for stage in _order_by_dependencies(probes_to_run, measurement_dict.keys()):
+    measurement_dict.update(probe_executor.run_probes(stage, time_limits,
+        profile_dir, result_callback, low_impact))
+
+  return measurement_dict
+
+
+
+# The probes for each operating system.
+
+register_probe(probe_executor.Probe(["cpu"], "Linux_resources.get_cpu",
+    cost=CHEAP_PROBE_COST, platforms=["Linux"]))
+register_probe(probe_executor.Probe(["memory"], "Linux_resources.get_memory",
+    cost=CHEAP_PROBE_COST, platforms=["Linux"]))
+register_probe(probe_executor.Probe(["diskused"],
+    "Linux_resources.get_diskused",
+    cost=CHEAP_PROBE_COST, platforms=["Linux"]))
+register_probe(probe_executor.Probe(
+    ["filesopened", "insockets", "outsockets"],
+    "Linux_resources.get_filesopened_share",
+    cost=CHEAP_PROBE_COST, platforms=["Linux"]))
+
+# These run commands (sysctl, df, ...), so they get their own processes,
+# which can be killed if a command hangs.
+register_probe(probe_executor.Probe(
+    ["cpu", "memory", "diskused", "filesopened", "insockets", "outsockets"],
+    "Mac_BSD_resources.measure_system_resources",
+    use_process=True, cost=6 * SHELL_PROBE_COST, platforms=["Darwin"]))
+
+register_probe(probe_executor.Probe(
+    ["cpu", "memory", "diskused", "filesopened", "insockets", "outsockets"],
+    "Win_WinCE_resources.measure_system_resources",
+    use_process=True, cost=SHELL_PROBE_COST, platforms=["Windows"]))
+
+# The timing probes work everywhere. They are CPU-bound so they get their
+# own processes, and they are the ones that need throttling in low-impact
+# mode.
+register_probe(probe_executor.Probe(["random"],
+    "measure_random.benchmark_random",
+    use_process=True, cost=TIMING_PROBE_COST, time_limited=True,
+    throttleable=True))
+register_probe(probe_executor.Probe(["filewrite", "fileread"],
+    "measuredisk.benchmark_disk",
+    use_process=True, cost=TIMING_PROBE_COST, time_limited=True,
+    throttleable=True))
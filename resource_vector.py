@@ -0,0 +1,338 @@
+"""
+<Program Name>
+  resource_vector.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  A compact, fixed-order vector of the measured resources, for the
+  arithmetic that turns the benchmark results into vessel resources (the
+  donation, the offcut costs and the ten percent splits in
+  benchmark_resources, and the per-vessel sums in create_installer_state).
+
+  The dictionaries nmresourcemath works with have to be rebuilt key by key
+  for every operation. A ResourceVector instead keeps the values in a single
+  array of doubles in the order of RESOURCE_NAMES, and each operation works
+  on the whole array at once. Vectors are immutable, every operation returns
+  a new one.
+
+  Only the cpu resource is fractional, every other resource is an integer
+  amount. to_dict() converts the values back accordingly, so the dictionary
+  can be handed to nmresourcemath (and written to a resource file) exactly
+  as before. Doubles hold integers exactly up to 2**53, far beyond any
+  resource amount.
+
+  The default resources of a host and the default offcut of a vessel live
+  here too, with the resource names, so that the donation arithmetic can
+  be done (by donation_planner, say) without importing the installer.
+"""
+
+import array
+import operator
+
+
+# The resources in a vector, in order.
+RESOURCE_NAMES = ("cpu", "memory", "diskused", "events", "filesopened",
+                  "insockets", "outsockets", "random", "filewrite",
+                  "fileread", "netrecv", "netsend", "lograte", "loopsend",
+                  "looprecv")
+
+# The resources whose amounts are not whole numbers.
+FRACTIONAL_RESOURCES = ("cpu",)
+
+# The position of each resource in a vector.
+_RESOURCE_INDEX = dict([(resource, index) \
+                          for index, resource in enumerate(RESOURCE_NAMES)])
+
+# 1.0 for the fractional resources and 0.0 for the rest, used to truncate
+# only the integer resources.
+_FRACTIONAL_MASK = array.array('d', [float(resource in FRACTIONAL_RESOURCES) \
+                                       for resource in RESOURCE_NAMES])
+
+# These are the default maximum values that we assume a computer to have,
+# see benchmark_resources (which lowers some of them on ARM devices).
+# These values will be used in the event the OS specific script is unable
+# to determine a maximum for the value.
+# These were the lower numbers returned from developer testing.
+DEFAULT_MAX_RESOURCE_DICT = {"cpu":1,
+                             "memory":510000000, # allmost 512MB
+                             "diskused":3700000000, # 3.44589 GB
+                             "events":500, # see benchmark_resources.
+                             "filesopened":250,
+                             "insockets":250,
+                             "outsockets":250,
+                             "random":200000,
+                             "filewrite":1200000,
+                             "fileread":1200000,
+                             "netrecv":500000,
+                             "netsend":500000,
+                             "lograte":1500000,
+                             "loopsend":50000000,
+                             "looprecv":50000000}
+
+# Default resources that define the cost of splitting a vessel
+DEFAULT_OFFCUT_DICT =  {'cpu':.002,
+                        'memory': 1000000,   # 1 MiB
+                        'diskused': 100000, # .1 MiB
+                        'events':2,
+                        'filewrite':1000,
+                        'fileread':1000,
+                        'filesopened':1,
+                        'insockets':0,
+                        'outsockets':0,
+                        'netsend':0,
+                        'netrecv':0,
+                        'loopsend':0,  # would change with prompt functionality (?)
+                        'looprecv':0,
+                        'lograte':100, # the monitor might log something
+                        'random':0 }
+
+
+
+class ResourceVector(object):
+  """
+  <Purpose>
+    An immutable vector of resource amounts, see the module's purpose.
+
+  <Arguments>
+    values:
+      A sequence of numbers, one for each resource in RESOURCE_NAMES and in
+      the same order.
+
+  <Exceptions>
+    ValueError if values does not have one number per resource.
+  """
+
+  __slots__ = ("values",)
+
+  def __init__(self, values):
+    if not isinstance(values, array.array):
+      values = array.array('d', values)
+    if len(values) != len(RESOURCE_NAMES):
+      raise ValueError("A ResourceVector needs " + \
+                         str(len(RESOURCE_NAMES)) + " values, not " + \
+                         str(len(values)))
+    self.values = values
+
+
+  def from_dict(cls, resource_dict):
+    """
+    <Purpose>
+      Build a vector from a resource dictionary. Keys that are not in
+      RESOURCE_NAMES (messport, connport, ...) are ignored.
+
+    <Arguments>
+      resource_dict:
+        A dictionary with a number for every resource in RESOURCE_NAMES.
+
+    <Exceptions>
+      KeyError if a resource is missing from resource_dict.
+
+    <Returns>
+      The ResourceVector.
+    """
+    return cls([resource_dict[resource] for resource in RESOURCE_NAMES])
+
+  from_dict = classmethod(from_dict)
+
+
+  def to_dict(self):
+    """
+    <Purpose>
+      Convert the vector to the resource dictionary nmresourcemath expects.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A dictionary mapping every resource to its amount, a float for the
+      resources in FRACTIONAL_RESOURCES and an integer for the rest.
+    """
+    resource_dict = dict(zip(RESOURCE_NAMES, self.values))
+    for resource in RESOURCE_NAMES:
+      if resource not in FRACTIONAL_RESOURCES:
+        resource_dict[resource] = int(resource_dict[resource])
+    return resource_dict
+
+
+  def __getitem__(self, resource):
+    return self.values[_RESOURCE_INDEX[resource]]
+
+
+  def __eq__(self, other):
+    return isinstance(other, ResourceVector) and self.values == other.values
+
+
+  def __ne__(self, other):
+    return not self == other
+
+
+  def __repr__(self):
+    return "<ResourceVector " + str(self.to_dict()) + ">"
+
+
+  def replace(self, resource, value):
+    """
+    <Purpose>
+      Make a copy of the vector with a different amount of one resource.
+
+    <Arguments>
+      resource:
+        The name of the resource.
+
+      value:
+        Its new amount.
+
+    <Exceptions>
+      KeyError if resource is not in RESOURCE_NAMES.
+
+    <Returns>
+      The new ResourceVector.
+    """
+    values = array.array('d', self.values)
+    values[_RESOURCE_INDEX[resource]] = value
+    return ResourceVector(values)
+
+
+  def add(self, other):
+    """
+    <Purpose>
+      Add another vector element-wise.
+
+    <Arguments>
+      other:
+        The ResourceVector to add.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      The sum as a new ResourceVector.
+    """
+    return ResourceVector(array.array('d',
+        map(operator.add, self.values, other.values)))
+
+
+  def subtract(self, other):
+    """
+    <Purpose>
+      Subtract another vector element-wise.
+
+    <Arguments>
+      other:
+        The ResourceVector to subtract.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      The difference as a new ResourceVector.
+    """
+    return ResourceVector(array.array('d',
+        map(operator.sub, self.values, other.values)))
+
+
+  def scale(self, factor):
+    """
+    <Purpose>
+      Multiply every resource by the same factor.
+
+    <Arguments>
+      factor:
+        The number to multiply by.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      The scaled ResourceVector.
+    """
+    factor = float(factor)
+    return ResourceVector(array.array('d',
+        [value * factor for value in self.values]))
+
+
+  def truncate(self):
+    """
+    <Purpose>
+      Round the amounts of the integer resources towards zero, as int()
+      would. The fractional resources are left as they are.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Returns>
+      The truncated ResourceVector.
+    """
+    return ResourceVector(array.array('d',
+        [fractional and value or float(int(value)) \
+           for value, fractional in zip(self.values, _FRACTIONAL_MASK)]))
+
+
+  def clamp(self, minimum=0, maximum=None):
+    """
+    <Purpose>
+      Limit every resource to a range.
+
+    <Arguments>
+      minimum:
+        The lowest amount allowed, 0 by default.
+
+      maximum:
+        Optional ResourceVector with the highest amount allowed for each
+        resource, or None for no upper limit.
+
+    <Exceptions>
+      None
+
+    <Returns>
+      The clamped ResourceVector.
+    """
+    minimum = float(minimum)
+    values = [max(value, minimum) for value in self.values]
+    if maximum is not None:
+      values = map(min, values, maximum.values)
+    return ResourceVector(array.array('d', values))
+
+
+  def get_negative_resources(self):
+    """
+    <Purpose>
+      Find the resources with a negative amount.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Returns>
+      A list of the names of the negative resources, in the order of
+      RESOURCE_NAMES. It is empty if there are none.
+    """
+    return [resource for resource, value in zip(RESOURCE_NAMES, self.values) \
+              if value < 0]
+
+
+  def has_negative(self):
+    """
+    <Purpose>
+      Check whether any resource has a negative amount.
+
+    <Arguments>
+      None
+
+    <Exceptions>
+      None
+
+    <Returns>
+      True if at least one resource is negative.
+    """
+    return min(self.values) < 0
@@ -0,0 +1,203 @@
+"""
+<Program Name>
+  test_Linux_resources.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for the parsing in Linux_resources. Run them (on Linux) with:
+
+    python -m unittest test_Linux_resources
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import Linux_resources
+
+
+
+class ParseCpuListTest(unittest.TestCase):
+
+  def test_ranges_and_singles(self):
+    self.assertEqual(Linux_resources.parse_cpu_list("0-3,8,10-11\n"),
+                     [0, 1, 2, 3, 8, 10, 11])
+
+
+  def test_single(self):
+    self.assertEqual(Linux_resources.parse_cpu_list("0"), [0])
+
+
+  def test_unsorted(self):
+    self.assertEqual(Linux_resources.parse_cpu_list("4-5,0"), [0, 4, 5])
+
+
+  def test_empty(self):
+    # The cpulist of a NUMA node without processors.
+    self.assertEqual(Linux_resources.parse_cpu_list("\n"), [])
+    self.assertEqual(Linux_resources.parse_cpu_list("0,,1"), [0, 1])
+
+
+  def test_invalid(self):
+    for cpulist in ("a", "0-", "1-2-3", "0-x"):
+      self.assertRaises(ValueError, Linux_resources.parse_cpu_list, cpulist)
+
+
+
+class CpuinfoTopologyTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempdir = tempfile.mkdtemp()
+    self.oldcpuinfopath = Linux_resources.CPUINFO_PATH
+    Linux_resources.CPUINFO_PATH = os.path.join(self.tempdir, "cpuinfo")
+
+
+  def tearDown(self):
+    Linux_resources.CPUINFO_PATH = self.oldcpuinfopath
+    shutil.rmtree(self.tempdir)
+
+
+  def _write_cpuinfo(self, blocks):
+    cpuinfofile = open(Linux_resources.CPUINFO_PATH, 'w')
+    cpuinfofile.write("\n\n".join(blocks) + "\n")
+    cpuinfofile.close()
+
+
+  def test_hyperthreaded_sockets(self):
+    blocks = []
+    for processor in range(8):
+      blocks.append("processor\t: " + str(processor) + "\n" + \
+                    "model name\t: Some CPU\n" + \
+                    "physical id\t: " + str(processor % 2) + "\n" + \
+                    "cpu cores\t: 2")
+    self._write_cpuinfo(blocks)
+
+    topology = Linux_resources.get_cpuinfo_topology()
+    self.assertEqual(topology["sockets"], 2)
+    self.assertEqual(topology["cores"], 4)
+    self.assertEqual(topology["threads"], 8)
+    self.assertEqual(topology["online"], range(8))
+    self.assertEqual(topology["source"], "cpuinfo")
+
+
+  def test_raspberry_pi(self):
+    # No physical ids or core counts, and a Processor line for the model.
+    self._write_cpuinfo(["Processor\t: ARMv6-compatible processor rev 7\n" + \
+                         "processor\t: 0\nBogoMIPS\t: 697.95"])
+
+    topology = Linux_resources.get_cpuinfo_topology()
+    self.assertEqual((topology["sockets"], topology["cores"],
+                      topology["threads"]), (1, 1, 1))
+
+
+  def test_no_processors(self):
+    self._write_cpuinfo(["model name\t: Some CPU"])
+    self.assertRaises(Exception, Linux_resources.get_cpuinfo_topology)
+
+
+
+class CgroupCpuLimitTest(unittest.TestCase):
+
+  def setUp(self):
+    self.oldgettopology = Linux_resources.get_cpu_topology
+    self.oldgetlimit = Linux_resources.get_cgroup_cpu_limit
+    self.topologyreads = 0
+    Linux_resources.get_cpu_topology = self._get_topology
+
+
+  def _get_topology(self):
+    self.topologyreads += 1
+    return {"cores": 4, "threads": 8, "online": range(8)}
+
+
+  def tearDown(self):
+    Linux_resources.get_cpu_topology = self.oldgettopology
+    Linux_resources.get_cgroup_cpu_limit = self.oldgetlimit
+
+
+  def test_limit_is_converted_to_cores(self):
+    # 6 of the 8 logical processors of a 4 core host are 3 cores.
+    Linux_resources.get_cgroup_cpu_limit = lambda topology: 6
+    measurement = Linux_resources.get_cpu()
+    self.assertEqual(measurement.value, 3.0)
+    self.assertEqual(measurement.sources, {"host": 4, "cgroup": 3.0,
+                                           "cgroup_processors": 6})
+
+
+  def test_limit_above_the_cores(self):
+    # All 8 logical processors are no more than the 4 cores.
+    Linux_resources.get_cgroup_cpu_limit = lambda topology: 8
+    self.assertEqual(Linux_resources.get_cpu().value, 4)
+
+
+  def test_topology_is_read_once(self):
+    Linux_resources.get_cgroup_cpu_limit = self.oldgetlimit
+    Linux_resources.get_cpu()
+    self.assertEqual(self.topologyreads, 1)
+
+
+  def test_no_limit(self):
+    Linux_resources.get_cgroup_cpu_limit = lambda topology: None
+    measurement = Linux_resources.get_cpu()
+    self.assertEqual(measurement.value, 4)
+    self.assertEqual(measurement.sources["cgroup_processors"], None)
+
+
+
+class NumaNodesTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempdir = tempfile.mkdtemp()
+    self.oldnodedir = Linux_resources.SYSFS_NODE_DIR
+    self.oldcpudir = Linux_resources.SYSFS_CPU_DIR
+    self.oldgettopology = Linux_resources.get_cpu_topology
+    self.oldgetcpuset = Linux_resources.get_cgroup_cpuset
+    Linux_resources.SYSFS_NODE_DIR = self.tempdir
+    # Without a topology every processor is taken to be a core.
+    Linux_resources.SYSFS_CPU_DIR = os.path.join(self.tempdir, "nocpus")
+    Linux_resources.get_cpu_topology = lambda: {"online": range(8)}
+
+    for nodenumber, cpulist in [(0, "0-3"), (1, "4-7")]:
+      nodedir = os.path.join(self.tempdir, "node" + str(nodenumber))
+      os.mkdir(nodedir)
+      self._write(os.path.join(nodedir, "cpulist"), cpulist + "\n")
+      self._write(os.path.join(nodedir, "meminfo"), "Node " + \
+                  str(nodenumber) + " MemTotal:        4000000 kB\n")
+
+
+  def _write(self, filename, contents):
+    openfile = open(filename, 'w')
+    openfile.write(contents)
+    openfile.close()
+
+
+  def tearDown(self):
+    Linux_resources.SYSFS_NODE_DIR = self.oldnodedir
+    Linux_resources.SYSFS_CPU_DIR = self.oldcpudir
+    Linux_resources.get_cpu_topology = self.oldgettopology
+    Linux_resources.get_cgroup_cpuset = self.oldgetcpuset
+    shutil.rmtree(self.tempdir)
+
+
+  def test_nodes(self):
+    Linux_resources.get_cgroup_cpuset = lambda: None
+    numa_nodes = Linux_resources.get_numa_nodes()
+    self.assertEqual([(node["node"], node["cores"], node["memory"]) \
+                        for node in numa_nodes],
+                     [(0, 4, 4000000000), (1, 4, 4000000000)])
+
+
+  def test_cpuset_is_applied(self):
+    # A container that may only use processors 2 to 4.
+    Linux_resources.get_cgroup_cpuset = lambda: [2, 3, 4]
+    numa_nodes = Linux_resources.get_numa_nodes()
+    self.assertEqual([node["cpus"] for node in numa_nodes], [[2, 3], [4]])
+    self.assertEqual([node["cores"] for node in numa_nodes], [2, 1])
+
+
+
+if __name__ == "__main__":
+  unittest.main()
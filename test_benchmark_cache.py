@@ -0,0 +1,67 @@
+"""
+<Program Name>
+  test_benchmark_cache.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for what benchmark_cache keeps and hands back. Run them with:
+
+    python -m unittest test_benchmark_cache
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import benchmark_cache
+
+
+
+class BenchmarkCacheTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempdir = tempfile.mkdtemp()
+    self.cachepath = os.path.join(self.tempdir, "benchmark_cache")
+
+
+  def tearDown(self):
+    shutil.rmtree(self.tempdir)
+
+
+  def test_lookup_returns_stored_values(self):
+    cache = benchmark_cache.BenchmarkCache(self.cachepath, ttl=100)
+    cache.store("host", {"fileread": 1000, "random": 50}, now=10)
+
+    reloaded = benchmark_cache.BenchmarkCache(self.cachepath, ttl=100)
+    self.assertEqual(reloaded.lookup("host", now=20),
+                     {"fileread": 1000, "random": 50})
+    self.assertEqual(reloaded.lookup("otherhost", now=20), {})
+
+
+  def test_expired_values_are_ignored(self):
+    cache = benchmark_cache.BenchmarkCache(self.cachepath, ttl=100)
+    cache.store("host", {"fileread": 1000}, now=10)
+    self.assertEqual(cache.lookup("host", now=111), {})
+
+
+  def test_rlimit_resources_are_not_stored(self):
+    cache = benchmark_cache.BenchmarkCache(self.cachepath, ttl=100)
+    cache.store("host", {"fileread": 1000, "diskused": 5, "events": 512,
+                         "filesopened": 512, "insockets": 256,
+                         "outsockets": 256}, now=10)
+    self.assertEqual(cache.lookup("host", now=20), {"fileread": 1000})
+
+
+  def test_rlimit_resources_in_an_old_cache_are_ignored(self):
+    cache = benchmark_cache.BenchmarkCache(self.cachepath, ttl=100)
+    cache.entries["host"] = {"fileread": (1000, 10), "filesopened": (512, 10)}
+    self.assertEqual(cache.lookup("host", now=20), {"fileread": 1000})
+
+
+  def test_failed_values_are_not_stored(self):
+    cache = benchmark_cache.BenchmarkCache(self.cachepath, ttl=100)
+    cache.store("host", {"fileread": 0, "random": -1, "memory": 1024}, now=10)
+    self.assertEqual(cache.lookup("host", now=20), {"memory": 1024})
@@ -0,0 +1,105 @@
+"""
+<Program Name>
+  test_benchmark_checkpoint.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for resuming an interrupted benchmark from the checkpoint of
+  benchmark_checkpoint. Run them with:
+
+    python -m unittest test_benchmark_checkpoint
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import benchmark_checkpoint
+from benchmark_measurement import Measurement
+
+
+
+class BenchmarkCheckpointTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempdir = tempfile.mkdtemp()
+    self.checkpointpath = os.path.join(
+        self.tempdir, benchmark_checkpoint.CHECKPOINT_FILENAME)
+
+
+  def tearDown(self):
+    shutil.rmtree(self.tempdir)
+
+
+  def _interrupted_install(self):
+    # The first install finishes two probes before it is interrupted.
+    checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+        self.checkpointpath, "host")
+    checkpoint.record({"fileread": Measurement(1000)}, now=10)
+    checkpoint.record({"random": Measurement(50)}, now=20)
+
+
+  def test_resumes_from_the_checkpoint(self):
+    self._interrupted_install()
+
+    checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+        self.checkpointpath, "host")
+    self.assertEqual(checkpoint.lookup(now=30),
+                     {"fileread": 1000, "random": 50})
+
+
+  def test_checkpoint_of_other_hardware_is_ignored(self):
+    self._interrupted_install()
+
+    checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+        self.checkpointpath, "otherhost")
+    self.assertEqual(checkpoint.lookup(now=30), {})
+
+
+  def test_expired_results_are_measured_again(self):
+    self._interrupted_install()
+
+    checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+        self.checkpointpath, "host")
+    self.assertEqual(
+        checkpoint.lookup(now=15 + benchmark_checkpoint.CHECKPOINT_TTL),
+        {"random": 50})
+
+
+  def test_unusable_results_are_not_recorded(self):
+    checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+        self.checkpointpath, "host")
+    checkpoint.record({"fileread": Measurement(1000, degraded=True),
+                       "filewrite": Measurement(2000, cached=True),
+                       "random": Measurement(0),
+                       "memory": Measurement(1024)}, now=10)
+
+    checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+        self.checkpointpath, "host")
+    self.assertEqual(checkpoint.lookup(now=20), {"memory": 1024})
+
+
+  def test_torn_checkpoint_is_ignored(self):
+    checkpointfile = open(self.checkpointpath, "w")
+    checkpointfile.write("not a checkpoint")
+    checkpointfile.close()
+
+    checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+        self.checkpointpath, "host")
+    self.assertEqual(checkpoint.lookup(now=20), {})
+
+
+  def test_clear_removes_the_checkpoint(self):
+    self._interrupted_install()
+
+    checkpoint = benchmark_checkpoint.BenchmarkCheckpoint(
+        self.checkpointpath, "host")
+    checkpoint.clear()
+    self.assertFalse(os.path.exists(self.checkpointpath))
+    self.assertEqual(checkpoint.lookup(now=30), {})
+
+    # Clearing a checkpoint that is already gone is fine.
+    checkpoint.clear()
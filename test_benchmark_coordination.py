@@ -0,0 +1,130 @@
+"""
+<Program Name>
+  test_benchmark_coordination.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for the host-wide lock and the shared result store of
+  benchmark_coordination, in a temporary coordination directory. Run them
+  with:
+
+    python -m unittest test_benchmark_coordination
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import benchmark_coordination
+
+
+
+class _CoordinationDirTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempdir = tempfile.mkdtemp()
+    self.oldcoordinationdir = os.environ.get(
+        benchmark_coordination.COORDINATION_DIR_ENV_VAR)
+    os.environ[benchmark_coordination.COORDINATION_DIR_ENV_VAR] = \
+        self.tempdir
+    self.coordinationdir = benchmark_coordination.get_coordination_dir()
+
+
+  def tearDown(self):
+    if self.oldcoordinationdir is None:
+      del os.environ[benchmark_coordination.COORDINATION_DIR_ENV_VAR]
+    else:
+      os.environ[benchmark_coordination.COORDINATION_DIR_ENV_VAR] = \
+          self.oldcoordinationdir
+    shutil.rmtree(self.tempdir)
+
+
+
+class HostLockTest(_CoordinationDirTest):
+
+  def setUp(self):
+    _CoordinationDirTest.setUp(self)
+    self.oldpollinterval = benchmark_coordination.LOCK_POLL_INTERVAL
+    benchmark_coordination.LOCK_POLL_INTERVAL = 0.05
+    self.lockpath = benchmark_coordination.get_lock_path(self.coordinationdir)
+
+
+  def tearDown(self):
+    benchmark_coordination.LOCK_POLL_INTERVAL = self.oldpollinterval
+    _CoordinationDirTest.tearDown(self)
+
+
+  def test_uses_the_coordination_dir(self):
+    self.assertEqual(self.coordinationdir, self.tempdir)
+    self.assertEqual(os.path.dirname(self.lockpath), self.tempdir)
+
+
+  def test_second_acquire_waits_and_times_out(self):
+    firstlock = benchmark_coordination.HostLock(self.lockpath)
+    secondlock = benchmark_coordination.HostLock(self.lockpath)
+    self.assertTrue(firstlock.acquire(timeout=1))
+    try:
+      starttime = time.time()
+      self.assertFalse(secondlock.acquire(timeout=0.3))
+      self.assertTrue(time.time() - starttime >= 0.3)
+      self.assertEqual(secondlock.lockfd, None)
+    finally:
+      firstlock.release()
+
+    # Once the first holder is gone the lock is free again.
+    self.assertTrue(secondlock.acquire(timeout=1))
+    secondlock.release()
+
+
+  def test_lock_path_that_is_a_link_is_refused(self):
+    targetpath = os.path.join(self.tempdir, "target")
+    open(targetpath, "w").close()
+    os.symlink(targetpath, self.lockpath)
+
+    lock = benchmark_coordination.HostLock(self.lockpath)
+    self.assertRaises(OSError, lock.acquire, 1)
+    self.assertEqual(lock.lockfd, None)
+
+
+  def test_lock_path_that_is_not_a_file_is_refused(self):
+    os.mkdir(self.lockpath)
+    lock = benchmark_coordination.HostLock(self.lockpath)
+    self.assertRaises(OSError, lock.acquire, 1)
+
+
+
+class OpenSharedStoreTest(_CoordinationDirTest):
+
+  def setUp(self):
+    _CoordinationDirTest.setUp(self)
+    self.oldgetuid = os.getuid
+
+
+  def tearDown(self):
+    os.getuid = self.oldgetuid
+    _CoordinationDirTest.tearDown(self)
+
+
+  def test_own_store_is_used(self):
+    store = benchmark_coordination.open_shared_store(self.coordinationdir)
+    store.store("host", {"fileread": 1000})
+
+    store = benchmark_coordination.open_shared_store(self.coordinationdir)
+    self.assertEqual(store.lookup("host"), {"fileread": 1000})
+
+
+  def test_store_of_someone_else_is_ignored(self):
+    # Pretend to be another user, whose store path holds a file that
+    # belongs to the user actually running the tests.
+    realuid = self.oldgetuid()
+    os.getuid = lambda: realuid + 1
+    storepath = benchmark_coordination.get_shared_store_path(
+        self.coordinationdir)
+    open(storepath, "w").close()
+
+    self.assertEqual(
+        benchmark_coordination.open_shared_store(self.coordinationdir), None)
@@ -0,0 +1,87 @@
+"""
+<Program Name>
+  test_benchmark_measurement.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for the percentiles and intervals of benchmark_measurement. Run
+  them with:
+
+    python -m unittest test_benchmark_measurement
+"""
+
+import unittest
+
+import benchmark_measurement
+
+
+
+def _get_measurement(value, samples, sample_size=1000):
+  return benchmark_measurement.Measurement(value, samples=samples,
+                                           sample_size=sample_size)
+
+
+
+class PercentileTest(unittest.TestCase):
+
+  def test_nearest_rank(self):
+    sortedvalues = range(11)
+    self.assertEqual(benchmark_measurement._get_percentile(sortedvalues, 0),
+                     0)
+    self.assertEqual(benchmark_measurement._get_percentile(sortedvalues, 50),
+                     5)
+    self.assertEqual(benchmark_measurement._get_percentile(sortedvalues, 95),
+                     10)
+    self.assertEqual(benchmark_measurement._get_percentile(sortedvalues, 100),
+                     10)
+    self.assertEqual(benchmark_measurement._get_percentile([7], 30), 7)
+
+
+  def test_percentile_value_scales_the_median(self):
+    # Rates of 1000 / 1, 1000 / 2, ... 1000 / 11 bytes a second.
+    measurement = _get_measurement(5000, [float(seconds) for seconds in \
+                                          range(1, 12)])
+    self.assertEqual(measurement.get_percentile_value(50), 5000)
+    self.assertAlmostEqual(measurement.get_percentile_value(0),
+                           5000 * (1000 / 11.0) / (1000 / 6.0))
+    self.assertAlmostEqual(measurement.get_percentile_value(100),
+                           5000 * 1000.0 / (1000 / 6.0))
+
+
+  def test_percentiles_are_ordered(self):
+    measurement = _get_measurement(1000, [0.5, 0.7, 0.9, 1.0, 1.1, 1.2, 1.3,
+                                          1.5, 2.0, 3.0])
+    values = [measurement.get_percentile_value(percentile) \
+                for percentile in range(0, 101, 5)]
+    self.assertEqual(values, sorted(values))
+
+
+  def test_too_few_samples(self):
+    samples = [1.0] * (benchmark_measurement.MIN_INTERVAL_SAMPLES - 1)
+    measurement = _get_measurement(1000, samples)
+    self.assertEqual(measurement.get_percentile_value(5), None)
+    self.assertEqual(measurement.get_interval(), None)
+
+
+  def test_no_interval_for_failures(self):
+    measurement = _get_measurement("probe failed", [1.0] * 20)
+    self.assertEqual(measurement.get_percentile_value(5), None)
+    self.assertEqual(_get_measurement(1000, None).get_interval(), None)
+    self.assertEqual(_get_measurement(1000, [1.0] * 20, None).get_interval(),
+                     None)
+
+
+  def test_interval(self):
+    samples = [1.0 + index / 100.0 for index in range(21)]
+    measurement = _get_measurement(1000, samples)
+    low, high = measurement.get_interval()
+    self.assertTrue(low < 1000 < high)
+    self.assertEqual(low, measurement.get_percentile_value(
+        benchmark_measurement.INTERVAL_PERCENTILES[0]))
+
+
+
+if __name__ == "__main__":
+  unittest.main()
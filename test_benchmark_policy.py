@@ -0,0 +1,68 @@
+"""
+<Program Name>
+  test_benchmark_policy.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for the parsing of failure policies. Run them with:
+
+    python -m unittest test_benchmark_policy
+"""
+
+import unittest
+
+import benchmark_policy
+
+
+
+class FailurePolicyTest(unittest.TestCase):
+
+  def test_rules(self):
+    policy = benchmark_policy.FailurePolicy(
+        "default continue; filewrite retry 3 5\n# comment\n\nmemory abort")
+    self.assertEqual(policy.get_retry_delays("filewrite"), [5, 10, 20])
+    self.assertTrue(policy.should_abort("memory"))
+    self.assertFalse(policy.should_abort("cpu"))
+    self.assertEqual(policy.get_retry_delays("cpu"), [])
+
+
+  def test_unknown_resource(self):
+    for policystring in ("filewrte retry 3", "Memory abort", "cpus continue"):
+      self.assertRaises(benchmark_policy.PolicyError,
+                        benchmark_policy.FailurePolicy, policystring)
+
+
+  def test_bad_rules(self):
+    for policystring in ("cpu", "cpu retry", "cpu retry x",
+                         "cpu retry 1 2 3 4", "cpu retry -1",
+                         "cpu retry 1 nan", "cpu continue 3", "cpu skip",
+                         "cpu abort; cpu continue"):
+      self.assertRaises(benchmark_policy.PolicyError,
+                        benchmark_policy.FailurePolicy, policystring)
+
+
+  def test_delay_is_capped(self):
+    policy = benchmark_policy.FailurePolicy("random retry 6 10 30")
+    self.assertEqual(policy.get_retry_delays("random"),
+                     [10, 20, 30, 30, 30, 30])
+
+    policy = benchmark_policy.FailurePolicy("random retry 4")
+    self.assertEqual(policy.get_retry_delays("random"), [1, 2, 4, 8])
+
+
+  def test_total_delay_is_capped(self):
+    policy = benchmark_policy.FailurePolicy("default retry 1000000 1 1000")
+    delays = policy.get_retry_delays("fileread")
+    self.assertTrue(sum(delays) <= benchmark_policy.MAX_TOTAL_RETRY_DELAY)
+    self.assertTrue(len(delays) <= benchmark_policy.MAX_RETRIES)
+
+    policy = benchmark_policy.FailurePolicy("default retry 1000000 0")
+    self.assertEqual(len(policy.get_retry_delays("fileread")),
+                     benchmark_policy.MAX_RETRIES)
+
+
+
+if __name__ == "__main__":
+  unittest.main()
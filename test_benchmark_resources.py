@@ -0,0 +1,97 @@
+"""
+<Program Name>
+  test_benchmark_resources.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for how benchmark_resources checks the benchmarked resources. Run
+  them with:
+
+    python -m unittest test_benchmark_resources
+"""
+
+import StringIO
+import unittest
+
+import benchmark_resources
+
+
+DEFAULT_MAX_RESOURCE_DICT = benchmark_resources.DEFAULT_MAX_RESOURCE_DICT
+
+
+
+class CheckMaxResourcesTest(unittest.TestCase):
+
+  def _check(self, **resources):
+    max_resource_dict = DEFAULT_MAX_RESOURCE_DICT.copy()
+    max_resource_dict.update(resources)
+    fallback_resources, failed = benchmark_resources.check_max_resources(
+        max_resource_dict, StringIO.StringIO())
+    return max_resource_dict, fallback_resources, failed
+
+
+  def test_sub_core_quota(self):
+    # A cgroup quota of half a core (cpu.max "50000 100000").
+    max_resource_dict, fallback_resources, failed = self._check(cpu=0.5)
+    self.assertEqual(max_resource_dict["cpu"], 0.5)
+    self.assertFalse(failed)
+    self.assertEqual(fallback_resources, {})
+
+
+  def test_counts_are_truncated(self):
+    max_resource_dict = self._check(memory=1000.7)[0]
+    self.assertEqual(max_resource_dict["memory"], 1000)
+    self.assertTrue(isinstance(max_resource_dict["memory"], (int, long)))
+
+
+  def test_non_positive_cpu(self):
+    for cpu in (0, 0.0, -1, float("nan")):
+      max_resource_dict, fallback_resources, failed = self._check(cpu=cpu)
+      self.assertEqual(max_resource_dict["cpu"],
+                       DEFAULT_MAX_RESOURCE_DICT["cpu"])
+      self.assertTrue(failed)
+      self.assertTrue(fallback_resources["cpu"].startswith("non-positive"))
+
+
+  def test_failures_fall_back(self):
+    max_resource_dict, fallback_resources, failed = \
+        self._check(memory="probe failed", fileread=None)
+    self.assertTrue(failed)
+    self.assertEqual(fallback_resources, {"memory": "probe failed",
+                                          "fileread": None})
+    self.assertEqual(max_resource_dict["memory"],
+                     DEFAULT_MAX_RESOURCE_DICT["memory"])
+
+
+  def test_unmeasured_is_not_a_failure(self):
+    failed = self._check(fileread=None)[2]
+    self.assertFalse(failed)
+
+
+  def test_missing_resource(self):
+    max_resource_dict = DEFAULT_MAX_RESOURCE_DICT.copy()
+    del max_resource_dict["memory"]
+    fallback_resources, failed = benchmark_resources.check_max_resources(
+        max_resource_dict, StringIO.StringIO())
+    self.assertTrue(failed)
+    self.assertEqual(fallback_resources, {"memory": "no value returned"})
+
+
+
+class IsFailedValueTest(unittest.TestCase):
+
+  def test_values(self):
+    self.assertFalse(benchmark_resources.is_failed_value(None))
+    self.assertFalse(benchmark_resources.is_failed_value(0.5))
+    self.assertFalse(benchmark_resources.is_failed_value(1000))
+    self.assertTrue(benchmark_resources.is_failed_value(0))
+    self.assertTrue(benchmark_resources.is_failed_value(-2))
+    self.assertTrue(benchmark_resources.is_failed_value(float("nan")))
+    self.assertTrue(benchmark_resources.is_failed_value("timed out"))
+
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,167 @@
+"""
+<Program Name>
+  test_donation_planner.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for donation_planner. Run them with:
+
+    python -m unittest test_donation_planner
+
+  The planner needs NumPy, without it the tests are skipped. The tests
+  that compare the planner with the install also need the installer's
+  modules.
+"""
+
+import StringIO
+import unittest
+
+import resource_vector
+
+try:
+  import donation_planner
+except ImportError:
+  donation_planner = None
+
+try:
+  import benchmark_resources
+except ImportError:
+  benchmark_resources = None
+
+
+RESOURCE_NAMES = resource_vector.RESOURCE_NAMES
+
+
+
+def _get_row(**resources):
+  """
+  <Purpose>
+    Get a row of the default max resources with some of them changed.
+  """
+  max_resources_dict = resource_vector.DEFAULT_MAX_RESOURCE_DICT.copy()
+  max_resources_dict.update(resources)
+  return [float(max_resources_dict[resource]) for resource in RESOURCE_NAMES]
+
+
+
+def _plan_like_the_install(row, resource_percent, vesselcount):
+  """
+  <Purpose>
+    Do the calculations of benchmark_resources.get_tenpercent_dict for a
+    single host.
+
+  <Returns>
+    A tuple (ten percent dictionary, negative resources).
+  """
+  max_resources_dict = dict(zip(RESOURCE_NAMES, row))
+  donatedresources = benchmark_resources.get_donated_from_maxresources(
+      max_resources_dict, resource_percent)
+  offcutresources = resource_vector.ResourceVector.from_dict(
+      resource_vector.DEFAULT_OFFCUT_DICT).scale(vesselcount)
+  donatedresources = donatedresources.subtract(offcutresources)
+  return (benchmark_resources.get_tenpercent_of_donated(
+              donatedresources).to_dict(),
+          donatedresources.get_negative_resources())
+
+
+
+class DonationPlannerTest(unittest.TestCase):
+
+  def setUp(self):
+    if donation_planner is None:
+      self.skipTest("NumPy is not installed")
+
+
+  def _skip_without_the_installer(self):
+    if benchmark_resources is None:
+      self.skipTest("The installer's modules are not available")
+
+
+  def test_agrees_with_the_install(self):
+    self._skip_without_the_installer()
+    hosts = [("small", _get_row(memory=30000000, filesopened=30), 10.0,
+              [50, 50]),
+             ("default", _get_row(), 10.0, [10] * 10),
+             ("large", _get_row(cpu=16, memory=64000000000), 37.0, [100]),
+             ("starved", _get_row(filesopened=10), 10.0, [40, 30, 30])]
+
+    plans = list(donation_planner.plan_hosts(hosts))
+    self.assertEqual([plan["host"] for plan in plans],
+                     [host[0] for host in hosts])
+
+    for plan, (host, row, percent, vessels) in zip(plans, hosts):
+      tenpercent, negativeresources = _plan_like_the_install(row, percent,
+                                                             len(vessels))
+      self.assertEqual(plan["negative_resources"], negativeresources)
+      self.assertEqual(plan["insufficient"], bool(negativeresources))
+      for resource in RESOURCE_NAMES:
+        self.assertAlmostEqual(plan["tenpercent"][resource],
+                               tenpercent[resource])
+
+    self.assertTrue(plans[3]["insufficient"])
+    self.assertEqual(plans[3]["vessels"], [])
+    self.assertEqual(len(plans[1]["vessels"]), 10)
+
+
+  def test_vessels_get_multiples_of_tenpercent(self):
+    plan = list(donation_planner.plan_hosts(
+        [("host", _get_row(), 10.0, [70, 30])]))[0]
+    self.assertEqual(plan["vessels"][0]["memory"],
+                     plan["tenpercent"]["memory"] * 7)
+    self.assertEqual(plan["vessels"][1]["memory"],
+                     plan["tenpercent"]["memory"] * 3)
+
+
+  def test_chunks(self):
+    self._skip_without_the_installer()
+    oldchunksize = donation_planner.CHUNK_SIZE
+    donation_planner.CHUNK_SIZE = 2
+    try:
+      hosts = [(index, _get_row(memory=100000000 * (index + 1)), 10.0,
+                [50, 50]) for index in range(5)]
+      plans = list(donation_planner.plan_hosts(hosts))
+    finally:
+      donation_planner.CHUNK_SIZE = oldchunksize
+
+    self.assertEqual([plan["host"] for plan in plans], range(5))
+    for index in range(5):
+      self.assertEqual(plans[index]["tenpercent"]["memory"],
+                       _plan_like_the_install(hosts[index][1], 10.0,
+                                              2)[0]["memory"])
+
+
+  def test_read_jsonl_defaults(self):
+    fileobj = StringIO.StringIO('{"host": "node1", "vessels": [50, 50], ' + \
+                                '"max_resources": {"cpu": 2}}\n\n')
+    hosts = list(donation_planner.read_jsonl_hosts(fileobj))
+    self.assertEqual(hosts, [("node1", _get_row(cpu=2),
+                              donation_planner.DEFAULT_RESOURCE_PERCENT,
+                              [50, 50])])
+
+
+  def test_read_csv(self):
+    fileobj = StringIO.StringIO("host,resource_percent,vessels,cpu,memory\n" + \
+                                "node1,20,60;40,4,\n")
+    hosts = list(donation_planner.read_csv_hosts(fileobj))
+    self.assertEqual(hosts, [("node1", _get_row(cpu=4), 20.0, [60, 40])])
+
+
+  def test_bad_layouts(self):
+    for vessels in ("[]", "[15, 85]", "[50, 40]"):
+      fileobj = StringIO.StringIO('{"vessels": ' + vessels + '}\n')
+      self.assertRaises(ValueError, list,
+                        donation_planner.read_jsonl_hosts(fileobj))
+
+
+  def test_bad_value(self):
+    fileobj = StringIO.StringIO('{"vessels": [100], ' + \
+                                '"max_resources": {"cpu": "fast"}}\n')
+    self.assertRaises(ValueError, list,
+                      donation_planner.read_jsonl_hosts(fileobj))
+
+
+
+if __name__ == "__main__":
+  unittest.main()
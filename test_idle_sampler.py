@@ -0,0 +1,116 @@
+"""
+<Program Name>
+  test_idle_sampler.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for the ring buffers of idle_sampler and for how
+  benchmark_resources applies the idle capacity. Run them with:
+
+    python -m unittest test_idle_sampler
+"""
+
+import StringIO
+import unittest
+
+import benchmark_resources
+import idle_sampler
+
+
+
+class _NoTelemetry(object):
+
+  def write_record(self, recordtype, record):
+    pass
+
+
+
+def _get_summary(cpu_idle=None, memory_available=None, disk_busy=None):
+  return {"cpu_idle": {"p50": cpu_idle, "p95": cpu_idle, "samples": 1},
+          "memory_available": {"p50": memory_available,
+                               "p95": memory_available, "samples": 1},
+          "disk_busy": {"p50": disk_busy, "p95": disk_busy, "samples": 1}}
+
+
+
+class RingBufferTest(unittest.TestCase):
+
+  def test_empty(self):
+    buffer = idle_sampler.RingBuffer(3)
+    self.assertEqual(len(buffer), 0)
+    self.assertEqual(buffer.get_percentile(50), None)
+
+
+  def test_keeps_the_last_values(self):
+    buffer = idle_sampler.RingBuffer(3)
+    for value in range(1, 6):
+      buffer.append(value)
+    self.assertEqual(len(buffer), 3)
+    self.assertEqual(buffer.get_percentile(0), 3)
+    self.assertEqual(buffer.get_percentile(100), 5)
+
+
+  def test_percentiles(self):
+    buffer = idle_sampler.RingBuffer(11)
+    for value in [5, 3, 9, 0, 10, 1, 8, 2, 7, 4, 6]:
+      buffer.append(value)
+    self.assertEqual(buffer.get_percentile(0), 0)
+    self.assertEqual(buffer.get_percentile(50), 5)
+    self.assertEqual(buffer.get_percentile(95), 10)
+    self.assertEqual(buffer.get_percentile(5), 1)
+
+
+  def test_capacity_of_one(self):
+    buffer = idle_sampler.RingBuffer(1)
+    buffer.append(1.5)
+    buffer.append(2.5)
+    self.assertEqual(len(buffer), 1)
+    self.assertEqual(buffer.get_percentile(50), 2.5)
+
+
+
+class ApplyIdleCapacityTest(unittest.TestCase):
+
+  def setUp(self):
+    self.oldgetratio = benchmark_resources._get_cores_per_processor
+    # A hyperthreaded host, two logical processors to a core.
+    benchmark_resources._get_cores_per_processor = lambda logfileobj: 0.5
+
+
+  def tearDown(self):
+    benchmark_resources._get_cores_per_processor = self.oldgetratio
+
+
+  def _apply(self, max_resource_dict, summary):
+    benchmark_resources.apply_idle_capacity(max_resource_dict, summary,
+                                            StringIO.StringIO(),
+                                            _NoTelemetry())
+    return max_resource_dict
+
+
+  def test_idle_processors_are_converted_to_cores(self):
+    # 6 idle logical processors are 3 cores, fewer than the 4 of the host.
+    self.assertEqual(self._apply({"cpu": 4}, _get_summary(cpu_idle=6.0)),
+                     {"cpu": 3.0})
+
+
+  def test_an_idle_host_is_not_lowered(self):
+    # All 8 logical processors idle are no more than the 4 cores.
+    self.assertEqual(self._apply({"cpu": 4}, _get_summary(cpu_idle=8.0)),
+                     {"cpu": 4})
+
+
+  def test_memory_and_disk(self):
+    max_resource_dict = self._apply({"cpu": 4, "memory": 1000,
+                                     "filewrite": 100, "fileread": 200},
+                                    _get_summary(memory_available=600,
+                                                 disk_busy=0.25))
+    self.assertEqual(max_resource_dict, {"cpu": 4, "memory": 600,
+                                         "filewrite": 75, "fileread": 150})
+
+
+
+if __name__ == "__main__":
+  unittest.main()
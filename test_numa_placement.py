@@ -0,0 +1,141 @@
+"""
+<Program Name>
+  test_numa_placement.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for numa_placement. Run them with:
+
+    python -m unittest test_numa_placement
+"""
+
+import StringIO
+import platform
+import unittest
+
+import numa_placement
+
+
+
+def _get_nodes(*nodes):
+  """
+  <Purpose>
+    Describe NUMA nodes like Linux_resources.get_numa_nodes, from a
+    (cores, memory) tuple for each of them.
+  """
+  numa_nodes = []
+  for nodenumber in range(len(nodes)):
+    cores, memory = nodes[nodenumber]
+    numa_nodes.append({"node": nodenumber, "cpus": range(cores * 2),
+                       "cores": cores, "memory": memory})
+  return numa_nodes
+
+
+
+def _get_vessels(*percents):
+  return [(percent, None) for percent in percents]
+
+
+
+class PlaceVesselsTest(unittest.TestCase):
+
+  def test_donation_fits_on_one_node(self):
+    # 10% of a host of two 8 core nodes is 1.6 cores, the 80% vessel gets
+    # 1.28 of them, which easily fits on either node.
+    numa_nodes = _get_nodes((8, 8000000000), (8, 8000000000))
+    tenpercentdict = {"cpu": 0.16, "memory": 160000000}
+    scale, placement = numa_placement.place_vessels(numa_nodes,
+        _get_vessels(80, 10, 10), tenpercentdict)
+    self.assertEqual(scale, 1.0)
+    self.assertEqual(len(placement), 3)
+
+
+  def test_largest_vessels_are_spread(self):
+    # Half the host is donated. Each vessel goes to the node with the most
+    # left, so the second large one does not join the first.
+    numa_nodes = _get_nodes((4, 4000000000), (4, 4000000000))
+    tenpercentdict = {"cpu": 0.4, "memory": 400000000}
+    scale, placement = numa_placement.place_vessels(numa_nodes,
+        _get_vessels(40, 40, 20), tenpercentdict)
+    self.assertEqual(scale, 1.0)
+    self.assertNotEqual(placement[0], placement[1])
+
+
+  def test_oversized_vessel_is_scaled(self):
+    # The whole host is donated to one vessel, but a node only has half
+    # of its cores and memory.
+    numa_nodes = _get_nodes((4, 4000000000), (4, 4000000000))
+    tenpercentdict = {"cpu": 0.8, "memory": 800000000}
+    scale, placement = numa_placement.place_vessels(numa_nodes,
+        _get_vessels(100), tenpercentdict)
+    self.assertTrue(0.5 - numa_placement.SCALE_PRECISION <= scale <= 0.5)
+    self.assertEqual(len(placement), 1)
+
+
+  def test_cpu_and_memory_are_checked_apart(self):
+    # The first node has the cores but too little memory.
+    numa_nodes = _get_nodes((8, 100000000), (1, 8000000000))
+    tenpercentdict = {"cpu": 0.1, "memory": 100000000}
+    scale, placement = numa_placement.place_vessels(numa_nodes,
+        _get_vessels(50, 50), tenpercentdict)
+    self.assertEqual(scale, 1.0)
+    self.assertEqual(placement, [1, 1])
+
+
+  def test_node_without_cores(self):
+    # A memory-only node can have nothing placed on it, even a vessel
+    # without cpu.
+    numa_nodes = _get_nodes((0, 8000000000), (4, 4000000000))
+    tenpercentdict = {"cpu": 0.0, "memory": 100000000}
+    scale, placement = numa_placement.place_vessels(numa_nodes,
+        _get_vessels(50, 50), tenpercentdict)
+    self.assertEqual((scale, placement), (1.0, [1, 1]))
+
+
+  def test_no_node_has_both(self):
+    numa_nodes = _get_nodes((4, 0), (0, 4000000000))
+    tenpercentdict = {"cpu": 0.4, "memory": 400000000}
+    self.assertEqual(numa_placement.place_vessels(numa_nodes,
+        _get_vessels(50, 50), tenpercentdict), None)
+
+
+
+class GetNumaPlacementTest(unittest.TestCase):
+
+  def setUp(self):
+    if platform.system() != "Linux":
+      self.skipTest("NUMA nodes are only read on Linux")
+    import Linux_resources
+    self.Linux_resources = Linux_resources
+    self.oldgetnodes = Linux_resources.get_numa_nodes
+
+
+  def tearDown(self):
+    self.Linux_resources.get_numa_nodes = self.oldgetnodes
+
+
+  def test_nothing_placed_without_usable_nodes(self):
+    # The cpuset of the cgroup leaves the node with the memory no cores.
+    self.Linux_resources.get_numa_nodes = lambda: _get_nodes((4, 0),
+                                                             (0, 4000000000))
+    logfileobj = StringIO.StringIO()
+    self.assertEqual(numa_placement.get_numa_placement(_get_vessels(100),
+        {"cpu": 0.1, "memory": 100000000}, logfileobj), None)
+    self.assertTrue("not placed" in logfileobj.getvalue())
+
+
+  def test_placement(self):
+    self.Linux_resources.get_numa_nodes = lambda: _get_nodes(
+        (4, 4000000000), (4, 4000000000))
+    scale, placement, numa_nodes = numa_placement.get_numa_placement(
+        _get_vessels(80, 10, 10), {"cpu": 0.08, "memory": 80000000},
+        StringIO.StringIO())
+    self.assertEqual(scale, 1.0)
+    self.assertEqual(len(placement), 3)
+
+
+
+if __name__ == "__main__":
+  unittest.main()
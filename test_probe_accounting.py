@@ -0,0 +1,68 @@
+"""
+<Program Name>
+  test_probe_accounting.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for probe_accounting. Run them with:
+
+    python -m unittest test_probe_accounting
+"""
+
+import threading
+import time
+import unittest
+
+import probe_accounting
+
+
+
+def _spin(seconds):
+  endtime = time.time() + seconds
+  while time.time() < endtime:
+    pass
+
+
+
+class ProbeAccountingTest(unittest.TestCase):
+
+  def test_process_cost(self):
+    before = probe_accounting.take_snapshot()
+    _spin(0.1)
+    cost = probe_accounting.get_cost(before, probe_accounting.take_snapshot())
+    self.assertTrue(cost["user_time"] + cost["system_time"] > 0.05)
+
+
+  def test_thread_cost_leaves_out_other_threads(self):
+    if probe_accounting.RUSAGE_THREAD is None:
+      self.skipTest("No per-thread resource usage here")
+
+    costs = []
+    def idle_probe():
+      before = probe_accounting.take_snapshot(thread=True)
+      time.sleep(0.3)
+      costs.append(probe_accounting.get_cost(before,
+          probe_accounting.take_snapshot(thread=True)))
+
+    idlethread = threading.Thread(target=idle_probe)
+    idlethread.start()
+    # Another probe keeps a processor busy meanwhile.
+    _spin(0.2)
+    idlethread.join()
+
+    self.assertTrue(costs[0]["user_time"] < 0.1)
+    self.assertEqual(costs[0]["peak_rss_delta"], None)
+
+
+  def test_missing_counters_are_none(self):
+    cost = probe_accounting.get_cost({"user_time": 1.0},
+                                     {"user_time": 1.5})
+    self.assertEqual(cost["user_time"], 0.5)
+    self.assertEqual(cost["read_bytes"], None)
+
+
+
+if __name__ == "__main__":
+  unittest.main()
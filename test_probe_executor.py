@@ -0,0 +1,135 @@
+"""
+<Program Name>
+  test_probe_executor.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for how probe_executor runs probes and stops the ones that run out
+  of time. Run them with:
+
+    python -m unittest test_probe_executor
+"""
+
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+
+import probe_executor
+
+
+
+def _measure_one():
+  return 1
+
+
+def _hang():
+  time.sleep(60)
+
+
+def _hang_in_command(pidfilename):
+  command = subprocess.Popen(["sleep", "60"])
+  pidfile = open(pidfilename, 'w')
+  pidfile.write(str(command.pid))
+  pidfile.close()
+  command.wait()
+
+
+def _die():
+  os._exit(3)
+
+
+def _is_running(pid):
+  """
+  <Purpose>
+    Check whether a process is still running. A killed process whose
+    parent is gone may be left a zombie for a while, which does not count.
+  """
+  try:
+    statfile = open("/proc/" + str(pid) + "/stat")
+  except IOError:
+    return False
+  try:
+    # example value for the start of /proc/<pid>/stat: '1234 (sleep) S'
+    return statfile.read().rsplit(")", 1)[1].split()[0] != "Z"
+  finally:
+    statfile.close()
+
+
+
+class RunProbesTest(unittest.TestCase):
+
+  def setUp(self):
+    if probe_executor.multiprocessing is None:
+      self.skipTest("multiprocessing is not available")
+    self.tempdir = tempfile.mkdtemp()
+
+
+  def tearDown(self):
+    shutil.rmtree(self.tempdir)
+
+
+  def test_process_and_thread_probes(self):
+    probelist = [probe_executor.Probe(["a"], _measure_one, use_process=True),
+                 probe_executor.Probe(["b"], _measure_one)]
+    measurement_dict = probe_executor.run_probes(probelist)
+    self.assertEqual(measurement_dict["a"].value, 1)
+    self.assertEqual(measurement_dict["b"].value, 1)
+
+
+  def test_process_probe_is_killed(self):
+    probe = probe_executor.Probe(["a"], _hang, use_process=True, timeout=0.5)
+    worker = probe_executor._start_worker(probe, None, None)
+    starttime = time.time()
+    while not worker.check():
+      time.sleep(probe_executor.WATCHDOG_INTERVAL)
+
+    self.assertTrue(time.time() - starttime < 5)
+    self.assertEqual(worker.measurement.value,
+                     "probe timed out after 0.5 seconds")
+    self.assertFalse(worker.process.is_alive())
+
+
+  def test_commands_are_killed_too(self):
+    if not hasattr(os, "killpg"):
+      self.skipTest("No process groups here")
+
+    pidfilename = os.path.join(self.tempdir, "pid")
+    probe = probe_executor.Probe(["a"], functools.partial(_hang_in_command,
+        pidfilename), use_process=True, timeout=1)
+    measurement_dict = probe_executor.run_probes([probe])
+
+    self.assertTrue(measurement_dict["a"].value.startswith("probe timed out"))
+    commandpid = int(open(pidfilename).read())
+    # The kill is not instantaneous.
+    for attempt in range(100):
+      if not _is_running(commandpid):
+        break
+      time.sleep(0.05)
+    self.assertFalse(_is_running(commandpid))
+
+
+  def test_thread_probe_is_abandoned(self):
+    probe = probe_executor.Probe(["b"], _hang, timeout=0.2)
+    starttime = time.time()
+    measurement_dict = probe_executor.run_probes([probe])
+    self.assertTrue(time.time() - starttime < 5)
+    self.assertEqual(measurement_dict["b"].value,
+                     "probe timed out after 0.2 seconds")
+
+
+  def test_worker_that_dies(self):
+    probe = probe_executor.Probe(["a"], _die, use_process=True)
+    measurement_dict = probe_executor.run_probes([probe])
+    self.assertEqual(measurement_dict["a"].value,
+                     "probe worker died with exit code 3")
+
+
+
+if __name__ == "__main__":
+  unittest.main()
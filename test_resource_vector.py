@@ -0,0 +1,103 @@
+"""
+<Program Name>
+  test_resource_vector.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for resource_vector. Run them with:
+
+    python -m unittest test_resource_vector
+"""
+
+import unittest
+
+import resource_vector
+
+
+RESOURCE_NAMES = resource_vector.RESOURCE_NAMES
+
+
+
+def _get_vector(value=0, **resources):
+  """
+  <Purpose>
+    Get a vector with every resource at value, except the ones given.
+  """
+  resource_dict = dict([(resource, value) for resource in RESOURCE_NAMES])
+  resource_dict.update(resources)
+  return resource_vector.ResourceVector.from_dict(resource_dict)
+
+
+
+class ResourceVectorTest(unittest.TestCase):
+
+  def test_wrong_length(self):
+    self.assertRaises(ValueError, resource_vector.ResourceVector, [1, 2])
+
+
+  def test_dict_round_trip(self):
+    resource_dict = {}
+    for index in range(len(RESOURCE_NAMES)):
+      resource_dict[RESOURCE_NAMES[index]] = index * 1000
+    resource_dict["cpu"] = 0.25
+    resource_dict["messport"] = set([12345])
+
+    vector = resource_vector.ResourceVector.from_dict(resource_dict)
+    del resource_dict["messport"]
+    self.assertEqual(vector.to_dict(), resource_dict)
+
+
+  def test_missing_resource(self):
+    self.assertRaises(KeyError, resource_vector.ResourceVector.from_dict,
+                      {"cpu": 1})
+
+
+  def test_to_dict_types(self):
+    resource_dict = _get_vector(7.9, cpu=0.5).to_dict()
+    self.assertEqual(resource_dict["cpu"], 0.5)
+    self.assertEqual(resource_dict["memory"], 7)
+    self.assertTrue(isinstance(resource_dict["memory"], (int, long)))
+
+
+  def test_arithmetic(self):
+    first = _get_vector(10, cpu=1.5)
+    second = _get_vector(4, cpu=0.5)
+    self.assertEqual(first.add(second), _get_vector(14, cpu=2.0))
+    self.assertEqual(first.subtract(second), _get_vector(6, cpu=1.0))
+    self.assertEqual(first.scale(0.5), _get_vector(5, cpu=0.75))
+
+
+  def test_immutable(self):
+    vector = _get_vector(10)
+    vector.add(_get_vector(1))
+    vector.replace("memory", 3)
+    self.assertEqual(vector, _get_vector(10))
+    self.assertEqual(vector.replace("memory", 3)["memory"], 3)
+
+
+  def test_truncate_keeps_cpu_fractional(self):
+    vector = _get_vector(2.9, cpu=0.123).truncate()
+    self.assertEqual(vector["cpu"], 0.123)
+    self.assertEqual(vector["memory"], 2)
+    # Towards zero, as int() would.
+    self.assertEqual(_get_vector(-2.9).truncate()["memory"], -2)
+
+
+  def test_clamp(self):
+    vector = _get_vector(5, memory=-3, diskused=50)
+    clamped = vector.clamp(0, _get_vector(10))
+    self.assertEqual(clamped, _get_vector(5, memory=0, diskused=10))
+
+
+  def test_negative_resources(self):
+    self.assertFalse(_get_vector(1).has_negative())
+    vector = _get_vector(1, memory=-1, cpu=-0.001)
+    self.assertTrue(vector.has_negative())
+    self.assertEqual(vector.get_negative_resources(), ["cpu", "memory"])
+
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,148 @@
+"""
+<Program Name>
+  test_vessel_feasibility.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Tests for vessel_feasibility. Run them with:
+
+    python -m unittest test_vessel_feasibility
+"""
+
+import unittest
+
+import benchmark_resources
+import vessel_feasibility
+
+
+
+def _get_max_resources(**resources):
+  """
+  <Purpose>
+    Get the default max resources with some of them changed.
+  """
+  max_resources_dict = benchmark_resources.DEFAULT_MAX_RESOURCE_DICT.copy()
+  max_resources_dict.update(resources)
+  return max_resources_dict
+
+
+
+class MinimumResourcePercentTest(unittest.TestCase):
+
+  def test_minimum_percent_is_feasible_and_tight(self):
+    max_resources_dict = _get_max_resources()
+    percent, bottleneck = \
+        vessel_feasibility.get_minimum_resource_percent(max_resources_dict, 4)
+
+    self.assertNotEqual(percent, None)
+    self.assertEqual(vessel_feasibility.get_negative_resources(
+        max_resources_dict, percent, 4), [])
+    self.assertNotEqual(vessel_feasibility.get_negative_resources(
+        max_resources_dict, percent * 0.99, 4), [])
+    self.assertTrue(bottleneck in vessel_feasibility.get_negative_resources(
+        max_resources_dict, percent * 0.99, 4))
+
+
+  def test_truncation_is_retried(self):
+    # 100 * 1000000 / 100000003 percent of 100000003 bytes truncates to
+    # 999999 bytes, one short of the offcut of a vessel.
+    max_resources_dict = _get_max_resources(memory=100000003)
+    exactpercent = 100.0 * 1000000 / 100000003
+    self.assertEqual(vessel_feasibility.get_negative_resources(
+        max_resources_dict, exactpercent, 1), ["memory"])
+
+    percent, bottleneck = \
+        vessel_feasibility.get_minimum_resource_percent(max_resources_dict, 1)
+    self.assertEqual(bottleneck, "memory")
+    self.assertTrue(percent > exactpercent)
+    self.assertTrue(percent < exactpercent * 1.000001)
+    self.assertEqual(vessel_feasibility.get_negative_resources(
+        max_resources_dict, percent, 1), [])
+
+
+  def test_fixed_donation_is_skipped(self):
+    # The events are donated regardless of the percentage, so however few
+    # the host has they never need a larger one.
+    max_resources_dict = _get_max_resources(events=1)
+    percent, bottleneck = \
+        vessel_feasibility.get_minimum_resource_percent(max_resources_dict, 2)
+    self.assertNotEqual(percent, None)
+    self.assertNotEqual(bottleneck, "events")
+
+
+  def test_missing_resource(self):
+    max_resources_dict = _get_max_resources(memory=0)
+    self.assertEqual(vessel_feasibility.get_minimum_resource_percent(
+        max_resources_dict, 1), (None, "memory"))
+
+
+  def test_more_than_the_host(self):
+    max_resources_dict = _get_max_resources(filesopened=5)
+    self.assertEqual(vessel_feasibility.get_minimum_resource_percent(
+        max_resources_dict, 10), (None, "filesopened"))
+
+
+
+class MaximumVesselCountTest(unittest.TestCase):
+
+  def test_capped_at_max_vessel_count(self):
+    max_resources_dict = {}
+    for resource, value in \
+        benchmark_resources.DEFAULT_MAX_RESOURCE_DICT.items():
+      max_resources_dict[resource] = value * 1000
+    self.assertEqual(vessel_feasibility.get_maximum_vessel_count(
+        max_resources_dict, 100), (vessel_feasibility.MAX_VESSEL_COUNT, None))
+
+
+  def test_bottleneck(self):
+    # 10% of 40 files is 4, one for every vessel.
+    max_resources_dict = _get_max_resources(filesopened=40)
+    self.assertEqual(vessel_feasibility.get_maximum_vessel_count(
+        max_resources_dict, 10), (4, "filesopened"))
+
+
+  def test_nothing_fits(self):
+    max_resources_dict = _get_max_resources(memory=1000)
+    vesselcount, bottleneck = vessel_feasibility.get_maximum_vessel_count(
+        max_resources_dict, 10)
+    self.assertEqual((vesselcount, bottleneck), (0, "memory"))
+
+
+  def test_agrees_with_the_install(self):
+    max_resources_dict = _get_max_resources(memory=10000000)
+    vesselcount = vessel_feasibility.get_maximum_vessel_count(
+        max_resources_dict, 50)[0]
+    self.assertEqual(vessel_feasibility.get_negative_resources(
+        max_resources_dict, 50, vesselcount), [])
+    self.assertNotEqual(vessel_feasibility.get_negative_resources(
+        max_resources_dict, 50, vesselcount + 1), [])
+
+
+
+class CheckLayoutTest(unittest.TestCase):
+
+  def test_feasible_layout(self):
+    result = vessel_feasibility.check_layout(_get_max_resources(),
+                                             [(50,), (50,)], 10)
+    self.assertTrue(result["feasible"])
+    self.assertEqual(result["negative_resources"], [])
+    self.assertTrue(result["minimum_percent"] <= 10)
+    self.assertTrue(result["maximum_vessels"] >= 2)
+
+
+  def test_infeasible_layout(self):
+    # 10% of 10 files is only enough for one vessel.
+    result = vessel_feasibility.check_layout(
+        _get_max_resources(filesopened=10), [(50,), (50,)], 10)
+    self.assertFalse(result["feasible"])
+    self.assertEqual(result["negative_resources"], ["filesopened"])
+    self.assertEqual(result["bottleneck"], "filesopened")
+    self.assertEqual(result["minimum_percent"], 20)
+    self.assertEqual(result["maximum_vessels"], 1)
+
+
+
+if __name__ == "__main__":
+  unittest.main()
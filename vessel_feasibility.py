@@ -0,0 +1,260 @@
+"""
+<Program Name>
+  vessel_feasibility.py
+
+<Started>
+  October 18, 2026
+
+<Purpose>
+  Answers the questions behind an InsufficientResourceError before an
+  install is tried, for provisioning tools: given the benchmark results of
+  a host and a vessel layout, what is the smallest percentage of the host
+  that can be donated, how many vessels can the donation be split into,
+  and which resource runs out first.
+
+  The answers use the same calculations as benchmark_resources.main: the
+  donation is get_donated_from_maxresources, and every vessel costs
+  DEFAULT_OFFCUT_DICT (or the offcut measured by offcut_calibration, which
+  every function takes instead as offcut_dict). A layout is feasible when
+  no resource is left negative once the offcut of every vessel has been
+  taken from the donation. The answers are worked out directly from the
+  offcut of each resource and then checked with those calculations, so
+  they agree with what an install would do, rounding included.
+
+  Vessels are given multiples of ten percent of the donation (see
+  create_installer_state), so no layout has more than MAX_VESSEL_COUNT
+  vessels, whatever the resources would allow.
+"""
+
+import benchmark_resources
+import resource_vector
+
+
+# The most vessels a layout can have, one for every ten percent.
+MAX_VESSEL_COUNT = 10
+
+# How much the minimum percentage is raised at a time when rounding makes
+# the exact one fall just short.
+PERCENT_ROUNDING_STEP = 1e-9
+
+
+
+def get_negative_resources(max_resources_dict, resource_percent,
+                           vesselcount, offcut_dict=None):
+  """
+  <Purpose>
+    Check a donation with the calculations of benchmark_resources.main.
+
+  <Arguments>
+    max_resources_dict:
+      The benchmark results, as returned by
+      benchmark_resources.run_benchmark.
+
+    resource_percent:
+      The percentage of the host that is donated.
+
+    vesselcount:
+      The number of vessels the donation is split into.
+
+    offcut_dict:
+      The offcut of a vessel, benchmark_resources.DEFAULT_OFFCUT_DICT if
+      None.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A list of the resources that the offcut of the vessels leaves negative,
+    empty if the donation is feasible.
+  """
+  donatedresources = benchmark_resources.get_donated_from_maxresources(
+      max_resources_dict, resource_percent)
+  if offcut_dict is None:
+    offcut_dict = benchmark_resources.DEFAULT_OFFCUT_DICT
+  offcutresources = resource_vector.ResourceVector.from_dict(
+      offcut_dict).scale(vesselcount)
+  return donatedresources.subtract(offcutresources).get_negative_resources()
+
+
+
+def get_minimum_resource_percent(max_resources_dict, vesselcount,
+                                 offcut_dict=None):
+  """
+  <Purpose>
+    Find the smallest percentage of a host that can be split into a number
+    of vessels.
+
+  <Arguments>
+    max_resources_dict:
+      The benchmark results, as returned by
+      benchmark_resources.run_benchmark.
+
+    vesselcount:
+      The number of vessels.
+
+    offcut_dict:
+      See get_negative_resources.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A tuple (percent, bottleneck). percent is the smallest percentage, or
+    None if even donating all of the host (or more, for the resources whose
+    donation does not depend on the percentage) is not enough. bottleneck
+    is the resource that needs the largest percentage, or None if no
+    resource has an offcut.
+  """
+  if offcut_dict is None:
+    offcut_dict = benchmark_resources.DEFAULT_OFFCUT_DICT
+  minimumpercent = 0.0
+  bottleneck = None
+
+  # The resources donated regardless of the percentage (the events, see
+  # benchmark_resources) are left to the check below.
+  fixed_dict = benchmark_resources.get_donated_from_maxresources(
+      max_resources_dict, 0).to_dict()
+
+  for resource, offcut in offcut_dict.items():
+    needed = offcut * vesselcount
+    if needed <= 0 or fixed_dict.get(resource, 0) > 0:
+      continue
+
+    available = max_resources_dict.get(resource, 0)
+    if available <= 0:
+      return (None, resource)
+
+    percent = 100.0 * needed / available
+    if bottleneck is None or percent > minimumpercent:
+      minimumpercent = percent
+      bottleneck = resource
+
+  # Truncating the donated amounts can leave the exact percentage a tiny
+  # bit short. A resource that is still negative after that (the events
+  # are donated regardless of the percentage) cannot be fixed at all.
+  for attempt in range(10):
+    negativeresources = get_negative_resources(max_resources_dict,
+                                               minimumpercent, vesselcount,
+                                               offcut_dict)
+    if not negativeresources:
+      break
+    minimumpercent += max(minimumpercent, 1) * PERCENT_ROUNDING_STEP
+  else:
+    return (None, negativeresources[0])
+
+  if minimumpercent > 100:
+    return (None, bottleneck)
+  return (minimumpercent, bottleneck)
+
+
+
+def get_maximum_vessel_count(max_resources_dict, resource_percent,
+                             offcut_dict=None):
+  """
+  <Purpose>
+    Find the largest number of vessels a donation can be split into.
+
+  <Arguments>
+    max_resources_dict:
+      The benchmark results, as returned by
+      benchmark_resources.run_benchmark.
+
+    resource_percent:
+      The percentage of the host that is donated.
+
+    offcut_dict:
+      See get_negative_resources.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A tuple (vesselcount, bottleneck). vesselcount is at most
+    MAX_VESSEL_COUNT, and may be 0. bottleneck is the resource that runs
+    out first as vessels are added, or None if the layout limit is reached
+    first.
+  """
+  if offcut_dict is None:
+    offcut_dict = benchmark_resources.DEFAULT_OFFCUT_DICT
+  donated_dict = benchmark_resources.get_donated_from_maxresources(
+      max_resources_dict, resource_percent).to_dict()
+
+  vesselcount = None
+  bottleneck = None
+  for resource, offcut in offcut_dict.items():
+    if offcut <= 0:
+      continue
+    count = max(int(donated_dict[resource] / offcut), 0)
+    if vesselcount is None or count < vesselcount:
+      vesselcount = count
+      bottleneck = resource
+
+  if vesselcount is None or vesselcount >= MAX_VESSEL_COUNT:
+    vesselcount = MAX_VESSEL_COUNT
+    if not get_negative_resources(max_resources_dict, resource_percent,
+                                  vesselcount, offcut_dict):
+      return (vesselcount, None)
+
+  # The division above can be off by one either way for the fractional
+  # resources, the calculations of the install decide.
+  while vesselcount > 0 and get_negative_resources(max_resources_dict,
+      resource_percent, vesselcount, offcut_dict):
+    vesselcount -= 1
+  while vesselcount < MAX_VESSEL_COUNT and not get_negative_resources(
+      max_resources_dict, resource_percent, vesselcount + 1, offcut_dict):
+    vesselcount += 1
+
+  if vesselcount == MAX_VESSEL_COUNT:
+    return (vesselcount, None)
+  return (vesselcount, get_negative_resources(max_resources_dict,
+      resource_percent, vesselcount + 1, offcut_dict)[0])
+
+
+
+def check_layout(max_resources_dict, vesselcreationlist, resource_percent,
+                 offcut_dict=None):
+  """
+  <Purpose>
+    Check whether a vessel layout can be installed on a host, and how much
+    room there is either way.
+
+  <Arguments>
+    max_resources_dict:
+      The benchmark results, as returned by
+      benchmark_resources.run_benchmark.
+
+    vesselcreationlist:
+      The vessel layout, see create_installer_state.main. Only the number
+      of vessels matters.
+
+    resource_percent:
+      The percentage of the host that is donated.
+
+    offcut_dict:
+      See get_negative_resources.
+
+  <Exceptions>
+    None
+
+  <Returns>
+    A dictionary with:
+      feasible: True if the layout can be installed
+      negative_resources: the resources the layout leaves negative
+      minimum_percent, bottleneck: see get_minimum_resource_percent, for
+        the number of vessels in the layout
+      maximum_vessels: see get_maximum_vessel_count
+  """
+  vesselcount = len(vesselcreationlist)
+  negativeresources = get_negative_resources(max_resources_dict,
+                                             resource_percent, vesselcount,
+                                             offcut_dict)
+  minimumpercent, bottleneck = get_minimum_resource_percent(
+      max_resources_dict, vesselcount, offcut_dict)
+  maximumvessels = get_maximum_vessel_count(max_resources_dict,
+                                            resource_percent, offcut_dict)[0]
+
+  return {"feasible": not negativeresources,
+          "negative_resources": negativeresources,
+          "minimum_percent": minimumpercent,
+          "bottleneck": bottleneck,
+          "maximum_vessels": maximumvessels}